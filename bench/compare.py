@@ -0,0 +1,78 @@
+"""Compare two benchmark result files and flag regressions.
+
+Usage:
+    python -m bench.compare OLD.json NEW.json [--threshold 0.2]
+
+Exits with status 1 if any stage got slower (or used more memory) by more
+than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_THRESHOLD = 0.2  # 20%
+
+
+def load_results(path: str) -> Dict[Tuple[int, str], Dict]:
+    """Results of a run, keyed by (size, stage)."""
+    with open(path, 'r') as f:
+        document = json.load(f)
+    return {(r["size"], r["stage"]): r for r in document["results"]}
+
+
+def compare(old: Dict[Tuple[int, str], Dict], new: Dict[Tuple[int, str], Dict],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare the stages present in both runs.
+
+    Returns:
+        One row per stage with time and memory ratios (new / old) and
+        whether either grew by more than ``threshold``
+    """
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        time_ratio = after["seconds"] / before["seconds"] if before["seconds"] else None
+        memory_ratio = (
+            after["rss_growth_mb"] / before["rss_growth_mb"] if before["rss_growth_mb"] > 1 else None
+        )
+        rows.append({
+            "size": key[0],
+            "stage": key[1],
+            "old_seconds": before["seconds"],
+            "new_seconds": after["seconds"],
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regression": any(
+                ratio is not None and ratio > 1 + threshold for ratio in (time_ratio, memory_ratio)
+            ),
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("old", help="Baseline results")
+    parser.add_argument("new", help="Results to check")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed slowdown or memory growth (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.old), load_results(args.new), args.threshold)
+
+    def ratio(value: Optional[float]) -> str:
+        return f"{value:6.2f}x" if value is not None else "      -"
+
+    print(f"{'size':>9}  {'stage':<16} {'old':>10} {'new':>10}   time  memory")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['size']:>9,}  {row['stage']:<16} {row['old_seconds']:9.4f}s {row['new_seconds']:9.4f}s"
+              f" {ratio(row['time_ratio'])} {ratio(row['memory_ratio'])}{flag}")
+
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Seeded generator of realistic repository dicts, seen-repo caches and search pages."""
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from src.stub_server import CORPUS_NOW, LANGUAGES, WORDS
+
+
+# API links in each search result item (``<name>_url``), as the real API sends them
+OWNER_LINKS = ("followers", "following", "gists", "starred", "subscriptions",
+               "organizations", "repos", "events", "received_events")
+REPO_LINKS = ("forks", "keys", "collaborators", "teams", "hooks", "issue_events", "events",
+              "assignees", "branches", "tags", "blobs", "git_tags", "git_refs", "trees",
+              "statuses", "languages", "stargazers", "contributors", "subscribers",
+              "subscription", "commits", "git_commits", "comments", "issue_comment",
+              "contents", "compare", "merges", "archive", "downloads", "issues", "pulls",
+              "milestones", "notifications", "labels", "releases", "deployments")
+
+
+def generate_repos(count: int, seed: int = 0, topic: str = "ai") -> List[Dict]:
+    """
+    Build ``count`` repository dicts shaped like fetch_repos results.
+
+    Stars follow a Pareto distribution like real search results, names are
+    unique, and the same seed always gives the same corpus.
+    """
+    rng = random.Random(seed)
+    languages = [language or "Unknown" for language in LANGUAGES]
+
+    repos = []
+    for i in range(count):
+        words = rng.sample(WORDS, 3)
+        owner = f"org{rng.randrange(max(count // 20, 1))}"
+        name = f"{words[0]}-{words[1]}-{i}"
+        updated = CORPUS_NOW - timedelta(seconds=rng.randrange(400 * 86_400))
+        repos.append({
+            "name": name,
+            "full_name": f"{owner}/{name}",
+            "description": f"A {words[1]} {words[2]} for {topic}" if rng.random() > 0.05
+            else "No description provided",
+            "url": f"https://github.com/{owner}/{name}",
+            "stars": int(50 * rng.paretovariate(1.2)),
+            "forks": rng.randrange(2000),
+            "language": rng.choice(languages),
+            "updated_at": updated.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "topics": [topic] + rng.sample(WORDS, rng.randrange(4)),
+        })
+
+    return repos
+
+
+def generate_cache(repos: List[Dict], seed: int = 0, seen_fraction: float = 0.3,
+                   extra: float = 1.0, days: int = 14) -> Dict[str, str]:
+    """
+    Build a seen-repo cache (full_name -> YYYY-MM-DD) for a corpus.
+
+    Args:
+        repos: Corpus the cache should overlap with
+        seed: Random seed
+        seen_fraction: Fraction of the corpus present in the cache
+        extra: Entries for repos outside the corpus, as a fraction of its size
+        days: Entries are dated up to this many days ago
+
+    Returns:
+        Cache dictionary in the on-disk format
+    """
+    rng = random.Random(seed + 1)
+    today = datetime.now()
+
+    def some_day() -> str:
+        return (today - timedelta(days=rng.randrange(days))).strftime("%Y-%m-%d")
+
+    cache = {}
+    for repo in repos:
+        if rng.random() < seen_fraction:
+            cache[repo["full_name"]] = some_day()
+    for i in range(int(len(repos) * extra)):
+        cache[f"elsewhere/repo-{i}"] = some_day()
+
+    return cache
+
+
+def search_item(repo: Dict, index: int) -> Dict:
+    """
+    Expand a repository dict into a full search result item.
+
+    Besides the fields the fetcher reads, real items carry an owner object,
+    a license block and a few dozen API links, which is most of their size.
+    """
+    owner, _, name = repo["full_name"].partition("/")
+    api = f"https://api.github.com/repos/{repo['full_name']}"
+    users = f"https://api.github.com/users/{owner}"
+
+    return {
+        "id": index,
+        "node_id": f"R_kgDO{index:08d}",
+        "name": name,
+        "full_name": repo["full_name"],
+        "private": False,
+        "owner": {
+            "login": owner,
+            "id": index,
+            "avatar_url": f"https://avatars.githubusercontent.com/u/{index}?v=4",
+            "url": users,
+            "html_url": f"https://github.com/{owner}",
+            **{f"{link}_url": f"{users}/{link}" for link in OWNER_LINKS},
+            "type": "Organization",
+            "site_admin": False,
+        },
+        "html_url": repo["url"],
+        "description": (None if repo["description"] == "No description provided"
+                        else repo["description"]),
+        "fork": False,
+        "url": api,
+        **{f"{link}_url": f"{api}/{link}" for link in REPO_LINKS},
+        "created_at": repo["updated_at"],
+        "updated_at": repo["updated_at"],
+        "pushed_at": repo["updated_at"],
+        "git_url": f"git://github.com/{repo['full_name']}.git",
+        "homepage": None,
+        "size": 1000 + index % 5000,
+        "stargazers_count": repo["stars"],
+        "watchers_count": repo["stars"],
+        "language": None if repo["language"] == "Unknown" else repo["language"],
+        "forks_count": repo["forks"],
+        "open_issues_count": index % 50,
+        "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT",
+                    "url": "https://api.github.com/licenses/mit"},
+        "topics": repo["topics"],
+        "visibility": "public",
+        "default_branch": "main",
+        "score": 1.0,
+    }
+
+
+def generate_search_pages(repos: List[Dict], per_page: int = 100) -> List[bytes]:
+    """Encode a corpus as search API response bodies, ``per_page`` items each."""
+    pages = []
+    for start in range(0, len(repos), per_page):
+        items = [search_item(repo, start + i)
+                 for i, repo in enumerate(repos[start:start + per_page])]
+        body = {"total_count": len(repos), "incomplete_results": False, "items": items}
+        pages.append(json.dumps(body).encode("utf-8"))
+    return pages
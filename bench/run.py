@@ -0,0 +1,326 @@
+"""Time each pipeline stage on synthetic corpora and save the results as JSON.
+
+Usage:
+    python -m bench.run                       # 1k and 100k repos, every stage
+    python -m bench.run --sizes 1k,100k,1M --stages filter_json,rank_repos
+    python -m bench.compare bench/results/old.json bench/results/new.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bench.corpus import generate_cache, generate_repos, generate_search_pages
+from src.cache import SQLITE_FILE, SeenCache, SqliteSeenCache, save_cache
+from src.config import get_default_config
+from src.decoding import decode_search
+from src.repo import Repo
+from src.report_generator import generate_report
+from src.scorer import rank_repos, top_k_repos
+from src.snapshot import Snapshot, SnapshotWriter, snapshot_path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is reported as 0
+    resource = None
+
+
+RESULTS_DIR = Path("bench") / "results"
+DEFAULT_SIZES = "1k,100k"
+TOPIC = "ai"
+CACHE_DAYS = 7
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+class Workload:
+    """Inputs shared by every stage for one corpus size."""
+
+    def __init__(self, size: int, seed: int, records: bool = False):
+        self.size = size
+        self.repos = generate_repos(size, seed, TOPIC)
+        self.cache = generate_cache(self.repos, seed)
+        if records:
+            self.repos = [Repo.from_dict(repo) for repo in self.repos]
+        self.preferences = get_default_config()
+
+
+def _seen_cache(work: Workload) -> SeenCache:
+    save_cache(work.cache)
+    return SeenCache.load()
+
+
+def _sqlite_cache(work: Workload) -> SqliteSeenCache:
+    save_cache(work.cache)
+    return SqliteSeenCache.open(SQLITE_FILE)
+
+
+def _snapshot(work: Workload) -> Path:
+    path = snapshot_path("2024-01-01")
+    writer = SnapshotWriter(path)
+    for repo in work.repos:
+        writer.add(repo, TOPIC)
+    writer.close()
+    return path
+
+
+def _write_snapshot(work: Workload):
+    writer = SnapshotWriter(snapshot_path("2024-01-02"))
+    for repo in work.repos:
+        writer.add(repo, TOPIC)
+    writer.close()
+
+
+def _decode_pages(pages: List[bytes]):
+    for body in pages:
+        decode_search(body)
+
+
+def _read_snapshot(path: Path):
+    with Snapshot(path) as snapshot:
+        snapshot.column("stars")
+        snapshot.strings("full_name")
+
+
+# name -> (setup, timed stage, items processed); setup runs untimed and its
+# result is passed to the stage
+STAGES: Dict[str, Tuple[Callable, Callable, Callable]] = {
+    "cache_save": (
+        lambda work: work.cache,
+        save_cache,
+        lambda work: len(work.cache),
+    ),
+    "cache_load": (
+        lambda work: save_cache(work.cache),
+        lambda _: SeenCache.load(),
+        lambda work: len(work.cache),
+    ),
+    "filter_json": (
+        lambda work: (_seen_cache(work), work.repos),
+        lambda args: args[0].filter(args[1], CACHE_DAYS),
+        lambda work: work.size,
+    ),
+    "filter_sqlite": (
+        lambda work: (_sqlite_cache(work), work.repos),
+        lambda args: args[0].filter(args[1], CACHE_DAYS),
+        lambda work: work.size,
+    ),
+    "decode_search": (
+        lambda work: generate_search_pages(work.repos),
+        _decode_pages,
+        lambda work: work.size,
+    ),
+    "rank_repos": (
+        lambda work: work,
+        lambda work: rank_repos(work.repos, TOPIC, work.preferences),
+        lambda work: work.size,
+    ),
+    "top_k_repos": (
+        lambda work: work,
+        lambda work: top_k_repos(work.repos, 10, TOPIC, work.preferences),
+        lambda work: work.size,
+    ),
+    "generate_report": (
+        lambda work: work,
+        lambda work: generate_report(work.repos, TOPIC, "2024-01-01", filename="bench.md"),
+        lambda work: work.size,
+    ),
+    "snapshot_write": (
+        lambda work: work,
+        _write_snapshot,
+        lambda work: work.size,
+    ),
+    "snapshot_read": (
+        _snapshot,
+        _read_snapshot,
+        lambda work: work.size,
+    ),
+}
+
+
+def parse_size(value: str) -> int:
+    """Parse a corpus size such as 1000, 1k or 1M."""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    if multiplier > 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process, in bytes."""
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+def measure(stage: str, work: Workload) -> Dict:
+    """
+    Run one stage and measure it.
+
+    Returns:
+        Dictionary with the stage's wall time, peak RSS and the growth of
+        peak RSS over the state after setup, in bytes
+    """
+    setup, run, _ = STAGES[stage]
+    argument = setup(work)
+    baseline = peak_rss()
+
+    start = time.perf_counter()
+    run(argument)
+    seconds = time.perf_counter() - start
+
+    peak = peak_rss()
+    return {"seconds": seconds, "peak_rss": peak, "rss_growth": peak - baseline}
+
+
+def _measure_in_child(stage: str, work: Workload, connection):
+    try:
+        connection.send(measure(stage, work))
+    except Exception as e:  # Reported by the parent
+        connection.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        connection.close()
+
+
+def measure_isolated(stage: str, work: Workload) -> Dict:
+    """
+    Measure a stage in a forked child process.
+
+    The child starts from the parent's memory (the corpus is not rebuilt),
+    and its own peak RSS shows what the stage used; files it writes and
+    objects it changes are thrown away with it. Without fork the stage is
+    measured in this process and peak RSS only ever grows.
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return measure(stage, work)
+
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    child = context.Process(target=_measure_in_child, args=(stage, work, sender))
+    child.start()
+    sender.close()
+    result = receiver.recv()
+    child.join()
+
+    if "error" in result:
+        raise RuntimeError(f"Stage {stage} failed: {result['error']}")
+    return result
+
+
+def git_commit() -> Optional[str]:
+    """Current commit of the working tree, if it's a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes: List[int], stages: List[str], seed: int = 0, repeat: int = 1,
+                   records: bool = False) -> Dict:
+    """
+    Benchmark every stage at every corpus size.
+
+    Each stage runs ``repeat`` times; the fastest time and the largest
+    memory use are kept.
+
+    Returns:
+        Results document (see README for the format)
+    """
+    results = []
+    workdir = tempfile.mkdtemp(prefix="digest-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)  # The pipeline writes cache/, daily/ and snapshots/ here
+    try:
+        for size in sizes:
+            started = time.perf_counter()
+            work = Workload(size, seed, records)
+            print(f"Generated {size:,} repos in {time.perf_counter() - started:.1f}s")
+
+            for stage in stages:
+                runs = [measure_isolated(stage, work) for _ in range(repeat)]
+                seconds = min(r["seconds"] for r in runs)
+                items = STAGES[stage][2](work)
+                result = {
+                    "size": size,
+                    "stage": stage,
+                    "items": items,
+                    "seconds": seconds,
+                    "items_per_second": items / seconds if seconds else None,
+                    "peak_rss_mb": max(r["peak_rss"] for r in runs) / 1e6,
+                    "rss_growth_mb": max(r["rss_growth"] for r in runs) / 1e6,
+                }
+                results.append(result)
+                print(f"  {stage:<16} {seconds:9.4f}s {result['items_per_second'] or 0:14,.0f} items/s"
+                      f" peak {result['peak_rss_mb']:8.1f} MB (+{result['rss_growth_mb']:.1f})")
+            del work
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__ if np is not None else None,
+            "seed": seed,
+            "repeat": repeat,
+            "records": records,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the digest pipeline stages")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma-separated corpus sizes, e.g. 1k,100k,1M (default: {DEFAULT_SIZES})")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help="Comma-separated stages to run (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage, best time kept (default: 1)")
+    parser.add_argument("--records", action="store_true",
+                        help="Use Repo records instead of dicts for the corpus")
+    parser.add_argument("--output", default=None,
+                        help="Results file (default: bench/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    document = run_benchmarks(sizes, stages, args.seed, max(args.repeat, 1), args.records)
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
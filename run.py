@@ -1,9 +1,17 @@
 #!/usr/bin/env python
 """CLI for GitHub AI Digest Pipeline."""
 import argparse
+import contextlib
+import importlib.util
 import sys
 import os
 from datetime import datetime
+from pathlib import Path
+
+
+# Checks passed for this interpreter; they are skipped while it matches
+ENV_MARKER = Path("cache") / ".environment"
+SKIP_CHECKS_ENV = "DIGEST_SKIP_CHECKS"
 
 
 def check_environment():
@@ -24,9 +32,8 @@ def check_environment():
 
 def check_dependencies():
     """Check if required dependencies are installed."""
-    try:
-        import requests
-    except ImportError:
+    # find_spec locates the package without paying for importing it
+    if importlib.util.find_spec("requests") is None:
         print("❌ Error: Required package 'requests' not found")
         print("\nPlease install dependencies:")
         print("  pip install -r requirements.txt")
@@ -37,16 +44,31 @@ def check_dependencies():
         sys.exit(1)
 
 
-def main():
-    # Check environment and dependencies
+def environment_key() -> str:
+    """Identify the interpreter and environment the checks ran in."""
+    return f"{sys.executable}\n{sys.prefix}\n{sys.version}"
+
+
+def run_checks():
+    """Check the environment and dependencies once per interpreter."""
+    key = environment_key()
+    try:
+        if ENV_MARKER.read_text() == key:
+            return
+    except OSError:
+        pass
+
     check_environment()
     check_dependencies()
 
-    from src.github_fetcher import fetch_repos
-    from src.scorer import rank_repos
-    from src.report_generator import generate_report
-    from src.cache import filter_seen_repos, add_to_cache, cleanup_old_entries
-    from src.config import load_config
+    try:
+        ENV_MARKER.parent.mkdir(exist_ok=True)
+        ENV_MARKER.write_text(key)
+    except OSError:
+        pass  # Checked again next time
+
+
+def main():
     parser = argparse.ArgumentParser(
         description="Generate AI digest from GitHub trending repositories"
     )
@@ -56,6 +78,106 @@ def main():
         default="ai",
         help="Topic to search for (default: ai)"
     )
+    parser.add_argument(
+        "--topics",
+        type=str,
+        default=None,
+        help="Comma-separated topics to run in one batch, e.g. rag,llm,agents"
+    )
+    parser.add_argument(
+        "--topics-file",
+        type=str,
+        default=None,
+        help="File with one topic per line to run in one batch"
+    )
+    parser.add_argument(
+        "--combined",
+        action="store_true",
+        help="Write a single report for all batch topics instead of one per topic"
+    )
+    parser.add_argument(
+        "--input",
+        type=str,
+        default=None,
+        help="Rank repositories from a JSON Lines file instead of fetching them"
+    )
+    parser.add_argument(
+        "--rank-mode",
+        choices=["score", "trending"],
+        default="score",
+        help="Rank by overall score or by recent star velocity (default: score)"
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=["stars", "created"],
+        default=None,
+        help="Fetch every matching repo, past the 1,000-result search cap, by splitting "
+             "the search into star or creation date ranges"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch repos pushed since the last run and rank them together with the "
+             "stored candidates in cache/candidates/"
+    )
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help="Add latest release, open issues, contributors and a README excerpt to each "
+             "reported repo (GraphQL, needs GITHUB_TOKEN)"
+    )
+    parser.add_argument(
+        "--api-url",
+        type=str,
+        default=None,
+        help="GitHub API base URL, e.g. a local stub server (default: https://api.github.com)"
+    )
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument(
+        "--record",
+        metavar="DIR",
+        default=None,
+        help="Save every raw search response in DIR"
+    )
+    recording.add_argument(
+        "--replay",
+        metavar="DIR",
+        default=None,
+        help="Serve search responses from a recording in DIR instead of the network"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print time spent per stage and counters when done"
+    )
+    parser.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        default=None,
+        help="Write per-stage timings and counters to PATH as JSON"
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="OUT.prof",
+        default=None,
+        help="Profile the run: write pstats to OUT.prof and flame graph stacks to OUT.collapsed"
+    )
+    parser.add_argument(
+        "--profile-stage",
+        metavar="STAGE",
+        default=None,
+        help="With --cprofile, only profile one stage, e.g. score or report.write"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run even if today's report already exists"
+    )
+    parser.add_argument(
+        "--skip-checks",
+        action="store_true",
+        help=f"Skip the environment and dependency checks (or set {SKIP_CHECKS_ENV}=1)"
+    )
     parser.add_argument(
         "--limit",
         type=int,
@@ -71,50 +193,77 @@ def main():
 
     args = parser.parse_args()
 
-    # Load configuration
-    config = load_config()
-    cache_days = config.get("cache_days", 7)
+    if not (args.skip_checks or os.environ.get(SKIP_CHECKS_ENV, "").lower() in ("1", "true", "yes")):
+        run_checks()
 
-    print(f"Fetching {args.limit} repositories for topic: {args.topic}")
-    if config.get("preferred_topics"):
-        print(f"Preferred topics: {', '.join(config['preferred_topics'])}")
+    # Modules are imported as they are needed, so --help and runs with
+    # nothing to do never load the network stack
+    from src.topics import parse_topics, read_topics_file
 
-    # Fetch repos from GitHub
-    repos = fetch_repos(topic=args.topic, limit=args.limit * 2)  # Fetch more to account for cache filtering
+    if args.topics_file:
+        topics = read_topics_file(args.topics_file)
+    elif args.topics:
+        topics = parse_topics(args.topics)
+    else:
+        topics = [args.topic]
 
-    if not repos:
-        print("No repositories found or error occurred")
+    if not topics:
+        print("No topics given")
         return
 
-    print(f"Found {len(repos)} repositories")
-
-    # Filter out previously seen repos
-    filtered_repos, filtered_count = filter_seen_repos(repos, cache_days)
-    if filtered_count > 0:
-        print(f"Filtered {filtered_count} previously seen repos (within {cache_days} days)")
+    if args.input and len(topics) > 1:
+        print("--input can only be used with a single topic")
+        return
 
-    # Limit to requested amount after filtering
-    filtered_repos = filtered_repos[:args.limit]
+    if args.input and (args.shard_by or args.incremental):
+        print("--input can't be combined with --shard-by or --incremental")
+        return
 
-    if not filtered_repos:
-        print("No new repositories to report after filtering")
+    if args.profile_stage and not args.cprofile:
+        print("--profile-stage needs --cprofile")
         return
 
-    # Score and rank repos with preferences
-    ranked_repos = rank_repos(filtered_repos, topic=args.topic, preferences=config)
+    if not args.force:
+        from src.report_generator import generated_reports
+
+        date = args.date or datetime.now().strftime("%Y-%m-%d")
+        reports = generated_reports(topics, date, args.combined)
+        if reports:
+            print(f"Nothing to do: {', '.join(reports)} already generated "
+                  "(use --force to run again)")
+            return
+
+    from src import metrics
+    from src.github_fetcher import configure_api_url, configure_recording
+    from src.pipeline import run_digest, read_repos_jsonl
+
+    configure_api_url(args.api_url)
+    configure_recording(record_dir=args.record, replay_dir=args.replay)
 
-    # Add to cache before generating report
-    date_str = args.date or datetime.now().strftime("%Y-%m-%d")
-    add_to_cache(ranked_repos, date=date_str)
+    metrics.enable(args.profile or bool(args.metrics_json))
 
-    # Cleanup old cache entries
-    cleanup_old_entries(cache_days)
+    source = read_repos_jsonl(args.input) if args.input else None
+    with contextlib.ExitStack() as stack:
+        if args.cprofile:
+            from src.profiler import COLLAPSED_SUFFIX, profiled
+            profiler = stack.enter_context(profiled(args.cprofile, stage=args.profile_stage))
+        with metrics.timer("run"):
+            run_digest(topics, limit=args.limit, date=args.date, combined=args.combined, source=source,
+                       rank_mode=args.rank_mode, shard_by=args.shard_by,
+                       incremental=args.incremental, enrich=args.enrich)
 
-    # Generate report
-    report_path = generate_report(ranked_repos, topic=args.topic, date=date_str)
+    if args.cprofile:
+        print()
+        print(profiler.summary())
+        print(f"Profile written to {args.cprofile} and "
+              f"{Path(args.cprofile).with_suffix(COLLAPSED_SUFFIX)}")
 
-    print(f"Report generated: {report_path}")
-    print(f"Included {len(ranked_repos)} repositories")
+    if args.profile:
+        print()
+        print(metrics.format_table())
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+        print(f"Metrics written to {args.metrics_json}")
 
 
 if __name__ == "__main__":
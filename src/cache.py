@@ -1,124 +1,463 @@
 """Simple cache system to track previously reported repositories."""
 import json
+import sqlite3
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Dict, List
+from datetime import date as Date, datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 
 CACHE_DIR = Path("cache")
 CACHE_FILE = CACHE_DIR / "seen_repos.json"
+SQLITE_FILE = CACHE_DIR / "seen_repos.db"
 
+CACHE_BACKENDS = ("json", "sqlite")
 
-def load_cache() -> Dict[str, str]:
+
+def load_cache(path: Optional[Path] = None) -> Dict[str, str]:
     """
     Load cache from JSON file.
 
+    Args:
+        path: Cache file, defaults to cache/seen_repos.json
+
     Returns:
         Dictionary mapping repo full_name to last seen date (YYYY-MM-DD)
     """
-    if not CACHE_FILE.exists():
+    path = Path(path or CACHE_FILE)
+    if not path.exists():
         return {}
 
     try:
-        with open(CACHE_FILE, 'r') as f:
+        with open(path, 'r') as f:
             return json.load(f)
     except (json.JSONDecodeError, IOError):
         return {}
 
 
-def save_cache(cache: Dict[str, str]):
+def save_cache(cache: Dict[str, str], path: Optional[Path] = None):
     """
     Save cache to JSON file using atomic write.
 
     Args:
         cache: Dictionary mapping repo full_name to date
+        path: Cache file, defaults to cache/seen_repos.json
     """
-    CACHE_DIR.mkdir(exist_ok=True)
+    path = Path(path or CACHE_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
 
     # Atomic write: write to temp file, then rename
-    temp_file = CACHE_FILE.with_suffix('.tmp')
+    temp_file = path.with_suffix('.tmp')
     with open(temp_file, 'w') as f:
         json.dump(cache, f, indent=2)
 
-    temp_file.replace(CACHE_FILE)
+    temp_file.replace(path)
 
 
-def filter_seen_repos(repos: List[Dict], cache_days: int) -> tuple[List[Dict], int]:
+def cutoff_ordinal(cache_days: int) -> int:
     """
-    Filter out repositories seen within the last N days.
+    Get the earliest day ordinal that still counts as seen within N days.
+
+    A date is recent when its midnight is at or after ``now - cache_days``.
+    """
+    cutoff = datetime.now() - timedelta(days=cache_days)
+    ordinal = cutoff.toordinal()
+    return ordinal if cutoff.time() == time.min else ordinal + 1
+
+
+class SeenCache:
+    """
+    In-memory view of the seen-repo cache.
+
+    The JSON file is read once and the dates are kept as day ordinals, so
+    filter, add and expire queries don't re-parse anything. Changes are
+    written back with a single atomic flush().
+    """
+
+    def __init__(self, entries: Optional[Dict[str, int]] = None, path: Optional[Path] = None):
+        self._entries = entries or {}
+        self._path = path
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "SeenCache":
+        """Load a cache file (the default if None), dropping entries with unparseable dates."""
+        raw = load_cache(path)
+        ordinals = {}
+        entries = {}
+        for full_name, date_str in raw.items():
+            ordinal = ordinals.get(date_str)
+            if ordinal is None:
+                try:
+                    ordinal = Date.fromisoformat(date_str).toordinal()
+                except (TypeError, ValueError):
+                    continue
+                ordinals[date_str] = ordinal
+            entries[full_name] = ordinal
+
+        cache = cls(entries, path)
+        # Rewrite the file on flush if bad entries were dropped
+        cache._dirty = len(entries) < len(raw)
+        return cache
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, full_name: str) -> bool:
+        return full_name in self._entries
+
+    def recent_names(self, cache_days: int) -> Set[str]:
+        """Get the names of repositories seen within the last N days."""
+        cutoff = cutoff_ordinal(cache_days)
+        return {name for name, ordinal in self._entries.items() if ordinal >= cutoff}
+
+    def filter(self, repos: List[Dict], cache_days: int) -> Tuple[List[Dict], int]:
+        """
+        Filter out repositories seen within the last N days.
+
+        Returns:
+            Tuple of (filtered repos, count of filtered repos)
+        """
+        cutoff = cutoff_ordinal(cache_days)
+        entries = self._entries
+
+        filtered = []
+        filtered_count = 0
+
+        for repo in repos:
+            full_name = repo.get("full_name")
+            if not full_name:
+                continue
+
+            if entries.get(full_name, 0) >= cutoff:
+                filtered_count += 1
+                continue
+
+            filtered.append(repo)
+
+        return filtered, filtered_count
+
+    def iter_unseen(self, repos: Iterable[Dict], cache_days: int) -> Iterator[Dict]:
+        """Lazily yield the repositories not seen within the last N days."""
+        cutoff = cutoff_ordinal(cache_days)
+        entries = self._entries
+
+        for repo in repos:
+            full_name = repo.get("full_name")
+            if full_name and entries.get(full_name, 0) < cutoff:
+                yield repo
+
+    def add(self, repos: List[Dict], date: str = None):
+        """Mark repositories as seen on a date (YYYY-MM-DD), defaulting to today."""
+        if date is None:
+            ordinal = Date.today().toordinal()
+        else:
+            ordinal = Date.fromisoformat(date).toordinal()
+
+        for repo in repos:
+            full_name = repo.get("full_name")
+            if full_name:
+                self._entries[full_name] = ordinal
+                self._dirty = True
+
+    def expire(self, cache_days: int) -> int:
+        """
+        Remove entries older than N days.
+
+        Returns:
+            Number of entries removed
+        """
+        cutoff = cutoff_ordinal(cache_days)
+        expired = [name for name, ordinal in self._entries.items() if ordinal < cutoff]
+
+        for full_name in expired:
+            del self._entries[full_name]
+
+        if expired:
+            self._dirty = True
+        return len(expired)
+
+    def to_dict(self) -> Dict[str, str]:
+        """Convert back to the on-disk format of full_name -> YYYY-MM-DD."""
+        dates = {}
+        result = {}
+        for full_name, ordinal in self._entries.items():
+            date_str = dates.get(ordinal)
+            if date_str is None:
+                date_str = dates[ordinal] = Date.fromordinal(ordinal).isoformat()
+            result[full_name] = date_str
+        return result
+
+    def flush(self):
+        """Write the cache to disk if it changed since it was loaded."""
+        if self._dirty:
+            save_cache(self.to_dict(), self._path)
+            self._dirty = False
+
+    def close(self):
+        """Flush any pending changes."""
+        self.flush()
+
+
+class SqliteSeenCache:
+    """
+    Seen-repo cache stored in SQLite.
+
+    Same interface as SeenCache, but every add and expire is written
+    straight to the database, so the cost of a write depends on the repos
+    touched rather than on the cache size. Dates are stored as day ordinals
+    with an index, which makes expiry a single indexed DELETE. The database
+    runs in WAL mode so concurrent digest runs can share it.
+    """
+
+    # SQLite's default limit on host parameters per statement is 999
+    QUERY_CHUNK = 500
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._conn = connection
+
+    @classmethod
+    def open(cls, path: Optional[Path] = None,
+             json_path: Optional[Path] = None) -> "SqliteSeenCache":
+        """
+        Open (and create if needed) the database.
+
+        On first use, entries from the JSON cache file (``json_path``,
+        cache/seen_repos.json by default) are imported.
+        """
+        path = Path(path or SQLITE_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = sqlite3.connect(str(path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_repos ("
+                "full_name TEXT PRIMARY KEY, last_seen INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_seen_repos_last_seen ON seen_repos (last_seen)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        cache = cls(conn)
+        cache._migrate_json(json_path)
+        return cache
+
+    def _migrate_json(self, json_path: Optional[Path] = None):
+        """
+        Import the JSON cache file once, the first time the database is opened.
+
+        The marker is checked inside a write transaction, so when several
+        runs open a new database at once only the first imports and the
+        others wait for it. Entries already in the database are newer than
+        the JSON file and are kept.
+        """
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            done = self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = 'migrated_json'"
+            ).fetchone()
+            if done:
+                return
+
+            entries = SeenCache.load(json_path)._entries
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_repos (full_name, last_seen) VALUES (?, ?)",
+                entries.items()
+            )
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_json', '1')")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM seen_repos").fetchone()[0]
+
+    def __contains__(self, full_name: str) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM seen_repos WHERE full_name = ?", (full_name,)
+        ).fetchone()
+        return row is not None
+
+    def recent_names(self, cache_days: int) -> Set[str]:
+        """Get the names of repositories seen within the last N days."""
+        rows = self._conn.execute(
+            "SELECT full_name FROM seen_repos WHERE last_seen >= ?",
+            (cutoff_ordinal(cache_days),)
+        )
+        return {row[0] for row in rows}
+
+    def _recent_among(self, names: List[str], cutoff: int) -> Set[str]:
+        """Look up which of the given names were seen on or after cutoff."""
+        recent = set()
+        for start in range(0, len(names), self.QUERY_CHUNK):
+            chunk = names[start:start + self.QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT full_name FROM seen_repos "
+                f"WHERE full_name IN ({placeholders}) AND last_seen >= ?",
+                (*chunk, cutoff)
+            )
+            recent.update(row[0] for row in rows)
+        return recent
+
+    def filter(self, repos: List[Dict], cache_days: int) -> Tuple[List[Dict], int]:
+        """
+        Filter out repositories seen within the last N days.
+
+        Returns:
+            Tuple of (filtered repos, count of filtered repos)
+        """
+        repos = [repo for repo in repos if repo.get("full_name")]
+        filtered = list(self.iter_unseen(repos, cache_days))
+        return filtered, len(repos) - len(filtered)
+
+    def iter_unseen(self, repos: Iterable[Dict], cache_days: int) -> Iterator[Dict]:
+        """
+        Lazily yield the repositories not seen within the last N days.
+
+        Repos are looked up in chunks of QUERY_CHUNK, so at most one chunk
+        is buffered.
+        """
+        cutoff = cutoff_ordinal(cache_days)
+
+        def unseen(chunk: List[Dict]) -> List[Dict]:
+            recent = self._recent_among([repo["full_name"] for repo in chunk], cutoff)
+            return [repo for repo in chunk if repo["full_name"] not in recent]
+
+        chunk = []
+        for repo in repos:
+            if not repo.get("full_name"):
+                continue
+            chunk.append(repo)
+            if len(chunk) >= self.QUERY_CHUNK:
+                yield from unseen(chunk)
+                chunk = []
+
+        if chunk:
+            yield from unseen(chunk)
+
+    def add(self, repos: List[Dict], date: str = None):
+        """Mark repositories as seen on a date (YYYY-MM-DD), defaulting to today."""
+        if date is None:
+            ordinal = Date.today().toordinal()
+        else:
+            ordinal = Date.fromisoformat(date).toordinal()
+
+        rows = [(repo["full_name"], ordinal) for repo in repos if repo.get("full_name")]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO seen_repos (full_name, last_seen) VALUES (?, ?)",
+                rows
+            )
+
+    def expire(self, cache_days: int) -> int:
+        """
+        Remove entries older than N days.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM seen_repos WHERE last_seen < ?", (cutoff_ordinal(cache_days),)
+            )
+        return cursor.rowcount
+
+    def to_dict(self) -> Dict[str, str]:
+        """Convert to the JSON format of full_name -> YYYY-MM-DD."""
+        rows = self._conn.execute("SELECT full_name, last_seen FROM seen_repos")
+        return {name: Date.fromordinal(ordinal).isoformat() for name, ordinal in rows}
+
+    def flush(self):
+        """Nothing to do: every change is committed as it is made."""
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+
+def open_seen_cache(backend: str = "json", path: Optional[Path] = None):
+    """
+    Open the seen-repo cache.
 
     Args:
-        repos: List of repository dictionaries
-        cache_days: Number of days to check for duplicates
+        backend: "json" for cache/seen_repos.json or "sqlite" for cache/seen_repos.db
+        path: Cache file to use instead of the default one; a SQLite file
+            imports the JSON file of the same name rather than the shared one
 
     Returns:
-        Tuple of (filtered repos, count of filtered repos)
+        SeenCache or SqliteSeenCache
+    """
+    if backend == "sqlite":
+        json_path = Path(path).with_suffix(".json") if path else None
+        return SqliteSeenCache.open(path, json_path)
+    if backend == "json":
+        return SeenCache.load(path)
+    raise ValueError(f"Unknown cache backend: {backend!r} (expected one of {CACHE_BACKENDS})")
+
+
+def get_recent_names(cache_days: int, backend: str = "json") -> Set[str]:
     """
-    cache = load_cache()
-    cutoff_date = datetime.now() - timedelta(days=cache_days)
+    Get the names of repositories seen within the last N days.
 
-    filtered = []
-    filtered_count = 0
+    Args:
+        cache_days: Number of days to check for duplicates
+        backend: Cache backend, "json" or "sqlite"
 
-    for repo in repos:
-        full_name = repo.get("full_name")
-        if not full_name:
-            continue
+    Returns:
+        Set of repo full names seen within the window
+    """
+    cache = open_seen_cache(backend)
+    try:
+        return cache.recent_names(cache_days)
+    finally:
+        cache.close()
 
-        last_seen = cache.get(full_name)
-        if last_seen:
-            try:
-                seen_date = datetime.strptime(last_seen, "%Y-%m-%d")
-                if seen_date >= cutoff_date:
-                    filtered_count += 1
-                    continue
-            except ValueError:
-                pass
 
-        filtered.append(repo)
+def filter_seen_repos(repos: List[Dict], cache_days: int,
+                      backend: str = "json") -> tuple[List[Dict], int]:
+    """
+    Filter out repositories seen within the last N days.
 
-    return filtered, filtered_count
+    Args:
+        repos: List of repository dictionaries
+        cache_days: Number of days to check for duplicates
+        backend: Cache backend, "json" or "sqlite"
+
+    Returns:
+        Tuple of (filtered repos, count of filtered repos)
+    """
+    cache = open_seen_cache(backend)
+    try:
+        return cache.filter(repos, cache_days)
+    finally:
+        cache.close()
 
 
-def add_to_cache(repos: List[Dict], date: str = None):
+def add_to_cache(repos: List[Dict], date: str = None, backend: str = "json"):
     """
     Add repositories to cache with current date.
 
     Args:
         repos: List of repository dictionaries to cache
         date: Date string (YYYY-MM-DD), defaults to today
+        backend: Cache backend, "json" or "sqlite"
     """
-    if date is None:
-        date = datetime.now().strftime("%Y-%m-%d")
-
-    cache = load_cache()
-
-    for repo in repos:
-        full_name = repo.get("full_name")
-        if full_name:
-            cache[full_name] = date
-
-    save_cache(cache)
+    cache = open_seen_cache(backend)
+    try:
+        cache.add(repos, date)
+    finally:
+        cache.close()
 
 
-def cleanup_old_entries(cache_days: int):
+def cleanup_old_entries(cache_days: int, backend: str = "json"):
     """
     Remove cache entries older than N days.
 
     Args:
         cache_days: Number of days to retain entries
+        backend: Cache backend, "json" or "sqlite"
     """
-    cache = load_cache()
-    cutoff_date = datetime.now() - timedelta(days=cache_days)
-
-    cleaned_cache = {}
-    for full_name, date_str in cache.items():
-        try:
-            seen_date = datetime.strptime(date_str, "%Y-%m-%d")
-            if seen_date >= cutoff_date:
-                cleaned_cache[full_name] = date_str
-        except ValueError:
-            continue
-
-    if len(cleaned_cache) < len(cache):
-        save_cache(cleaned_cache)
+    cache = open_seen_cache(backend)
+    try:
+        cache.expire(cache_days)
+    finally:
+        cache.close()
@@ -0,0 +1,167 @@
+"""Per-topic candidate sets kept up to date with incremental fetches.
+
+Each topic's candidates live in ``cache/candidates/<topic>.json`` with a
+high-water mark: the time of the last successful fetch. The next run only
+asks GitHub for repos pushed since then (``pushed:>``) and merges them in,
+so a steady-state run costs a page or two of search requests and the
+ranking happens on the local set.
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.repo import Repo
+from src.sharding import fetch_sharded
+from src.topics import topic_slug
+
+
+CANDIDATES_DIR = Path("cache") / "candidates"
+DEFAULT_REFRESH_DAYS = 7
+# Searched again on the next run, to allow for clock skew and for GitHub's
+# search index lagging behind pushes
+OVERLAP = timedelta(hours=1)
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def candidates_path(topic: str, directory: Path = CANDIDATES_DIR) -> Path:
+    """Path of a topic's candidate set."""
+    return Path(directory) / f"{topic_slug(topic)}.json"
+
+
+class CandidateSet:
+    """
+    Everything fetched for one topic, keyed by full name.
+
+    Args:
+        topic: Search topic
+        repos: Candidate repos
+        since: High-water mark, fetch repos pushed after this
+            (YYYY-MM-DDTHH:MM:SSZ); None before the first fetch
+        refreshed: When the whole topic was last fetched, not just changes
+    """
+
+    def __init__(self, topic: str, repos: Optional[Iterable[Dict]] = None,
+                 since: Optional[str] = None, refreshed: Optional[str] = None):
+        self.topic = topic
+        self.since = since
+        self.refreshed = refreshed
+        self._repos: Dict[str, Repo] = {}
+        if repos:
+            self.merge(repos)
+
+    @classmethod
+    def load(cls, topic: str, directory: Path = CANDIDATES_DIR) -> "CandidateSet":
+        """Load a topic's candidates; missing or unreadable files give an empty set."""
+        try:
+            with open(candidates_path(topic, directory), 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(topic)
+
+        return cls(topic, data.get("repos", []), data.get("since"), data.get("refreshed"))
+
+    def __len__(self) -> int:
+        return len(self._repos)
+
+    def __contains__(self, full_name: str) -> bool:
+        return full_name in self._repos
+
+    def merge(self, repos: Iterable[Dict]) -> int:
+        """
+        Add new repos and replace stored copies with fresher ones.
+
+        Returns:
+            Number of repos that weren't in the set before
+        """
+        added = 0
+        for repo in repos:
+            if not isinstance(repo, Repo):
+                repo = Repo.from_dict(repo)
+            if repo.full_name not in self._repos:
+                added += 1
+            self._repos[repo.full_name] = repo
+        return added
+
+    def repos(self) -> List[Repo]:
+        """The candidates, most starred first."""
+        return sorted(self._repos.values(), key=lambda repo: repo.stars, reverse=True)
+
+    def needs_refresh(self, now: datetime, refresh_days: int = DEFAULT_REFRESH_DAYS) -> bool:
+        """Whether the whole topic should be fetched again instead of just changes."""
+        if self.since is None or self.refreshed is None:
+            return True
+        if refresh_days is None:
+            return False
+        refreshed = datetime.strptime(self.refreshed, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+        return now - refreshed >= timedelta(days=refresh_days)
+
+    def save(self, directory: Path = CANDIDATES_DIR):
+        """Write the set to disk atomically."""
+        path = candidates_path(self.topic, directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_suffix(".tmp")
+        with open(temp, 'w') as f:
+            json.dump({
+                "topic": self.topic,
+                "since": self.since,
+                "refreshed": self.refreshed,
+                "repos": [repo.to_dict() for repo in self.repos()]
+            }, f)
+        os.replace(temp, path)
+
+
+def fetch_incremental(topic: str, shard_by: Optional[str] = None,
+                      refresh_days: Optional[int] = DEFAULT_REFRESH_DAYS,
+                      directory: Path = CANDIDATES_DIR,
+                      now: Optional[datetime] = None) -> CandidateSet:
+    """
+    Bring a topic's candidate set up to date and save it.
+
+    The first run, and every ``refresh_days`` after it, fetches the whole
+    topic (the top 1,000 by stars, or every repo with ``shard_by``) and
+    replaces the stored set with it, so star counts of repos that haven't
+    been pushed to don't go stale and repos that were deleted, renamed or
+    no longer match the topic are dropped. Other
+    runs fetch only repos pushed since the high-water mark, sharded if
+    there are more than 1,000. The mark only moves once a fetch has
+    completely succeeded.
+
+    Args:
+        topic: Search topic
+        shard_by: "stars" or "created" to fetch complete pools (see
+            fetch_sharded); None for the top 1,000 on full fetches
+        refresh_days: Days between full fetches; None to only ever fetch
+            changes after the first run
+        directory: Where candidate sets are stored
+        now: Current time (UTC), defaults to now
+
+    Returns:
+        The updated candidate set
+
+    Raises:
+        requests.RequestException: If a request fails; the stored set is
+            left as it was
+    """
+    now = now or datetime.now(timezone.utc)
+    candidates = CandidateSet.load(topic, directory)
+    started = (now - OVERLAP).strftime(TIMESTAMP_FORMAT)
+
+    if candidates.needs_refresh(now, refresh_days):
+        repos = fetch_sharded(topic, by=shard_by, strict=True)
+        # Start over, so repos that were deleted or no longer match the
+        # topic don't stay ranked with frozen star counts
+        dropped = len(candidates) - sum(repo["full_name"] in candidates for repo in repos)
+        candidates = CandidateSet(topic, refreshed=now.strftime(TIMESTAMP_FORMAT))
+        kind = f"full, {dropped} dropped"
+    else:
+        repos = fetch_sharded(topic, by=shard_by or "stars", qualifiers=f"pushed:>{candidates.since}",
+                              strict=True)
+        kind = f"pushed since {candidates.since}"
+
+    added = candidates.merge(repos)
+    candidates.since = started
+    candidates.save(directory)
+    print(f"Candidates for {topic!r}: {len(repos)} fetched ({kind}), {added} new, {len(candidates)} total")
+    return candidates
@@ -0,0 +1,143 @@
+"""Decode search responses straight into Repo records.
+
+A search page is around 100 items with an owner object, a license block
+and dozens of API URLs each, of which the fetcher keeps nine fields. The
+page is parsed with orjson when it's installed, with ``json.loads``
+otherwise, and the items are projected into records.
+
+The streaming decoder is an opt-in for memory: it walks the top-level
+object itself and decodes ``items`` one element at a time, turning each
+into a record before the next is read, so the whole object tree never
+exists at once. It's slower than a full parse with ``json.loads``, so it
+is only used when asked for.
+"""
+import json
+import re
+from typing import Dict, List, Tuple
+
+from src.repo import Repo
+
+try:
+    import orjson
+except ImportError:  # Optional; json.loads is used instead
+    orjson = None
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+def parse_repo(item: Dict) -> Repo:
+    """Extract the fields we use from a search result item."""
+    return Repo(
+        name=item["name"],
+        full_name=item["full_name"],
+        description=item["description"] or "No description provided",
+        url=item["html_url"],
+        stars=item["stargazers_count"],
+        forks=item["forks_count"],
+        language=item["language"] or "Unknown",
+        updated_at=item["updated_at"],
+        topics=item.get("topics", [])
+    )
+
+
+def _expect(text: str, pos: int, char: str) -> int:
+    """Skip whitespace and one expected character; returns the position after it."""
+    pos = _WHITESPACE.match(text, pos).end()
+    if text[pos:pos + 1] != char:
+        raise json.JSONDecodeError(f"Expecting {char!r}", text, pos)
+    return pos + 1
+
+
+def _peek(text: str, pos: int) -> Tuple[str, int]:
+    """Skip whitespace; returns the next character and its position."""
+    pos = _WHITESPACE.match(text, pos).end()
+    return text[pos:pos + 1], pos
+
+
+def _decode_items(text: str, pos: int) -> Tuple[List[Repo], int]:
+    """
+    Decode a JSON array of search items one element at a time.
+
+    Args:
+        text: Document text
+        pos: Position of the array's opening bracket
+
+    Returns:
+        Tuple of (parsed repos, position after the closing bracket)
+    """
+    repos = []
+    char, pos = _peek(text, _expect(text, pos, "["))
+    while char != "]":
+        item, pos = _decoder.raw_decode(text, pos)
+        repos.append(parse_repo(item))
+        char, pos = _peek(text, pos)
+        if char != "]":
+            pos = _WHITESPACE.match(text, _expect(text, pos, ",")).end()
+    return repos, pos + 1
+
+
+def decode_search_stdlib(body: bytes) -> Tuple[Dict, List[Repo]]:
+    """
+    Decode a search response with the stdlib, projecting items as they are read.
+
+    Returns:
+        Tuple of (every top-level field except items, parsed repos)
+
+    Raises:
+        ValueError: If the body isn't valid JSON or not a JSON object
+    """
+    text = body.decode("utf-8") if isinstance(body, (bytes, bytearray)) else body
+    fields: Dict = {}
+    repos: List[Repo] = []
+
+    pos = _expect(text, 0, "{")
+    char, pos = _peek(text, pos)
+    if char != "}":
+        while True:
+            key, pos = _decoder.raw_decode(text, pos)
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name", text, pos)
+            pos = _expect(text, pos, ":")
+            pos = _WHITESPACE.match(text, pos).end()
+            if key == "items" and text[pos:pos + 1] == "[":
+                repos, pos = _decode_items(text, pos)
+            else:
+                fields[key], pos = _decoder.raw_decode(text, pos)
+            char, pos = _peek(text, pos)
+            if char == "}":
+                break
+            pos = _expect(text, pos, ",")
+            pos = _WHITESPACE.match(text, pos).end()
+
+    return fields, repos
+
+
+def decode_search(body: bytes, stream: bool = False) -> Tuple[Dict, List[Repo]]:
+    """
+    Decode a search response into its top-level fields and Repo records.
+
+    Uses orjson when it's installed and ``json.loads`` otherwise; all
+    decoders give the same result.
+
+    Args:
+        body: Response body
+        stream: Use the streaming stdlib decoder, which holds less in memory
+            but is slower than either parser
+
+    Returns:
+        Tuple of (every top-level field except items, e.g. total_count;
+        parsed repos in rank order)
+
+    Raises:
+        ValueError: If the body isn't valid JSON
+    """
+    if stream:
+        return decode_search_stdlib(body)
+
+    data = orjson.loads(body) if orjson is not None else json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("Search response is not a JSON object")
+    items = data.pop("items", None) or []
+    return data, [parse_repo(item) for item in items]
@@ -0,0 +1,318 @@
+"""Fetch extra details for the repos that make it into a report.
+
+Search results only carry stars, forks, language and description. After
+ranking, the few repos that will be reported are looked up through the
+GraphQL API, many repos per request, for their latest release, open
+issues, contributors and a README excerpt. Details are cached per repo in
+``cache/details.json`` for a while, so repos reported again cost nothing.
+"""
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from src import metrics
+from src.github_fetcher import (
+    API_URL,
+    MAX_RETRIES,
+    REQUEST_TIMEOUT,
+    RETRY_STATUSES,
+    get_api_url,
+    get_session,
+    get_token,
+    retry_delay
+)
+
+
+DETAILS_FILE = Path("cache") / "details.json"
+DEFAULT_DETAILS_TTL_HOURS = 24
+GRAPHQL_PATH = "/graphql"
+BATCH_SIZE = 20  # Repos per GraphQL request
+README_EXCERPT_LENGTH = 200
+NOT_FOUND = "NOT_FOUND"  # GraphQL error type of a lookup for a repo that doesn't exist
+
+# mentionableUsers (contributors plus anyone with access) is the closest
+# to a contributor count the GraphQL API offers
+REPOSITORY_FRAGMENT = """
+fragment details on Repository {
+  latestRelease { tagName publishedAt }
+  issues(states: OPEN) { totalCount }
+  mentionableUsers { totalCount }
+  readme: object(expression: "HEAD:README.md") { ... on Blob { text } }
+}
+"""
+
+
+class GraphQLError(requests.RequestException):
+    """The GraphQL API answered, but with errors instead of data (e.g. RATE_LIMITED)."""
+
+
+def build_query(full_names: List[str]) -> Tuple[str, Dict[str, str]]:
+    """
+    Build one GraphQL query looking up several repositories.
+
+    Owners and names are passed as variables, never pasted into the query.
+
+    Returns:
+        Tuple of (query, variables); repo ``i`` is aliased ``r<i>``
+    """
+    declarations, fields, variables = [], [], {}
+    for i, full_name in enumerate(full_names):
+        owner, _, name = full_name.partition("/")
+        variables[f"owner{i}"] = owner
+        variables[f"name{i}"] = name
+        declarations.append(f"$owner{i}: String!, $name{i}: String!")
+        fields.append(f"  r{i}: repository(owner: $owner{i}, name: $name{i}) {{ ...details }}")
+
+    query = (f"query({', '.join(declarations)}) {{\n" + "\n".join(fields) + "\n}\n"
+             + REPOSITORY_FRAGMENT)
+    return query, variables
+
+
+def readme_excerpt(text: Optional[str], length: int = README_EXCERPT_LENGTH) -> Optional[str]:
+    """
+    First paragraph of prose in a README.
+
+    Headings, badges, images, HTML and code blocks are skipped, and
+    markdown links are reduced to their text.
+    """
+    if not text:
+        return None
+
+    paragraph: List[str] = []
+    in_code = False
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code or line.startswith(("#", "![", "[![", "<", "|", "---", "===")):
+            if paragraph:
+                break
+            continue
+        if not line:
+            if paragraph:
+                break
+            continue
+        paragraph.append(line)
+
+    if not paragraph:
+        return None
+    excerpt = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", " ".join(paragraph))
+    excerpt = re.sub(r"[*_`]", "", excerpt)
+    if len(excerpt) > length:
+        excerpt = excerpt[:length].rsplit(" ", 1)[0] + "..."
+    return excerpt
+
+
+def parse_details(node: Optional[Dict]) -> Dict:
+    """
+    Flatten a repository node from the GraphQL response.
+
+    Returns:
+        Dictionary with whichever of latest_release, released_at,
+        open_issues, contributors and readme_excerpt are known; empty for
+        a repo that no longer exists
+    """
+    if not node:
+        return {}
+
+    details = {}
+    release = node.get("latestRelease")
+    if release:
+        details["latest_release"] = release.get("tagName")
+        details["released_at"] = release.get("publishedAt")
+    if node.get("issues") is not None:
+        details["open_issues"] = node["issues"].get("totalCount")
+    if node.get("mentionableUsers") is not None:
+        details["contributors"] = node["mentionableUsers"].get("totalCount")
+    excerpt = readme_excerpt((node.get("readme") or {}).get("text"))
+    if excerpt:
+        details["readme_excerpt"] = excerpt
+    return details
+
+
+def post_graphql(query: str, variables: Dict,
+                 max_retries: int = MAX_RETRIES) -> Tuple[Dict, Dict[str, str]]:
+    """
+    Send a GraphQL query through the shared session, retrying transient failures.
+
+    GraphQL has its own budget, so the search rate limiter isn't used.
+
+    Returns:
+        Tuple of (the response's "data", which may be partial if some
+        lookups failed; error type of each failed lookup by alias)
+
+    Raises:
+        GraphQLError: If the response has no data or errors that aren't
+            about a single lookup
+        requests.RequestException: If the request still fails after retrying
+    """
+    session = get_session()
+    url = get_api_url() + GRAPHQL_PATH
+
+    for attempt in range(max_retries + 1):
+        try:
+            with metrics.timer("http.graphql"):
+                response = session.post(url, json={"query": query, "variables": variables},
+                                        timeout=REQUEST_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= max_retries:
+                raise
+            time.sleep(retry_delay(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            time.sleep(retry_delay(attempt, response.headers.get("Retry-After")))
+            continue
+
+        response.raise_for_status()
+        metrics.count("http.bytes", len(response.content))
+        payload = response.json()
+        errors = payload.get("errors") or []
+        failed = {error["path"][0]: error.get("type") for error in errors if error.get("path")}
+        if payload.get("data") is None or not all(error.get("path") for error in errors):
+            message = "; ".join(error.get("message") or str(error.get("type")) for error in errors)
+            raise GraphQLError(f"GraphQL query failed: {message or 'no data'}")
+        return payload["data"], failed
+
+
+def fetch_details(full_names: List[str], batch_size: int = BATCH_SIZE) -> Dict[str, Dict]:
+    """
+    Look up details for repositories, ``batch_size`` per request.
+
+    Returns:
+        Dictionary mapping each full name to its details (see
+        parse_details); empty for repos that don't exist. Repos whose
+        lookup failed for another reason are left out
+
+    Raises:
+        requests.RequestException: If a request fails
+    """
+    details = {}
+    for start in range(0, len(full_names), batch_size):
+        batch = full_names[start:start + batch_size]
+        query, variables = build_query(batch)
+        data, failed = post_graphql(query, variables)
+        for i, full_name in enumerate(batch):
+            node = data.get(f"r{i}")
+            if node is not None or failed.get(f"r{i}") == NOT_FOUND:
+                details[full_name] = parse_details(node)
+    return details
+
+
+class DetailsCache:
+    """
+    Details per repo, each kept for ``ttl`` seconds after it was fetched.
+
+    Args:
+        ttl: Seconds details stay fresh
+        entries: full_name -> {"fetched": epoch seconds, "details": {...}}
+    """
+
+    def __init__(self, ttl: float = DEFAULT_DETAILS_TTL_HOURS * 3600,
+                 entries: Optional[Dict[str, Dict]] = None):
+        self.ttl = ttl
+        self._entries = entries or {}
+
+    @classmethod
+    def load(cls, path: Path = DETAILS_FILE,
+             ttl: float = DEFAULT_DETAILS_TTL_HOURS * 3600) -> "DetailsCache":
+        """Load the cache; a missing or unreadable file gives an empty one."""
+        try:
+            with open(path, 'r') as f:
+                return cls(ttl, json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(ttl)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, full_name: str, now: float) -> Optional[Dict]:
+        """Details of a repo if they are still fresh."""
+        entry = self._entries.get(full_name)
+        if entry is None or now - entry["fetched"] >= self.ttl:
+            return None
+        return entry["details"]
+
+    def put(self, full_name: str, details: Dict, now: float):
+        """Store freshly fetched details."""
+        self._entries[full_name] = {"fetched": now, "details": details}
+
+    def expire(self, now: float) -> int:
+        """Drop stale entries; returns how many were removed."""
+        stale = [name for name, entry in self._entries.items()
+                 if now - entry["fetched"] >= self.ttl]
+        for name in stale:
+            del self._entries[name]
+        return len(stale)
+
+    def save(self, path: Path = DETAILS_FILE):
+        """Write the cache to disk atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_suffix(".tmp")
+        with open(temp, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(temp, path)
+
+
+def enrich_repos(repos: List[Dict], ttl_hours: float = DEFAULT_DETAILS_TTL_HOURS,
+                 path: Path = DETAILS_FILE, now: Optional[float] = None) -> int:
+    """
+    Attach ``details`` to each repo, from the cache or in batched lookups.
+
+    Repos whose details can't be fetched are left without them and aren't
+    cached, so the next run asks again; only repos that don't exist are
+    cached with empty details. Without a
+    token the real GraphQL API refuses every request, so nothing is
+    fetched (cached details are still used).
+
+    Args:
+        repos: Repositories that will be reported (dicts or Repo records)
+        ttl_hours: How long fetched details are reused
+        path: Details cache file
+        now: Current time in epoch seconds, defaults to now
+
+    Returns:
+        Number of repos whose details were fetched rather than cached
+    """
+    now = time.time() if now is None else now
+    cache = DetailsCache.load(path, ttl_hours * 3600)
+
+    missing = []
+    for repo in repos:
+        details = cache.get(repo["full_name"], now)
+        if details is None:
+            missing.append(repo)
+        else:
+            repo["details"] = details
+    metrics.count("enrich.cached", len(repos) - len(missing))
+
+    if not missing:
+        return 0
+    if get_token() is None and get_api_url() == API_URL:
+        print("Skipping enrichment: the GraphQL API needs a token (set GITHUB_TOKEN)")
+        return 0
+
+    try:
+        with metrics.timer("enrich"):
+            fetched = fetch_details([repo["full_name"] for repo in missing])
+    except requests.RequestException as e:
+        print(f"Error fetching repo details: {e}")
+        return 0
+
+    for repo in missing:
+        details = fetched.get(repo["full_name"])
+        if details is not None:
+            repo["details"] = details
+            cache.put(repo["full_name"], details, now)
+    metrics.count("enrich.fetched", len(fetched))
+
+    cache.expire(now)
+    cache.save(path)
+    return len(fetched)
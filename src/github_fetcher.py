@@ -1,62 +1,599 @@
 """Fetch AI-related repositories from GitHub Search API."""
+import functools
+import math
+import os
+import random
+import threading
+import time
 import requests
-from datetime import datetime
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Iterator, List, Dict, Optional, Set, Tuple
 
+from src import metrics
+from src.decoding import decode_search, parse_repo
+from src.rate_limiter import (
+    MAX_RESET_WAIT,
+    RateLimiter,
+    SEARCH_LIMIT_ANONYMOUS,
+    SEARCH_LIMIT_AUTHENTICATED,
+    is_rate_limited
+)
+from src.replay import ResponseArchive
+from src.repo import Repo
+from src.response_cache import ResponseCache, make_key
+from src.single_flight import SingleFlight
 
-def fetch_repos(topic: str = "ai", limit: int = 10) -> List[Dict]:
+
+# GitHub API base URL and Search API endpoint
+API_URL = "https://api.github.com"
+SEARCH_PATH = "/search/repositories"
+SEARCH_URL = API_URL + SEARCH_PATH
+
+MAX_PER_PAGE = 100  # API max is 100
+MAX_RESULTS = 1000  # Search API never returns more than this per query
+DEFAULT_MAX_WORKERS = 4
+
+DEFAULT_POOL_SIZE = 10
+REQUEST_TIMEOUT = 10
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_MAX = 30.0  # seconds
+RETRY_AFTER_MAX = MAX_RESET_WAIT  # seconds; longer Retry-After values are capped to this
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HEADERS = {
+    "Accept": "application/vnd.github.v3+json",
+    "User-Agent": "GitHub-AI-Digest-Pipeline"
+}
+
+
+_session = None
+_session_lock = threading.Lock()
+_pool_size = DEFAULT_POOL_SIZE
+_token = None
+_rate_limiter = None
+
+_response_cache = None
+_response_cache_enabled = True
+
+_api_url = None
+_recorder = None
+_replayer = None
+
+_single_flight = None
+_coalescing_enabled = True
+
+_stream_decoding = False
+
+
+def configure_session(pool_size: int = DEFAULT_POOL_SIZE, token: Optional[str] = None):
     """
-    Fetch repositories from GitHub Search API based on topic.
+    Set the connection pool size and API token of the shared session.
+
+    The current session and rate limiter are dropped and new ones are
+    created on next use. Search results kept for coalescing are forgotten.
 
     Args:
-        topic: Search topic/keyword
-        limit: Maximum number of repos to return
+        pool_size: Maximum number of keep-alive connections per host
+        token: GitHub token, defaults to the GITHUB_TOKEN environment variable
+    """
+    global _session, _pool_size, _token, _rate_limiter
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _pool_size = pool_size
+        _token = token
+        _rate_limiter = None
+    _forget_results()
+
+
+def get_token() -> Optional[str]:
+    """Get the configured GitHub token, if any."""
+    return _token or os.environ.get("GITHUB_TOKEN") or None
+
+
+def get_session() -> requests.Session:
+    """Get the module-level session shared by all fetches, creating it if needed."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=_pool_size, pool_maxsize=_pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            token = get_token()
+            if token:
+                session.headers["Authorization"] = f"Bearer {token}"
+            _session = session
+        return _session
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the search rate limiter, sized for the authenticated budget if a token is set."""
+    global _rate_limiter
+    with _session_lock:
+        if _rate_limiter is None:
+            limit = SEARCH_LIMIT_AUTHENTICATED if get_token() else SEARCH_LIMIT_ANONYMOUS
+            _rate_limiter = RateLimiter(limit=limit)
+        return _rate_limiter
+
+
+def configure_response_cache(enabled: bool = True, **kwargs):
+    """
+    Enable, disable or reconfigure the on-disk response cache.
+
+    Args:
+        enabled: Whether to send conditional requests and cache responses
+        **kwargs: Passed to ResponseCache (directory, max_bytes)
+    """
+    global _response_cache, _response_cache_enabled
+    _response_cache_enabled = enabled
+    _response_cache = ResponseCache(**kwargs) if enabled and kwargs else None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the shared response cache, or None if caching is disabled."""
+    global _response_cache
+    if not _response_cache_enabled:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def configure_api_url(url: Optional[str] = None):
+    """
+    Point the fetcher at another GitHub API, e.g. the local stub server.
+
+    Args:
+        url: Base URL, defaults to the GITHUB_API_URL environment variable
+            or https://api.github.com
+    """
+    global _api_url
+    _api_url = url.rstrip("/") if url else None
+
+
+def get_api_url() -> str:
+    """Get the base URL requests are sent to."""
+    return _api_url or os.environ.get("GITHUB_API_URL", "").rstrip("/") or API_URL
+
+
+def configure_recording(record_dir: Optional[str] = None, replay_dir: Optional[str] = None):
+    """
+    Record raw responses to a directory, or replay them from one.
+
+    While replaying nothing is sent over the network, so runs are
+    deterministic and not rate limited.
+
+    Args:
+        record_dir: Directory to save every response body in
+        replay_dir: Directory to serve response bodies from
+    """
+    global _recorder, _replayer
+    if record_dir and replay_dir:
+        raise ValueError("Can't record and replay at the same time")
+    _recorder = ResponseArchive(record_dir) if record_dir else None
+    _replayer = ResponseArchive(replay_dir) if replay_dir else None
+    _forget_results()
+
+
+def configure_coalescing(enabled: bool = True, **kwargs):
+    """
+    Enable, disable or reconfigure sharing of identical search requests.
+
+    Args:
+        enabled: Whether concurrent identical searches share one request
+            and recent results are reused
+        **kwargs: Passed to SingleFlight (ttl, max_entries)
+    """
+    global _single_flight, _coalescing_enabled
+    _coalescing_enabled = enabled
+    _single_flight = SingleFlight(**kwargs) if enabled and kwargs else None
+
+
+def configure_decoding(stream: bool = False):
+    """
+    Choose how search responses are decoded.
+
+    Args:
+        stream: Decode items one at a time so a page's full object tree is
+            never held in memory, at some CPU cost (see decoding.py)
+    """
+    global _stream_decoding
+    _stream_decoding = stream
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Get the shared single-flight layer, or None if coalescing is disabled."""
+    global _single_flight
+    if not _coalescing_enabled:
+        return None
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
+
+
+def _forget_results():
+    """Drop reused search results, e.g. once they'd come from another token or archive."""
+    if _single_flight is not None:
+        _single_flight.clear()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds to wait."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Calculate how long to wait before retrying a request.
+
+    Args:
+        attempt: 0-based number of the attempt that just failed
+        retry_after: Retry-After header from the failed response, if any
 
     Returns:
-        List of repository dictionaries with metadata
+        Seconds to sleep: the server's Retry-After if given (at most
+        RETRY_AFTER_MAX, so a bogus or far-future value can't stall a
+        worker for hours), otherwise exponential backoff with full jitter
+    """
+    wait = parse_retry_after(retry_after)
+    if wait is not None:
+        return min(wait, RETRY_AFTER_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def request_with_retries(url: str, params: Dict, headers: Optional[Dict] = None,
+                         max_retries: int = MAX_RETRIES) -> requests.Response:
+    """
+    GET a URL through the shared session, retrying transient failures.
+
+    Every attempt first waits for the rate limiter. Connection errors,
+    timeouts and retryable status codes (429 and 5xx) are retried up to
+    ``max_retries`` times; a request rejected because the rate limit ran
+    out is retried once the limit resets. Extra ``headers`` are sent along
+    with the session defaults.
+
+    Raises:
+        requests.RequestException: If the request still fails after retrying
     """
-    # Construct search query
-    query = f"{topic} stars:>50"
+    session = get_session()
+    limiter = get_rate_limiter()
+
+    for attempt in range(max_retries + 1):
+        waited = limiter.acquire()
+        if waited:
+            metrics.record("http.rate_limit_wait", waited)
+        if attempt:
+            metrics.count("http.retries")
+
+        try:
+            with metrics.timer("http.request"):
+                response = session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= max_retries:
+                raise
+            time.sleep(retry_delay(attempt))
+            continue
+
+        if is_rate_limited(response.status_code, response.headers) and attempt < max_retries:
+            # Next acquire() sleeps until the reset
+            metrics.count("http.rate_limited")
+            limiter.exhaust(response.headers)
+            continue
+
+        limiter.update(response.headers)
+
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            time.sleep(retry_delay(attempt, response.headers.get("Retry-After")))
+            continue
+
+        response.raise_for_status()
+        return response
+
+
+def build_query(topic: str) -> str:
+    """Build the search query string for a topic."""
+    return f"{topic} stars:>50"
+
 
-    # GitHub Search API endpoint
-    url = "https://api.github.com/search/repositories"
-    params = {
+def search_params(query: str, page: int, per_page: int) -> Dict:
+    """Query parameters of a search page request, most starred first."""
+    return {
         "q": query,
         "sort": "stars",
         "order": "desc",
-        "per_page": min(limit, 100)  # API max is 100
+        "per_page": per_page,
+        "page": page
     }
 
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "GitHub-AI-Digest-Pipeline"
-    }
 
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        repos = []
-        for item in data.get("items", [])[:limit]:
-            repo = {
-                "name": item["name"],
-                "full_name": item["full_name"],
-                "description": item["description"] or "No description provided",
-                "url": item["html_url"],
-                "stars": item["stargazers_count"],
-                "forks": item["forks_count"],
-                "language": item["language"] or "Unknown",
-                "updated_at": item["updated_at"],
-                "topics": item.get("topics", [])
-            }
-            repos.append(repo)
-
-        return repos
-
-    except requests.RequestException as e:
-        print(f"Error fetching repos: {e}")
-        return []
+def get_document(url: str, params: Dict) -> bytes:
+    """
+    GET a response body, recording or replaying it if configured.
+
+    Raises:
+        requests.RequestException: If the request fails, or wasn't recorded
+            when replaying
+    """
+    if _replayer is not None:
+        body = _replayer.load(url, params)
+        metrics.count("http.replayed")
+        metrics.count("http.bytes", len(body))
+        return body
+
+    body = get_body(url, params)
+    metrics.count("http.bytes", len(body))
+    if _recorder is not None:
+        _recorder.save(url, params, body)
+    return body
+
+
+def get_body(url: str, params: Dict) -> bytes:
+    """
+    GET a response body, revalidating against the on-disk response cache.
+
+    A cached response is re-requested with If-None-Match/If-Modified-Since,
+    and a 304 Not Modified reply is served from disk.
+
+    Raises:
+        requests.RequestException: If the request fails
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return request_with_retries(url, params).content
+
+    key = make_key(url, params)
+    response = request_with_retries(url, params, headers=cache.validators(key))
+
+    if response.status_code == 304:
+        body = cache.load(key)
+        if body is None:
+            # Entry vanished since we sent the validators, ask again in full
+            response = request_with_retries(url, params)
+        else:
+            metrics.count("http.not_modified")
+            return body
+
+    cache.store(
+        key,
+        response.content,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified")
+    )
+    return response.content
+
+
+def request_search_page(query: str, page: int, per_page: int) -> Tuple[int, List[Repo]]:
+    """
+    Request and decode a single page of search results (see search_page).
+
+    Raises:
+        requests.RequestException: If the request fails or the response
+            isn't a JSON search result (e.g. a proxy's HTML error page)
+    """
+    body = get_document(get_api_url() + SEARCH_PATH, search_params(query, page, per_page))
+
+    with metrics.timer("parse"):
+        try:
+            fields, repos = decode_search(body, stream=_stream_decoding)
+        except ValueError as e:
+            # Raised like response.json() would, so callers skip the page
+            doc = body.decode("utf-8", "replace") if isinstance(body, bytes) else str(body)
+            raise requests.exceptions.JSONDecodeError(
+                f"Malformed search response: {e}", doc, getattr(e, "pos", 0)
+            ) from e
+    metrics.count("repos.fetched", len(repos))
+    return fields.get("total_count", len(repos)), repos
+
+
+def search_page(query: str, page: int, per_page: int) -> Tuple[int, List[Dict]]:
+    """
+    Fetch a single page of search results along with the total match count.
+
+    Concurrent calls for the same page of the same query (compared like
+    response cache keys, ignoring case and extra whitespace) share one
+    request, and its result is reused for a short while (see
+    configure_coalescing). Every caller gets its own copies of the repos.
+
+    Args:
+        query: Search query string
+        page: 1-based page number
+        per_page: Results per page (max 100)
+
+    Returns:
+        Tuple of (total repos matching the query, even past the 1000
+        the API will return; repository dictionaries in rank order)
+
+    Raises:
+        requests.RequestException: If the request fails
+    """
+    flight = get_single_flight()
+    if flight is None:
+        return request_search_page(query, page, per_page)
+
+    key = make_key(get_api_url() + SEARCH_PATH, search_params(query, page, per_page))
+    total, repos = flight.call(key, functools.partial(request_search_page, query, page, per_page))
+    return total, [repo.copy() for repo in repos]
+
+
+async def search_page_async(query: str, page: int, per_page: int) -> Tuple[int, List[Dict]]:
+    """
+    Asyncio counterpart of search_page.
+
+    A request this task has to send runs on the loop's executor; waiting
+    for one another caller (thread or task) already sent takes no thread.
+    """
+    import asyncio  # Already loaded by the caller's event loop; kept off the sync import path
+
+    loop = asyncio.get_running_loop()
+    request = functools.partial(request_search_page, query, page, per_page)
+    flight = get_single_flight()
+    if flight is None:
+        return await loop.run_in_executor(None, request)
+
+    key = make_key(get_api_url() + SEARCH_PATH, search_params(query, page, per_page))
+    future, leader = flight.claim(key)
+    if leader:
+        loop.run_in_executor(None, flight.resolve, key, future, request)
+    total, repos = await asyncio.wrap_future(future)
+    return total, [repo.copy() for repo in repos]
+
+
+def fetch_page(query: str, page: int, per_page: int) -> List[Dict]:
+    """
+    Fetch a single page of search results.
+
+    Args:
+        query: Search query string
+        page: 1-based page number
+        per_page: Results per page (max 100)
+
+    Returns:
+        List of repository dictionaries in rank order
+
+    Raises:
+        requests.RequestException: If the request fails
+    """
+    return search_page(query, page, per_page)[1]
+
+
+def iter_pages(topic: str = "ai", limit: int = 10, seen: Optional[Set[str]] = None,
+               max_workers: int = DEFAULT_MAX_WORKERS) -> Iterator[List[Dict]]:
+    """
+    Yield pages of search results in rank order.
+
+    Pages are requested concurrently, at most ``max_workers`` at a time, and
+    yielded in page order as soon as each one is ready. When ``seen`` is
+    given, repos in it don't count towards ``limit``: pages keep being
+    fetched until ``limit`` new repos have been found or the results run
+    out. Repos already yielded on an earlier page are skipped.
+
+    Args:
+        topic: Search topic/keyword
+        limit: Maximum number of (new) repos to yield
+        seen: Optional set of full names that are already cached
+        max_workers: Maximum number of pages fetched at once
+
+    Yields:
+        Lists of repository dictionaries
+    """
+    if limit <= 0:
+        return
+
+    query = build_query(topic)
+
+    if seen:
+        # We can't tell up front how many results are cached, so page through
+        # everything the API will give us and stop once we have enough
+        per_page = MAX_PER_PAGE
+        max_pages = MAX_RESULTS // per_page
+    else:
+        per_page = min(limit, MAX_PER_PAGE)
+        max_pages = min(math.ceil(limit / per_page), MAX_RESULTS // per_page)
+
+    names = set()
+    new_count = 0
+    next_page = 1
+
+    max_workers = max(1, max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while next_page <= max_pages and new_count < limit:
+            last_page = min(next_page + max_workers - 1, max_pages)
+            futures = [
+                pool.submit(fetch_page, query, page, per_page)
+                for page in range(next_page, last_page + 1)
+            ]
+            next_page = last_page + 1
+
+            # Merge in page order so the result keeps the API's ranking
+            for future in futures:
+                try:
+                    page_repos = future.result()
+                except requests.RequestException as e:
+                    print(f"Error fetching repos: {e}")
+                    next_page = max_pages + 1
+                    break
+
+                merged = []
+                for repo in page_repos:
+                    if new_count >= limit or repo["full_name"] in names:
+                        continue
+                    names.add(repo["full_name"])
+                    merged.append(repo)
+                    if not seen or repo["full_name"] not in seen:
+                        new_count += 1
+
+                if merged:
+                    yield merged
+
+                if len(page_repos) < per_page:
+                    # Short page means there are no more results
+                    next_page = max_pages + 1
+                    break
+
+
+def iter_repos(topic: str = "ai", limit: int = 10, seen: Optional[Set[str]] = None,
+               max_workers: int = DEFAULT_MAX_WORKERS) -> Iterator[Dict]:
+    """Yield repositories one at a time from iter_pages."""
+    for page in iter_pages(topic, limit, seen, max_workers):
+        yield from page
+
+
+def fetch_repos(topic: str = "ai", limit: int = 10, seen: Optional[Set[str]] = None,
+                max_workers: int = DEFAULT_MAX_WORKERS) -> List[Dict]:
+    """
+    Fetch repositories from GitHub Search API based on topic.
+
+    Collects iter_pages into a list; see there for how pages are fetched.
+
+    Args:
+        topic: Search topic/keyword
+        limit: Maximum number of (new) repos to return
+        seen: Optional set of full names that are already cached
+        max_workers: Maximum number of pages fetched at once
+
+    Returns:
+        List of repository dictionaries with metadata, in rank order
+    """
+    return list(iter_repos(topic, limit, seen, max_workers))
+
+
+async def fetch_repos_async(topic: str = "ai", limit: int = 10, seen: Optional[Set[str]] = None,
+                            max_workers: int = DEFAULT_MAX_WORKERS) -> List[Dict]:
+    """
+    Asyncio counterpart of fetch_repos.
+
+    The fetch runs on a worker thread of the running loop's executor, so the
+    event loop keeps serving other tasks while the shared session waits on
+    the network, rate limiter or retry backoff. Takes the same arguments and
+    returns the same repo dictionaries as fetch_repos.
+    """
+    import asyncio  # Already loaded by the caller's event loop; kept off the sync import path
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None,
+        functools.partial(fetch_repos, topic=topic, limit=limit, seen=seen, max_workers=max_workers)
+    )
 
 
 def parse_updated_date(date_str: str) -> datetime:
@@ -0,0 +1,117 @@
+"""Match many keywords against repository text in a single pass."""
+import re
+from typing import Dict, Iterable, List, Set
+
+from src.repo import Repo
+
+
+def _trie_regex(keywords: List[str]) -> str:
+    """
+    Build a regex matching any of the keywords, factored as a trie.
+
+    Shared prefixes are matched once, so the regex engine only follows the
+    branch for the next character instead of trying every keyword in turn.
+    Optional groups are greedy, so the longest keyword at a position wins.
+    """
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of a keyword
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def repo_text(repo: Dict) -> str:
+    """
+    Lower-cased name and description of a repo, as one searchable string.
+
+    The two are joined with \\0 so a keyword can't match across them.
+    """
+    if isinstance(repo, Repo):
+        return repo.text()
+    return repo.get("name", "").lower() + "\0" + repo.get("description", "").lower()
+
+
+class KeywordMatcher:
+    """
+    Find which keywords a repository matches.
+
+    A keyword matches when it occurs (case-insensitively) in the repo's name
+    or description, or equals one of its topics, the same rules used by
+    calculate_keyword_match and calculate_preference_boost. The keywords are
+    compiled once so each repo's text is scanned in a single pass, however
+    many keywords there are.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = set(k.lower() for k in keywords)
+
+        searchable = [k for k in self.keywords if k]
+        # The empty string is in every text
+        self._always = {""} & self.keywords
+
+        self._pattern = None
+        self._search = None
+        if searchable:
+            trie = _trie_regex(searchable)
+            self._pattern = re.compile(f"(?=({trie}))")
+            self._search = re.compile(trie)
+
+        # The scan reports the longest keyword at each position; any shorter
+        # keyword starting there is a substring of it
+        self._contained = {
+            k: {other for other in searchable if other in k} for k in searchable
+        }
+
+    def match_text(self, text: str) -> Set[str]:
+        """
+        Find the keywords occurring in an already lower-cased text.
+
+        Returns:
+            Set of matched keywords
+        """
+        found = set(self._always)
+        if self._pattern is not None:
+            contained = self._contained
+            for match in self._pattern.finditer(text):
+                found |= contained[match.group(1)]
+        return found
+
+    def search_text(self, text: str) -> bool:
+        """Check whether any keyword occurs in an already lower-cased text."""
+        if self._always:
+            return True
+        return self._search is not None and self._search.search(text) is not None
+
+    def matches(self, repo: Dict) -> Set[str]:
+        """
+        Find the keywords a repository matches.
+
+        Args:
+            repo: Repository dictionary
+
+        Returns:
+            Set of matched (lower-cased) keywords
+        """
+        found = self.match_text(repo_text(repo))
+
+        if isinstance(repo, Repo):
+            topics = repo.topics_lower
+        else:
+            topics = [t.lower() for t in repo.get("topics", [])]
+
+        for topic in topics:
+            if topic in self.keywords:
+                found.add(topic)
+
+        return found
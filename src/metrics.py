@@ -0,0 +1,184 @@
+"""Lightweight timers and counters for the pipeline stages.
+
+Instrumentation is off by default. While it's off, ``timer`` hands back a
+shared no-op context manager and ``count`` returns immediately, so the
+calls can stay in place in production code.
+"""
+import functools
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+
+_enabled = False
+_lock = threading.Lock()
+_timers: Dict[str, Dict[str, float]] = {}
+_counters: Dict[str, float] = {}
+_observer = None
+
+
+def enable(on: bool = True):
+    """Turn instrumentation on or off."""
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    """Check whether instrumentation is on."""
+    return _enabled
+
+
+def observe(observer):
+    """
+    Report stage boundaries to an observer, or stop with None.
+
+    The observer's ``enter(name)`` and ``exit(name)`` are called around every
+    timed stage, even while instrumentation is off, so a profiler can be
+    scoped to one stage.
+    """
+    global _observer
+    _observer = observer
+
+
+def reset():
+    """Forget everything recorded so far."""
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def record(name: str, seconds: float):
+    """Add one timed call to a stage."""
+    if not _enabled:
+        return
+    with _lock:
+        stats = _timers.get(name)
+        if stats is None:
+            stats = _timers[name] = {"calls": 0, "seconds": 0.0, "max": 0.0}
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+        if seconds > stats["max"]:
+            stats["max"] = seconds
+
+
+def count(name: str, value: float = 1):
+    """Add to a counter."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+class _Timer:
+    """Time the body of a with block as one call to a stage."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        if _observer is not None:
+            _observer.enter(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        if _observer is not None:
+            _observer.exit(self.name)
+        return False
+
+
+class _NullTimer:
+    """Stand-in used while instrumentation is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """
+    Context manager timing a stage.
+
+    Example:
+        with metrics.timer("cache.load"):
+            cache = open_seen_cache()
+    """
+    if not _enabled and _observer is None:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def timed(func: Callable, name: str) -> Callable:
+    """
+    Wrap a function so each call is timed as a stage.
+
+    Meant for per-item work inside a stream, where a single timer around
+    the loop would also count time spent producing the items. Returns
+    ``func`` itself while instrumentation is off and nothing observes stages.
+    """
+    if not _enabled and _observer is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _Timer(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def report() -> Dict:
+    """
+    Everything recorded so far.
+
+    Returns:
+        Dictionary with "timers" (calls, seconds, max and calls per second
+        per stage) and "counters"
+    """
+    with _lock:
+        timers = {
+            name: dict(stats, per_second=stats["calls"] / stats["seconds"] if stats["seconds"] else None)
+            for name, stats in _timers.items()
+        }
+        return {"timers": timers, "counters": dict(_counters)}
+
+
+def format_table(data: Dict = None) -> str:
+    """Render a report as a per-stage table followed by the counters."""
+    data = data or report()
+    lines = [f"{'stage':<22} {'calls':>8} {'total s':>10} {'mean ms':>10} {'max ms':>10} {'calls/s':>12}"]
+    for name, stats in sorted(data["timers"].items()):
+        mean = stats["seconds"] / stats["calls"] * 1000 if stats["calls"] else 0.0
+        rate = f"{stats['per_second']:12,.0f}" if stats["per_second"] else f"{'-':>12}"
+        lines.append(
+            f"{name:<22} {stats['calls']:>8,} {stats['seconds']:>10.3f} {mean:>10.3f} "
+            f"{stats['max'] * 1000:>10.3f} {rate}"
+        )
+
+    if data["counters"]:
+        lines.append("")
+        lines.append(f"{'counter':<22} {'value':>14}")
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"{name:<22} {value:>14,.0f}")
+
+    return "\n".join(lines)
+
+
+def write_json(path: str, data: Dict = None):
+    """Write a report as JSON."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data or report(), f, indent=2)
@@ -0,0 +1,368 @@
+"""Run the digest pipeline for one or more topics in a single process."""
+import functools
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+import requests
+
+from src import metrics
+from src.cache import open_seen_cache
+from src.candidates import DEFAULT_REFRESH_DAYS, CandidateSet, fetch_incremental
+from src.config import load_config
+from src.enrichment import DEFAULT_DETAILS_TTL_HOURS, enrich_repos
+from src.github_fetcher import MAX_RESULTS, fetch_repos, iter_repos
+from src.repo import Repo
+from src.report_generator import generate_report, record_run, report_filename
+from src.scorer import top_k_repos
+from src.sharding import SHARD_MODES, fetch_sharded
+from src.snapshot import SNAPSHOT_DIR, SnapshotWriter, snapshot_path
+from src.topics import parse_topics, read_topics_file, topic_slug
+from src.trends import DEFAULT_TREND_WINDOW, TrendIndex, trending_scorer
+
+
+DEFAULT_TOPIC_WORKERS = 4
+RANK_MODES = ("score", "trending")
+
+
+def fetch_topics(topics: List[str], limit: int, seen: Set[str],
+                 max_workers: int = DEFAULT_TOPIC_WORKERS) -> Dict[str, List[Dict]]:
+    """
+    Fetch several topics concurrently.
+
+    Args:
+        topics: Topics to search for
+        limit: Number of new repos wanted per topic
+        seen: Full names of recently reported repos
+        max_workers: Maximum number of topics fetched at once
+
+    Returns:
+        Dictionary mapping each topic to its fetched repos
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            topic: pool.submit(fetch_repos, topic=topic, limit=limit, seen=seen)
+            for topic in topics
+        }
+        return {topic: future.result() for topic, future in futures.items()}
+
+
+def incremental_candidates(topic: str, shard_by: Optional[str] = None,
+                           refresh_days: Optional[int] = DEFAULT_REFRESH_DAYS) -> List[Repo]:
+    """
+    Update a topic's candidate set and return its repos.
+
+    If fetching the changes fails, the stored candidates are used as they
+    are and the next run asks for the changes again.
+    """
+    try:
+        return fetch_incremental(topic, shard_by, refresh_days).repos()
+    except requests.RequestException as e:
+        print(f"Error fetching changes for {topic}: {e}")
+        print("Ranking the stored candidates")
+        return CandidateSet.load(topic).repos()
+
+
+def dedupe_topics(results: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+    """
+    Keep each repo only under the first topic it was found for.
+
+    Args:
+        results: Dictionary mapping topics (in priority order) to repos
+
+    Returns:
+        Dictionary with the same topics and duplicates removed
+    """
+    claimed = set()
+    deduped = {}
+
+    for topic, repos in results.items():
+        deduped[topic] = []
+        for repo in repos:
+            full_name = repo.get("full_name")
+            if full_name in claimed:
+                continue
+            claimed.add(full_name)
+            deduped[topic].append(repo)
+
+    return deduped
+
+
+class _Counter:
+    """Count items as they stream through."""
+
+    def __init__(self, items: Iterable):
+        self._items = items
+        self.count = 0
+
+    def __iter__(self):
+        for item in self._items:
+            self.count += 1
+            yield item
+
+
+def read_repos_jsonl(path: str) -> Iterator[Repo]:
+    """
+    Lazily read repository dictionaries from a JSON Lines file.
+
+    Each line holds one repo in the shape returned by fetch_repos, and is
+    yielded as a compact Repo record.
+    """
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield Repo.from_dict(json.loads(line))
+
+
+def select_repos(repos: Iterable[Dict], topic: str, limit: int, cache,
+                 config: Dict, log: Callable[[str], None],
+                 score: Optional[Callable[[Dict], float]] = None) -> List[Dict]:
+    """
+    Stream candidates through the seen filter into top-k selection.
+
+    Nothing but the best ``limit`` repos is held in memory, however many
+    candidates ``repos`` yields.
+
+    Args:
+        repos: Candidate repositories, consumed lazily
+        topic: Topic used for scoring
+        limit: Number of repos to keep
+        cache: Open seen-repo cache
+        config: User preferences
+        log: Progress message callback
+        score: Optional scoring function, defaults to score_repo
+
+    Returns:
+        Best new repos with scores, best first
+    """
+    cache_days = config.get("cache_days", 7)
+
+    found = _Counter(repos)
+    unseen = _Counter(cache.iter_unseen(found, cache_days))
+
+    # Score repos with preferences and keep the best
+    selected = top_k_repos(unseen, limit, topic=topic, preferences=config, score=score)
+
+    if not found.count:
+        log("No repositories found or error occurred")
+        return []
+
+    log(f"Found {found.count} repositories")
+
+    filtered_count = found.count - unseen.count
+    metrics.count("cache.filtered", filtered_count)
+    metrics.count("repos.selected", len(selected))
+    if filtered_count > 0:
+        log(f"Filtered {filtered_count} previously seen repos (within {cache_days} days)")
+
+    if not selected:
+        log("No new repositories to report after filtering")
+
+    return selected
+
+
+def run_digest(topics: List[str], limit: int = 10, date: Optional[str] = None,
+               config: Optional[Dict] = None, combined: bool = False,
+               source: Optional[Iterable[Dict]] = None, rank_mode: str = "score",
+               shard_by: Optional[str] = None, incremental: bool = False,
+               enrich: bool = False, output_dir: Optional[str] = None,
+               cache_path: Optional[str] = None) -> List[str]:
+    """
+    Fetch, filter, rank and report one or more topics.
+
+    A single topic is streamed: pages from the fetcher flow through the
+    seen filter into top-k selection, and report cards are written as they
+    are generated. Several topics are fetched concurrently and repos found
+    under more than one topic are only reported for the first of them. The
+    seen-repo cache is loaded and saved once for the whole run. Runs that
+    must not filter each other's repos or overwrite each other's reports,
+    e.g. several users' digests in one process, each pass their own
+    ``output_dir`` and ``cache_path``. Everything
+    fetched is appended to the day's snapshot in ``config["snapshot_dir"]``
+    (``snapshots/`` by default, null to disable). With ``rank_mode``
+    "trending", repos are ranked by star and fork velocity over the last
+    ``config["trend_window_days"]`` days of snapshots; candidates are then
+    the top 1,000 search results rather than the top ``limit``, since the
+    fastest growing repos are rarely the most starred (``shard_by`` or
+    ``incremental`` widen the pool further). With ``shard_by``,
+    every repo matching each topic is fetched (see fetch_sharded) and
+    ranked, not just the top of the star ranking. With ``incremental``,
+    only repos pushed since the last run are fetched and merged into the
+    topic's stored candidate set, which is then ranked as a whole. With
+    ``enrich``, the repos chosen for the reports get extra details (latest
+    release, open issues, contributors, README excerpt) from batched
+    GraphQL lookups, cached for ``config["details_ttl_hours"]`` hours.
+
+    Args:
+        topics: Topics to search for
+        limit: Number of repositories to include per topic
+        date: Date string (YYYY-MM-DD), defaults to today
+        config: User preferences, loaded from config.json if not given
+        combined: Write one report for all topics instead of one per topic
+        source: Candidate repos to use instead of fetching (single topic
+            only), e.g. from read_repos_jsonl for a bulk import
+        rank_mode: "score" for score_repo, "trending" for recent growth
+        shard_by: "stars" or "created" to fetch complete candidate pools
+            by splitting searches into shards; None for a normal search
+        incremental: Fetch changes since the last run into the stored
+            candidate set (see fetch_incremental) and rank that
+        enrich: Look up extra details for the reported repos
+        output_dir: Directory for the reports, defaults to daily/
+        cache_path: Seen-repo cache file, defaults to the one for
+            ``config["cache_backend"]`` in cache/
+
+    Returns:
+        Paths of the generated reports
+    """
+    if config is None:
+        config = load_config()
+    cache_days = config.get("cache_days", 7)
+    date_str = date or datetime.now().strftime("%Y-%m-%d")
+    batch = len(topics) > 1
+
+    if source is not None and batch:
+        raise ValueError("A candidate source can only be used with a single topic")
+    if rank_mode not in RANK_MODES:
+        raise ValueError(f"Unknown rank mode: {rank_mode}")
+    if source is not None and (shard_by is not None or incremental):
+        raise ValueError("A candidate source can't be combined with a sharded or incremental fetch")
+    if shard_by is not None and shard_by not in SHARD_MODES:
+        raise ValueError(f"Unknown shard mode: {shard_by}")
+
+    def logger(topic: str) -> Callable[[str], None]:
+        return lambda message: print(f"[{topic}] {message}" if batch else message)
+
+    for topic in topics:
+        logger(topic)(f"Fetching {limit} repositories for topic: {topic}")
+    if config.get("preferred_topics"):
+        print(f"Preferred topics: {', '.join(config['preferred_topics'])}")
+
+    snapshot_dir = config.get("snapshot_dir", str(SNAPSHOT_DIR))
+    snapshot = None
+    if snapshot_dir and source is None:
+        snapshot = SnapshotWriter(snapshot_path(date_str, Path(snapshot_dir)))
+
+    trends = None
+    if rank_mode == "trending":
+        trends = TrendIndex.load(window=config.get("trend_window_days", DEFAULT_TREND_WINDOW))
+        if snapshot_dir:
+            trends.update(Path(snapshot_dir), today=date_str)
+        print(f"Ranking by star velocity over {trends.window} days ({len(trends)} repos with history)")
+
+    # The most starred repos are rarely the fastest growing, so trending
+    # ranks every result the search API will return
+    fetch_limit = MAX_RESULTS if trends is not None else limit
+
+    with metrics.timer("cache.load"):
+        cache = open_seen_cache(config.get("cache_backend", "json"), cache_path)
+    try:
+        seen = cache.recent_names(cache_days)
+
+        # Fetch repos from GitHub, paging past the ones we've already reported
+        if source is not None:
+            candidates = {topics[0]: source}
+        elif incremental:
+            refresh_days = config.get("candidates_refresh_days", DEFAULT_REFRESH_DAYS)
+            candidates = dedupe_topics({
+                topic: incremental_candidates(topic, shard_by, refresh_days) for topic in topics
+            })
+        elif shard_by is not None:
+            candidates = dedupe_topics({topic: fetch_sharded(topic, shard_by) for topic in topics})
+        elif batch:
+            candidates = dedupe_topics(fetch_topics(topics, fetch_limit, seen))
+        else:
+            candidates = {topics[0]: iter_repos(topics[0], fetch_limit, seen)}
+
+        if snapshot is not None:
+            candidates = {topic: snapshot.record(repos, topic) for topic, repos in candidates.items()}
+
+        ranked = {}
+        for topic in topics:
+            score = trending_scorer(trends, topic, config, date_str) if trends is not None else None
+            selected = select_repos(candidates[topic], topic, limit, cache, config, logger(topic), score)
+            if selected:
+                ranked[topic] = selected
+
+        if ranked:
+            with metrics.timer("cache.save"):
+                # Add to cache before generating reports
+                for repos in ranked.values():
+                    cache.add(repos, date=date_str)
+
+                # Cleanup old cache entries
+                cache.expire(cache_days)
+                cache.flush()
+    finally:
+        cache.close()
+        if snapshot is not None:
+            snapshot.close()
+
+    if trends is not None and snapshot_dir:
+        # Fold today's fetch into the index for the next run
+        trends.update(Path(snapshot_dir), today=date_str)
+        trends.expire(date_str)
+        trends.save()
+
+    if not ranked:
+        return []
+
+    if enrich:
+        reported = list(itertools.chain.from_iterable(ranked.values()))
+        enrich_repos(reported, config.get("details_ttl_hours", DEFAULT_DETAILS_TTL_HOURS))
+
+    # Generate reports
+    report_paths = []
+    if combined or not batch:
+        all_repos = itertools.chain.from_iterable(ranked.values())
+        count = sum(len(repos) for repos in ranked.values())
+        report_paths.append(
+            generate_report(all_repos, topic=", ".join(ranked), date=date_str, count=count,
+                            output_dir=output_dir)
+        )
+    else:
+        for topic, repos in ranked.items():
+            filename = report_filename(date_str, topic)
+            report_paths.append(generate_report(repos, topic=topic, date=date_str,
+                                                filename=filename, output_dir=output_dir))
+
+    record_run(topics, date_str, combined, report_paths, output_dir)
+
+    for path in report_paths:
+        print(f"Report generated: {path}")
+    for topic, repos in ranked.items():
+        logger(topic)(f"Included {len(repos)} repositories")
+
+    return report_paths
+
+
+async def run_digest_async(topics: List[str], limit: int = 10, date: Optional[str] = None,
+                           config: Optional[Dict] = None, combined: bool = False,
+                           source: Optional[Iterable[Dict]] = None,
+                           rank_mode: str = "score", shard_by: Optional[str] = None,
+                           incremental: bool = False, enrich: bool = False,
+                           output_dir: Optional[str] = None,
+                           cache_path: Optional[str] = None) -> List[str]:
+    """
+    Asyncio counterpart of run_digest.
+
+    The whole run (network, cache and report I/O) happens on a worker thread
+    so an embedding event loop is never blocked. Takes the same arguments and
+    returns the same report paths as run_digest. Concurrent runs share the
+    default seen cache and daily/ unless each is given its own
+    ``output_dir`` and ``cache_path``.
+    """
+    import asyncio  # Already loaded by the caller's event loop; kept off the sync import path
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None,
+        functools.partial(
+            run_digest, topics, limit=limit, date=date, config=config, combined=combined,
+            source=source, rank_mode=rank_mode, shard_by=shard_by, incremental=incremental,
+            enrich=enrich, output_dir=output_dir, cache_path=cache_path
+        )
+    )
@@ -0,0 +1,210 @@
+"""Function-level profiling of a digest run.
+
+Two profilers run side by side:
+
+- cProfile, for exact call counts and times, written as a pstats file
+  (``python -m pstats OUT.prof`` or snakeviz). It only sees the thread
+  that started profiling.
+- A sampling thread that records the stack of every thread at a fixed
+  interval, written as collapsed stacks (``frame;frame;frame count``)
+  ready for flamegraph.pl or speedscope. It also covers fetch workers.
+
+Either can be scoped to one stage (any name passed to ``metrics.timer`` or
+``metrics.timed``, e.g. ``score`` or ``report.write``); time outside the
+stage is then left out.
+"""
+import cProfile
+import io
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from src import metrics
+
+
+DEFAULT_INTERVAL = 0.005  # Seconds between stack samples
+COLLAPSED_SUFFIX = ".collapsed"
+
+
+def frame_label(code) -> str:
+    """Name a stack frame as ``function (file.py:line)``."""
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """
+    Sample the stacks of other threads until stopped.
+
+    Args:
+        interval: Seconds between samples
+        threads: Only sample these thread idents; None for every thread
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, threads: Optional[set] = None):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.threads = threads
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Record the current stack of each sampled thread once."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == self.ident or (self.threads is not None and ident not in self.threads):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        """Stop sampling and wait for the thread to finish."""
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+
+
+class Profiler:
+    """
+    Profile a block of code, or only one stage of it.
+
+    Args:
+        stage: Stage to profile (a metrics timer name); None for everything
+            between ``start`` and ``stop``
+        interval: Seconds between stack samples; 0 disables sampling
+
+    Example:
+        with Profiler(stage="score") as profiler:
+            run_digest(["rag"])
+        profiler.dump_stats("score.prof")
+        profiler.write_collapsed("score.collapsed")
+    """
+
+    def __init__(self, stage: Optional[str] = None, interval: float = DEFAULT_INTERVAL):
+        self.stage = stage
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.sampler: Optional[StackSampler] = None
+        self._owner = None
+        self._depth: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start profiling (or start watching for the stage)."""
+        self._owner = threading.get_ident()
+        if self.interval > 0:
+            self.sampler = StackSampler(self.interval, set() if self.stage else None)
+            self.sampler.start()
+        if self.stage is None:
+            self.profile.enable()
+        else:
+            metrics.observe(self)
+
+    def stop(self):
+        """Stop profiling."""
+        if self.stage is None:
+            self.profile.disable()
+        else:
+            metrics.observe(None)
+            if self._depth.get(self._owner):
+                self.profile.disable()
+            self._depth.clear()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def enter(self, name: str):
+        """Stage observer hook: start profiling the stage in this thread."""
+        if name != self.stage:
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            depth = self._depth.get(ident, 0)
+            self._depth[ident] = depth + 1
+            if depth == 0 and self.sampler is not None:
+                self.sampler.threads.add(ident)
+        if depth == 0 and ident == self._owner:
+            self.profile.enable()
+
+    def exit(self, name: str):
+        """Stage observer hook: stop profiling the stage in this thread."""
+        if name != self.stage:
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            depth = self._depth.get(ident, 0) - 1
+            if depth > 0:
+                self._depth[ident] = depth
+                return
+            self._depth.pop(ident, None)
+            if self.sampler is not None:
+                self.sampler.threads.discard(ident)
+        if depth == 0 and ident == self._owner:
+            self.profile.disable()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def dump_stats(self, path: str):
+        """Write the cProfile results as a pstats file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.profile.dump_stats(str(path))
+
+    def write_collapsed(self, path: str):
+        """Write the stack samples in collapsed-stack format."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        samples = self.sampler.samples if self.sampler is not None else {}
+        with open(path, 'w') as f:
+            for stack, count in sorted(samples.items()):
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, limit: int = 15, sort: str = "cumulative") -> str:
+        """The top functions from cProfile as text."""
+        out = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+@contextmanager
+def profiled(output: str, stage: Optional[str] = None,
+             interval: float = DEFAULT_INTERVAL) -> Iterator[Profiler]:
+    """
+    Profile a block and write both result files when it's done.
+
+    Args:
+        output: pstats file; collapsed stacks go next to it with a
+            ``.collapsed`` suffix
+        stage: Only profile this stage
+        interval: Seconds between stack samples; 0 disables sampling
+
+    Example:
+        with profiled("out/run.prof", stage="report.write"):
+            run_digest(["rag"])
+    """
+    profiler = Profiler(stage, interval)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.dump_stats(output)
+        if interval > 0:
+            profiler.write_collapsed(Path(output).with_suffix(COLLAPSED_SUFFIX))
@@ -0,0 +1,120 @@
+"""Pace GitHub API calls using the X-RateLimit response headers."""
+import threading
+import time
+from typing import Callable, Mapping
+
+
+# Search API budgets per minute
+SEARCH_LIMIT_ANONYMOUS = 10
+SEARCH_LIMIT_AUTHENTICATED = 30
+DEFAULT_WINDOW = 60.0  # seconds
+MAX_RESET_WAIT = 300.0  # seconds; later X-RateLimit-Reset times are capped to this from now
+
+
+class RateLimiter:
+    """
+    Token bucket that refills once per rate-limit window.
+
+    Each request takes a token before it is sent. When the bucket is empty
+    the request is scheduled into the next window and the caller sleeps
+    until that window opens, so concurrent callers queue up behind the
+    reset instead of failing. The budget and reset time are corrected from
+    the X-RateLimit headers of every response; a reset more than
+    MAX_RESET_WAIT away (a skewed clock or a bogus header) is capped, so
+    the scheduler can't stall for hours.
+    """
+
+    def __init__(self, limit: int = SEARCH_LIMIT_ANONYMOUS, window: float = DEFAULT_WINDOW,
+                 clock: Callable[[], float] = time.time):
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        now = clock()
+        self.remaining = limit
+        self.opens_at = now  # When the current bucket's tokens may be used
+        self.reset_at = now + window  # When the current bucket is refilled
+
+    def reserve(self) -> float:
+        """
+        Take a token.
+
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        with self._lock:
+            now = self._clock()
+
+            if now >= self.reset_at:
+                self.remaining = self.limit
+                self.opens_at = now
+                self.reset_at = now + self.window
+
+            if self.remaining <= 0:
+                # Borrow from the next window
+                self.opens_at = self.reset_at
+                self.reset_at = self.opens_at + self.window
+                self.remaining = self.limit
+
+            self.remaining -= 1
+            return max(0.0, self.opens_at - now)
+
+    def acquire(self) -> float:
+        """
+        Take a token, sleeping until it may be used.
+
+        Returns:
+            Seconds slept
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0.0)
+
+    def update(self, headers: Mapping[str, str]):
+        """
+        Learn the budget from a response's X-RateLimit headers.
+
+        Args:
+            headers: Response headers
+        """
+        try:
+            limit = int(headers["X-RateLimit-Limit"])
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_at = float(headers["X-RateLimit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        with self._lock:
+            self.limit = limit
+            now = self._clock()
+            if self.opens_at > now:
+                # Already queued into a later window, nothing to correct
+                return
+
+            # Tokens we handed out for requests still in flight aren't in the
+            # server's count yet, so only ever lower our own
+            self.remaining = min(self.remaining, remaining)
+            self.reset_at = min(reset_at, now + MAX_RESET_WAIT)
+
+    def exhaust(self, headers: Mapping[str, str]):
+        """
+        Mark the budget as used up after the server rejected a request.
+
+        The reset time is taken from X-RateLimit-Reset when present.
+        """
+        with self._lock:
+            now = self._clock()
+            try:
+                reset_at = min(float(headers["X-RateLimit-Reset"]), now + MAX_RESET_WAIT)
+                self.reset_at = max(self.opens_at, reset_at)
+            except (KeyError, TypeError, ValueError):
+                pass
+            if self.opens_at <= now:
+                self.remaining = 0
+
+
+def is_rate_limited(status_code: int, headers: Mapping[str, str]) -> bool:
+    """Check whether a response was rejected because the budget ran out."""
+    return status_code in (403, 429) and headers.get("X-RateLimit-Remaining") == "0"
@@ -0,0 +1,62 @@
+"""Record raw API responses to a directory and serve them back offline."""
+import json
+import os
+from pathlib import Path
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+
+from src.response_cache import make_key
+
+
+class ReplayMissError(requests.RequestException):
+    """A replayed run asked for a request that was never recorded."""
+
+
+class ResponseArchive:
+    """
+    Raw response bodies on disk, one file per request.
+
+    Requests are keyed by URL path and normalized query parameters, so a
+    recording made against api.github.com replays for any base URL.
+    Each body is stored next to a small JSON file describing the request,
+    which makes a recording easy to inspect and edit by hand.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def key(self, url: str, params: Dict) -> str:
+        """Archive key of a request."""
+        return make_key(urlsplit(url).path, params)
+
+    def save(self, url: str, params: Dict, body: bytes):
+        """Store a response body, replacing any earlier recording of the request."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        key = self.key(url, params)
+
+        temp = self.directory / f"{key}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(body)
+        os.replace(temp, self.directory / f"{key}.body")
+
+        with open(self.directory / f"{key}.json", 'w') as f:
+            json.dump({"path": urlsplit(url).path, "params": params}, f, indent=2)
+
+    def load(self, url: str, params: Dict) -> bytes:
+        """
+        Load a recorded response body.
+
+        Raises:
+            ReplayMissError: If the request wasn't recorded
+        """
+        path = self.directory / f"{self.key(url, params)}.body"
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ReplayMissError(f"No recorded response for {urlsplit(url).path} {params}") from None
+
+    def __len__(self) -> int:
+        return len(list(self.directory.glob("*.body")))
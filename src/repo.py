@@ -0,0 +1,173 @@
+"""Compact record for a repository."""
+import sys
+import time
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+
+FIELDS = ("name", "full_name", "description", "url", "stars", "forks",
+          "language", "updated_at", "topics")
+
+_DEFAULTS = {
+    "name": "",
+    "full_name": "",
+    "description": "",
+    "url": "",
+    "stars": 0,
+    "forks": 0,
+    "language": "Unknown",
+    "updated_at": "",
+    "topics": None,
+}
+
+# Optional keys, only present once set
+_EXTRAS = ("score", "details")
+
+_KEYS = frozenset(FIELDS + _EXTRAS)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+CANONICAL_FORMAT = "%Y-%m-%dT%H:%M:%SZ"  # How the GitHub API writes timestamps
+
+
+def _lowered(value: str) -> str:
+    """Lower-case a string, reusing it when it already is."""
+    lowered = value.lower()
+    return value if lowered == value else lowered
+
+
+def parse_timestamp(updated_at: str) -> Optional[int]:
+    """
+    Convert an ISO timestamp to whole seconds since the epoch.
+
+    Returns None for anything that can't be represented exactly that way
+    (unparseable, naive or with fractional seconds), so callers can fall
+    back to parsing the original string.
+    """
+    try:
+        updated = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+
+    if updated.tzinfo is None or updated.microsecond:
+        return None
+
+    return int((updated - EPOCH).total_seconds())
+
+
+def is_canonical(updated_at: str, updated_ts: Optional[int]) -> bool:
+    """Check whether a timestamp can be rebuilt exactly from its epoch seconds."""
+    return (updated_ts is not None and len(updated_at) == 20
+            and updated_at[10] == "T" and updated_at[19] == "Z")
+
+
+class Repo(Mapping):
+    """
+    A repository, stored in slots instead of a dictionary.
+
+    Behaves like the read-only dictionary fetch_repos used to return (plus
+    ``score`` and enrichment ``details`` once set), so ``repo["stars"]``, ``repo.get("language")`` and
+    ``dict(repo)`` keep working. Alongside the public fields it keeps the
+    update time as epoch seconds and the lower-cased name, description and
+    topics, computed once when the record is built instead of on every
+    scoring pass. Values that are already lower-case are shared rather than
+    copied, and a canonical ``updated_at`` string is rebuilt from the epoch
+    seconds on access instead of being stored.
+    """
+
+    __slots__ = ("name", "full_name", "description", "url", "stars", "forks", "language",
+                 "_updated_at", "topics", "score", "details", "updated_ts",
+                 "name_lower", "description_lower", "topics_lower")
+
+    def __init__(self, name: str = "", full_name: str = "", description: str = "",
+                 url: str = "", stars: int = 0, forks: int = 0, language: str = "Unknown",
+                 updated_at: str = "", topics: Optional[List[str]] = None,
+                 score: Optional[float] = None, details: Optional[Dict] = None):
+        self.name = name
+        self.full_name = full_name
+        self.description = description
+        self.url = url
+        self.stars = stars
+        self.forks = forks
+        # Only a few dozen languages, shared by every repo
+        self.language = sys.intern(language) if isinstance(language, str) else language
+        self.updated_at = updated_at
+        self.topics = topics if topics is not None else []
+        self.score = score
+        self.details = details
+        self._derive()
+
+    def _derive(self):
+        """Recompute the cached lower-cased fields."""
+        self.name_lower = _lowered(self.name)
+        self.description_lower = _lowered(self.description)
+        topics_lower = [t.lower() for t in self.topics]
+        self.topics_lower = self.topics if topics_lower == self.topics else topics_lower
+
+    @property
+    def updated_at(self) -> str:
+        if self._updated_at is None:
+            return time.strftime(CANONICAL_FORMAT, time.gmtime(self.updated_ts))
+        return self._updated_at
+
+    @updated_at.setter
+    def updated_at(self, value: str):
+        self.updated_ts = parse_timestamp(value)
+        self._updated_at = None if is_canonical(value, self.updated_ts) else value
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Repo":
+        """Build a record from a repository dictionary, ignoring unknown keys."""
+        return cls(**{key: data.get(key, _DEFAULTS[key]) for key in FIELDS},
+                   score=data.get("score"), details=data.get("details"))
+
+    def __getitem__(self, key: str):
+        if key not in _KEYS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None and key in _EXTRAS:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default=None):
+        if key not in _KEYS:
+            return default
+        value = getattr(self, key)
+        if value is None and key in _EXTRAS:
+            return default
+        return value
+
+    def __setitem__(self, key: str, value):
+        if key not in _KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+        if key in ("name", "description", "topics"):
+            self._derive()
+
+    def __iter__(self) -> Iterator[str]:
+        yield from FIELDS
+        for key in _EXTRAS:
+            if getattr(self, key) is not None:
+                yield key
+
+    def __len__(self) -> int:
+        return len(FIELDS) + sum(getattr(self, key) is not None for key in _EXTRAS)
+
+    def __repr__(self) -> str:
+        return f"Repo({dict(self)!r})"
+
+    def text(self) -> str:
+        """Lower-cased name and description joined by \\0, as in matcher.repo_text."""
+        return self.name_lower + "\0" + self.description_lower
+
+    def copy(self) -> "Repo":
+        """Shallow copy, like dict.copy."""
+        clone = Repo.__new__(Repo)
+        for slot in Repo.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        return clone
+
+    def to_dict(self) -> Dict:
+        """Plain dictionary of the public fields, e.g. for JSON."""
+        return dict(self)
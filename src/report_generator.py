@@ -1,7 +1,27 @@
 """Generate markdown reports for GitHub repos."""
+import json
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, TextIO
+
+from src import metrics
+from src.topics import topic_slug
+
+
+DAILY_DIR = Path("daily")
+RUNS_FILE = ".runs.json"  # Reports written by each run on the latest date, in DAILY_DIR
+TOPIC_HEADER = "**Topic:** "
+
+
+def _month(timestamp: Optional[str]) -> Optional[str]:
+    """Format an ISO timestamp as 'Month YYYY', or None if it can't be parsed."""
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).strftime("%B %Y")
+    except ValueError:
+        return None
 
 
 def generate_why_matters(repo: Dict) -> str:
@@ -18,11 +38,20 @@ def generate_why_matters(repo: Dict) -> str:
     else:
         popularity = "emerging"
 
-    return f"A {popularity} {language} project with {stars:,} stars, indicating strong community adoption and active development."
+    why = f"A {popularity} {language} project with {stars:,} stars, indicating strong community adoption and active development."
+
+    # Enrichment details, when fetched
+    details = repo.get("details") or {}
+    if details.get("latest_release"):
+        release = details["latest_release"]
+        released = _month(details.get("released_at"))
+        why += f" Latest release: {release}" + (f" ({released})." if released else ".")
+
+    return why
 
 
 def generate_key_points(repo: Dict) -> List[str]:
-    """Generate 3 key points about the repo."""
+    """Generate 3 key points about the repo, plus up to 2 more from enrichment details."""
     points = []
 
     # Point 1: Description summary
@@ -47,6 +76,18 @@ def generate_key_points(repo: Dict) -> List[str]:
     else:
         points.append(f"Built with {language}")
 
+    # Enrichment details, when fetched
+    details = repo.get("details") or {}
+    if details.get("readme_excerpt"):
+        points.append(f"From the README: {details['readme_excerpt']}")
+    activity = []
+    if details.get("open_issues") is not None:
+        activity.append(f"{details['open_issues']:,} open issues")
+    if details.get("contributors") is not None:
+        activity.append(f"{details['contributors']:,} contributors")
+    if activity:
+        points.append("Activity: " + ", ".join(activity))
+
     return points
 
 
@@ -71,7 +112,7 @@ def generate_repo_card(repo: Dict) -> str:
     language = repo.get("language", "Unknown")
 
     why_matters = generate_why_matters(repo)
-    key_points = generate_key_points(repo)
+    key_points = "\n".join(f"- {point}" for point in generate_key_points(repo))
     practice_task = generate_practice_task(repo)
 
     card = f"""## [{name}]({url})
@@ -79,9 +120,7 @@ def generate_repo_card(repo: Dict) -> str:
 **Why it matters:** {why_matters}
 
 **Key Points:**
-- {key_points[0]}
-- {key_points[1]}
-- {key_points[2]}
+{key_points}
 
 **Practice Task:** {practice_task}
 
@@ -93,40 +132,161 @@ def generate_repo_card(repo: Dict) -> str:
     return card
 
 
-def generate_report(repos: List[Dict], topic: str, date: str = None) -> str:
+def write_report(f: TextIO, repos: Iterable[Dict], topic: str, date: str, count: int):
+    """
+    Write a markdown report to an open file, one card at a time.
+
+    Args:
+        f: Text file to write to
+        repos: Repositories to include, consumed lazily
+        topic: Topic that was searched
+        date: Date string (YYYY-MM-DD)
+        count: Number of repositories, shown in the header
+    """
+    f.write(f"""# GitHub AI Digest - {date}
+
+{TOPIC_HEADER}{topic}
+**Repositories Analyzed:** {count}
+
+---
+
+""")
+
+    for index, repo in enumerate(repos):
+        if index:
+            f.write("\n")
+        f.write(generate_repo_card(repo))
+
+
+def report_filename(date: str, topic: Optional[str] = None) -> str:
+    """
+    Report file name inside daily/.
+
+    Args:
+        date: Date string (YYYY-MM-DD)
+        topic: Topic of a per-topic batch report; None for a single-topic or
+            combined report
+
+    Returns:
+        YYYY-MM-DD.md, or YYYY-MM-DD-<topic>.md for a per-topic report
+    """
+    if topic is None:
+        return f"{date}.md"
+    return f"{date}-{topic_slug(topic)}.md"
+
+
+def report_topic(path: Path) -> Optional[str]:
+    """Topic in a report's header, or None if the report is missing or has none."""
+    try:
+        with open(path, 'r') as f:
+            for _, line in zip(range(5), f):
+                if line.startswith(TOPIC_HEADER):
+                    return line[len(TOPIC_HEADER):].strip()
+    except FileNotFoundError:
+        return None
+    return None
+
+
+def _run_key(topics: List[str], combined: bool) -> str:
+    """Key of a run_digest call in the runs file."""
+    prefix = "combined: " if combined and len(topics) > 1 else ""
+    return prefix + ", ".join(topics)
+
+
+def _load_runs(path: Path) -> Dict:
+    """Read the runs file, or an empty one if it's missing or unreadable."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def record_run(topics: List[str], date: str, combined: bool, paths: List[str],
+               output_dir: Optional[Path] = None):
+    """
+    Note the reports a run_digest call wrote, for generated_reports.
+
+    Only the runs of the date last recorded are kept.
+
+    Args:
+        topics: Topics the run was asked for, including any without new repos
+        date: Date string (YYYY-MM-DD)
+        combined: Whether the run wrote one report for all topics
+        paths: Reports the run wrote
+        output_dir: Directory the reports were written to, defaults to daily/
+    """
+    path = Path(output_dir or DAILY_DIR) / RUNS_FILE
+    runs = _load_runs(path)
+    if runs.get("date") != date:
+        runs = {"date": date, "runs": {}}
+    runs["runs"][_run_key(topics, combined)] = [
+        [str(report), report_topic(Path(report))] for report in paths
+    ]
+
+    temp = path.with_suffix(".tmp")
+    with open(temp, 'w') as f:
+        json.dump(runs, f, indent=2)
+    os.replace(temp, path)
+
+
+def generated_reports(topics: List[str], date: str, combined: bool = False,
+                      output_dir: Optional[Path] = None) -> List[str]:
+    """
+    Reports an earlier run_digest call with these arguments wrote.
+
+    A topic with no new repos gets no report, so the reports a run wrote
+    are looked up in the runs file rather than predicted. Each must still
+    exist with the same topic in its header: a single-topic report is
+    always daily/YYYY-MM-DD.md, and another topic's run may have
+    overwritten it since.
+
+    Returns:
+        Paths of the reports, or an empty list if there was no such run or
+        its reports have changed since
+    """
+    runs = _load_runs(Path(output_dir or DAILY_DIR) / RUNS_FILE)
+    if runs.get("date") != date:
+        return []
+    reports = runs.get("runs", {}).get(_run_key(topics, combined), [])
+    if not all(report_topic(Path(report)) == topic for report, topic in reports):
+        return []
+    return [report for report, _ in reports]
+
+
+def generate_report(repos: Iterable[Dict], topic: str, date: str = None,
+                    filename: Optional[str] = None, count: Optional[int] = None,
+                    output_dir: Optional[Path] = None) -> str:
     """
     Generate full markdown report.
 
+    Cards are written to the file as they are generated, so the report is
+    never held in memory as a whole.
+
     Args:
-        repos: List of repositories to include
+        repos: Repositories to include (any iterable when ``count`` is given)
         topic: Topic that was searched
         date: Date string (YYYY-MM-DD), defaults to today
+        filename: Report file name inside daily/, defaults to YYYY-MM-DD.md
+        count: Number of repositories, defaults to len(repos)
+        output_dir: Directory to write to instead of daily/
 
     Returns:
         Path to generated report file
     """
     if date is None:
         date = datetime.now().strftime("%Y-%m-%d")
+    if count is None:
+        count = len(repos)
 
     # Create daily directory if it doesn't exist
-    daily_dir = Path("daily")
-    daily_dir.mkdir(exist_ok=True)
-
-    # Generate report content
-    header = f"""# GitHub AI Digest - {date}
-
-**Topic:** {topic}
-**Repositories Analyzed:** {len(repos)}
-
----
-
-"""
-
-    cards = [generate_repo_card(repo) for repo in repos]
-    content = header + "\n".join(cards)
+    output_dir = Path(output_dir or DAILY_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     # Write to file
-    report_path = daily_dir / f"{date}.md"
-    report_path.write_text(content)
+    report_path = output_dir / (filename or report_filename(date))
+    with metrics.timer("report.write"), open(report_path, 'w') as f:
+        write_report(f, repos, topic, date, count)
+        metrics.count("report.bytes", f.tell())
 
     return str(report_path)
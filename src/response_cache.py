@@ -0,0 +1,164 @@
+"""On-disk cache of GitHub API responses for conditional requests."""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+RESPONSE_CACHE_DIR = Path("cache") / "http"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 50 MB
+
+
+def make_key(url: str, params: Dict) -> str:
+    """
+    Build a cache key for a request.
+
+    The search query is lower-cased and its whitespace collapsed so that
+    equivalent queries share an entry.
+
+    Args:
+        url: Request URL
+        params: Query parameters (including page)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    normalized = {str(k): str(v) for k, v in params.items()}
+    if "q" in normalized:
+        normalized["q"] = " ".join(normalized["q"].lower().split())
+
+    raw = json.dumps([url, sorted(normalized.items())])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Response bodies stored on disk with their ETag/Last-Modified validators.
+
+    The index is kept in least-recently-used order; once the stored bodies
+    exceed ``max_bytes`` the oldest entries are evicted.
+    """
+
+    def __init__(self, directory: Path = RESPONSE_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.index_file = self.directory / "index.json"
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+    def _load_index(self) -> "OrderedDict[str, Dict]":
+        """Load the index from disk, oldest entry first."""
+        if not self.index_file.exists():
+            return OrderedDict()
+
+        try:
+            with open(self.index_file, 'r') as f:
+                return OrderedDict(json.load(f))
+        except (json.JSONDecodeError, IOError):
+            return OrderedDict()
+
+    def _save_index(self):
+        """Write the index using atomic write."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_file = self.index_file.with_suffix('.tmp')
+        with open(temp_file, 'w') as f:
+            json.dump(self._index, f)
+
+        temp_file.replace(self.index_file)
+
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def validators(self, key: str) -> Dict[str, str]:
+        """
+        Get conditional request headers for a cached response.
+
+        Returns:
+            If-None-Match / If-Modified-Since headers, empty if not cached
+        """
+        with self._lock:
+            entry = self._index.get(key)
+
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load(self, key: str) -> Optional[bytes]:
+        """
+        Read a cached response body and mark it as recently used.
+
+        Returns:
+            Body bytes, or None if the entry is missing
+        """
+        with self._lock:
+            if key not in self._index:
+                return None
+
+            try:
+                body = self._body_path(key).read_bytes()
+            except IOError:
+                del self._index[key]
+                self._save_index()
+                return None
+
+            self._index.move_to_end(key)
+            self._save_index()
+            return body
+
+    def store(self, key: str, body: bytes, etag: Optional[str] = None,
+              last_modified: Optional[str] = None):
+        """
+        Store a response body, evicting old entries if over the size cap.
+
+        Responses without a validator can't be revalidated and are skipped.
+
+        Args:
+            key: Cache key from make_key
+            body: Raw response body
+            etag: ETag response header
+            last_modified: Last-Modified response header
+        """
+        if not etag and not last_modified:
+            return
+
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._body_path(key).write_bytes(body)
+
+            self._index.pop(key, None)
+            self._index[key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "size": len(body)
+            }
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        """Drop least recently used entries until under the size cap."""
+        total = sum(entry["size"] for entry in self._index.values())
+
+        while total > self.max_bytes and self._index:
+            key, entry = self._index.popitem(last=False)
+            total -= entry["size"]
+            try:
+                self._body_path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def size(self) -> int:
+        """Total size in bytes of the stored bodies."""
+        with self._lock:
+            return sum(entry["size"] for entry in self._index.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
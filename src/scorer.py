@@ -1,22 +1,52 @@
 """Score repositories based on multiple metrics."""
-from datetime import datetime, timezone
-from typing import List, Dict, Optional
+import functools
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
 
+from src import metrics
+from src.matcher import KeywordMatcher, repo_text
+from src.repo import EPOCH, Repo
 
-def calculate_recency_score(updated_at: str, max_days: int = 365) -> float:
+# NumPy is optional (score_repos falls back to pure Python) and imported on
+# first use: loading it takes longer than the rest of the CLI's startup
+_NOT_LOADED = object()
+np = _NOT_LOADED
+
+
+MICROSECONDS_PER_DAY = 86_400 * 1_000_000
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def _numpy():
+    """NumPy, imported on first call, or None if it isn't installed."""
+    global np
+    if np is _NOT_LOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+def calculate_recency_score(updated_at: str, max_days: int = 365,
+                            now: Optional[datetime] = None) -> float:
     """
     Calculate recency score based on last update time.
 
     Args:
         updated_at: ISO format date string
         max_days: Maximum days to consider (older = 0 score)
+        now: Current time (UTC), defaults to now
 
     Returns:
         Recency score between 0 and 1
     """
     try:
         updated = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-        now = datetime.now(timezone.utc)
+        if now is None:
+            now = datetime.now(timezone.utc)
         days_old = (now - updated).days
 
         if days_old >= max_days:
@@ -27,18 +57,23 @@ def calculate_recency_score(updated_at: str, max_days: int = 365) -> float:
         return 0.0
 
 
-def calculate_keyword_match(repo: Dict, topic: str) -> float:
+def calculate_keyword_match(repo: Dict, topic: str,
+                            matcher: Optional[KeywordMatcher] = None) -> float:
     """
     Calculate keyword match score.
 
     Args:
         repo: Repository dictionary
         topic: Search topic/keyword
+        matcher: Optional precompiled matcher that includes the topic
 
     Returns:
         Keyword match score (0 or 1)
     """
     topic_lower = topic.lower()
+    if matcher is not None:
+        return 1.0 if topic_lower in matcher.matches(repo) else 0.0
+
     description = repo.get("description", "").lower()
     name = repo.get("name", "").lower()
     topics = [t.lower() for t in repo.get("topics", [])]
@@ -49,13 +84,15 @@ def calculate_keyword_match(repo: Dict, topic: str) -> float:
     return 0.0
 
 
-def calculate_preference_boost(repo: Dict, preferences: Optional[Dict]) -> float:
+def calculate_preference_boost(repo: Dict, preferences: Optional[Dict],
+                               matcher: Optional[KeywordMatcher] = None) -> float:
     """
     Calculate preference boost for repositories matching preferred topics.
 
     Args:
         repo: Repository dictionary
         preferences: User preferences with preferred_topics and boost multiplier
+        matcher: Optional precompiled matcher that includes the preferred topics
 
     Returns:
         Boost multiplier (1.0 if no match, multiplier if match)
@@ -69,6 +106,12 @@ def calculate_preference_boost(repo: Dict, preferences: Optional[Dict]) -> float
     if not preferred_topics:
         return 1.0
 
+    if matcher is not None:
+        matched = matcher.matches(repo)
+        if any(pref_topic.lower() in matched for pref_topic in preferred_topics):
+            return boost_multiplier
+        return 1.0
+
     # Check if any repo topic matches preferred topics
     repo_topics = [t.lower() for t in repo.get("topics", [])]
     repo_name = repo.get("name", "").lower()
@@ -84,7 +127,72 @@ def calculate_preference_boost(repo: Dict, preferences: Optional[Dict]) -> float
     return 1.0
 
 
-def score_repo(repo: Dict, topic: str, preferences: Optional[Dict] = None) -> float:
+class ScoringContext:
+    """
+    State shared by every repo scored in one run.
+
+    Holds a single "now" for the recency score and a KeywordMatcher
+    compiled once from the preferred topics. Each repo's name, description
+    and topics are lower-cased once and shared by the keyword match and
+    the preference boost; Repo records carry them already lower-cased, along
+    with their update time in epoch seconds.
+    """
+
+    def __init__(self, topic: str, preferences: Optional[Dict] = None,
+                 now: Optional[datetime] = None):
+        self.topic = topic.lower()
+        self.now = now or datetime.now(timezone.utc)
+
+        preferred_topics = preferences.get("preferred_topics", []) if preferences else []
+        self.preferred = {t.lower() for t in preferred_topics}
+        self.boost_multiplier = preferences.get("topic_boost_multiplier", 1.5) if preferences else 1.0
+        self.matcher = KeywordMatcher(self.preferred)
+
+        # None for a naive "now", which only the string path handles
+        self.now_us = (self.now - EPOCH) // _ONE_MICROSECOND if self.now.tzinfo else None
+
+    def keyword_and_boost(self, repo: Dict) -> Tuple[float, float]:
+        """
+        Calculate the keyword match and preference boost of a repo.
+
+        Returns:
+            Tuple of (keyword match score, boost multiplier), the same values
+            as calculate_keyword_match and calculate_preference_boost
+        """
+        text = repo_text(repo)
+        if isinstance(repo, Repo):
+            topics = repo.topics_lower
+        else:
+            topics = [t.lower() for t in repo.get("topics", [])]
+
+        keyword = 1.0 if self.topic in text or self.topic in topics else 0.0
+
+        boost = 1.0
+        if self.preferred and (not self.preferred.isdisjoint(topics) or self.matcher.search_text(text)):
+            boost = self.boost_multiplier
+
+        return keyword, boost
+
+    def recency(self, repo: Dict, max_days: int = 365) -> float:
+        """
+        Calculate the recency score of a repo, as calculate_recency_score.
+
+        Repo records skip parsing the timestamp string.
+        """
+        updated_ts = repo.updated_ts if isinstance(repo, Repo) else None
+        if updated_ts is None or self.now_us is None:
+            return calculate_recency_score(repo.get("updated_at", ""), max_days, now=self.now)
+
+        # Same floor division as timedelta.days
+        days_old = (self.now_us - updated_ts * 1_000_000) // MICROSECONDS_PER_DAY
+        if days_old >= max_days:
+            return 0.0
+
+        return 1.0 - (days_old / max_days)
+
+
+def score_repo(repo: Dict, topic: str, preferences: Optional[Dict] = None,
+               now: Optional[datetime] = None, context: Optional[ScoringContext] = None) -> float:
     """
     Calculate overall score for a repository.
 
@@ -96,30 +204,115 @@ def score_repo(repo: Dict, topic: str, preferences: Optional[Dict] = None) -> fl
         repo: Repository dictionary
         topic: Search topic for keyword matching
         preferences: Optional user preferences for boosting
+        now: Current time (UTC) for the recency score, defaults to now
+        context: Optional per-run scoring state; when given, its ``now`` and
+            matcher are used
 
     Returns:
         Overall score
     """
+    if context is not None:
+        keyword, boost = context.keyword_and_boost(repo)
+        recency = context.recency(repo)
+    else:
+        keyword = calculate_keyword_match(repo, topic)
+        boost = calculate_preference_boost(repo, preferences)
+        recency = calculate_recency_score(repo.get("updated_at", ""), now=now)
+
     stars = repo.get("stars", 0)
     forks = repo.get("forks", 0)
-    updated_at = repo.get("updated_at", "")
 
     # Normalize stars and forks to a reasonable scale
     stars_score = min(stars / 10000, 1.0) * 10000
     forks_score = min(forks / 1000, 1.0) * 1000
 
-    recency_score = calculate_recency_score(updated_at) * 1000
-    keyword_score = calculate_keyword_match(repo, topic) * 1000
+    recency_score = recency * 1000
+    keyword_score = keyword * 1000
 
     base_score = (stars_score * 0.4) + (forks_score * 0.3) + (recency_score * 0.2) + (keyword_score * 0.1)
 
     # Apply preference boost
-    boost = calculate_preference_boost(repo, preferences)
     final_score = base_score * boost
 
     return final_score
 
 
+def _days_old(timestamps: List[str], now: datetime):
+    """
+    Whole days since each timestamp, as a NumPy array.
+
+    Only GitHub's canonical ``YYYY-MM-DDTHH:MM:SSZ`` format is parsed here;
+    returns None if any timestamp needs the slower, more lenient path.
+    """
+    for ts in timestamps:
+        if not (isinstance(ts, str) and len(ts) == 20 and ts[10] == "T" and ts[19] == "Z"):
+            return None
+
+    try:
+        seconds = np.array([ts[:19] for ts in timestamps], dtype="datetime64[s]").astype(np.int64)
+    except ValueError:
+        return None
+
+    now_us = (now - EPOCH) // _ONE_MICROSECOND
+    # Same floor division as timedelta.days
+    return (now_us - seconds * 1_000_000) // MICROSECONDS_PER_DAY
+
+
+def score_repos(repos: List[Dict], topic: str, preferences: Optional[Dict] = None,
+                now: Optional[datetime] = None) -> List[float]:
+    """
+    Score many repositories at once.
+
+    Stars, forks and update times are pulled into NumPy arrays and the
+    normalized components are computed as array operations against one
+    shared "now", and preferred topics are found with one compiled matcher. The
+    result is identical to calling score_repo on each repo with the same
+    ``now``. Without NumPy, score_repo is applied in a loop.
+
+    Args:
+        repos: List of repository dictionaries
+        topic: Search topic for keyword matching
+        preferences: Optional user preferences for boosting
+        now: Current time (UTC), defaults to now
+
+    Returns:
+        Scores in the same order as ``repos``
+    """
+    context = ScoringContext(topic, preferences, now)
+    now = context.now
+
+    if _numpy() is None or not repos:
+        return [score_repo(repo, topic, preferences, context=context) for repo in repos]
+
+    max_days = 365
+    # Repo records already hold their update time in epoch seconds
+    epoch_seconds = [repo.updated_ts if isinstance(repo, Repo) else None for repo in repos]
+    if context.now_us is not None and None not in epoch_seconds:
+        seconds = np.array(epoch_seconds, dtype=np.int64)
+        days_old = (context.now_us - seconds * 1_000_000) // MICROSECONDS_PER_DAY
+    else:
+        timestamps = [repo.get("updated_at", "") for repo in repos]
+        days_old = _days_old(timestamps, now)
+    if days_old is None:
+        recency = np.array([calculate_recency_score(ts, max_days, now=now) for ts in timestamps])
+    else:
+        recency = np.where(days_old >= max_days, 0.0, 1.0 - (days_old / max_days))
+
+    stars = np.array([repo.get("stars", 0) for repo in repos], dtype=np.float64)
+    forks = np.array([repo.get("forks", 0) for repo in repos], dtype=np.float64)
+    keyword, boost = np.array([context.keyword_and_boost(repo) for repo in repos]).T
+
+    # Same operations, in the same order, as score_repo
+    stars_score = np.minimum(stars / 10000, 1.0) * 10000
+    forks_score = np.minimum(forks / 1000, 1.0) * 1000
+    recency_score = recency * 1000
+    keyword_score = keyword * 1000
+
+    base_score = (stars_score * 0.4) + (forks_score * 0.3) + (recency_score * 0.2) + (keyword_score * 0.1)
+
+    return (base_score * boost).tolist()
+
+
 def rank_repos(repos: List[Dict], topic: str, preferences: Optional[Dict] = None) -> List[Dict]:
     """
     Score and rank repositories.
@@ -132,7 +325,60 @@ def rank_repos(repos: List[Dict], topic: str, preferences: Optional[Dict] = None
     Returns:
         Sorted list of repos with scores
     """
-    for repo in repos:
-        repo["score"] = score_repo(repo, topic, preferences)
+    for repo, score in zip(repos, score_repos(repos, topic, preferences)):
+        repo["score"] = score
 
     return sorted(repos, key=lambda x: x["score"], reverse=True)
+
+
+def top_k_repos(repos: Iterable[Dict], k: int, topic: str, preferences: Optional[Dict] = None,
+                now: Optional[datetime] = None,
+                score: Optional[Callable[[Dict], float]] = None) -> List[Dict]:
+    """
+    Select the k highest scoring repositories.
+
+    Repos are scored one at a time as they are pulled from ``repos`` and
+    only the best k are kept in a bounded heap, so a streamed candidate
+    source never has more than k scored entries in memory. Ties keep the
+    input order, giving the same result as ``rank_repos(repos, ...)[:k]``.
+    The input dicts are left untouched; the result holds copies with a
+    ``score`` key.
+
+    Args:
+        repos: Iterable of repository dictionaries
+        k: Number of repos to keep
+        topic: Search topic for scoring
+        preferences: Optional user preferences for boosting
+        now: Current time (UTC), defaults to now
+        score: Optional scoring function used instead of score_repo, e.g.
+            from trends.trending_scorer
+
+    Returns:
+        Up to k repos with scores, best first
+    """
+    if k <= 0:
+        return []
+
+    if score is None:
+        context = ScoringContext(topic, preferences, now)
+        score = functools.partial(score_repo, topic=topic, preferences=preferences, context=context)
+    # Timed per repo, since the input may be a stream that fetches as it goes
+    score = metrics.timed(score, "score")
+
+    # Min-heap of (score, -index, repo): the root is the worst entry kept,
+    # and for equal scores the later repo is the worse one
+    heap = []
+    for index, repo in enumerate(repos):
+        entry = (score(repo), -index, repo)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    result = []
+    for value, _, repo in sorted(heap, reverse=True):
+        scored = repo.copy()
+        scored["score"] = value
+        result.append(scored)
+
+    return result
@@ -0,0 +1,163 @@
+"""Fetch every repo matching a topic by splitting the search into shards.
+
+The search API returns at most 1,000 results per query. A sharded fetch
+narrows the topic query with disjoint ``stars:`` or ``created:`` ranges,
+splits any shard that still matches more than 1,000 repos, and fetches
+every page of every shard in parallel.
+"""
+import math
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from src import metrics
+from src.github_fetcher import DEFAULT_MAX_WORKERS, MAX_PER_PAGE, MAX_RESULTS, search_page
+
+
+SHARD_MODES = ("stars", "created")
+MIN_STARS = 51  # Same floor as build_query's stars:>50
+FIRST_CREATED = date(2008, 1, 1)  # No GitHub repo is older
+
+
+class Shard:
+    """
+    One slice of a topic search: a star range and an optional creation date range.
+
+    Args:
+        stars: Inclusive (low, high) star counts; high None for no upper bound
+        created: Inclusive (first, last) creation dates, or None for any
+    """
+
+    __slots__ = ("stars", "created")
+
+    def __init__(self, stars: Tuple[int, Optional[int]] = (MIN_STARS, None),
+                 created: Optional[Tuple[date, date]] = None):
+        self.stars = stars
+        self.created = created
+
+    def query(self, topic: str, qualifiers: str = "") -> str:
+        """Search query for this shard, with any extra qualifiers appended."""
+        low, high = self.stars
+        parts = [topic, f"stars:{low}..{high}" if high is not None else f"stars:>={low}"]
+        if self.created is not None:
+            parts.append(f"created:{self.created[0].isoformat()}..{self.created[1].isoformat()}")
+        if qualifiers:
+            parts.append(qualifiers)
+        return " ".join(parts)
+
+    def split_stars(self, top: Optional[int]) -> Optional[Tuple["Shard", "Shard"]]:
+        """
+        Halve the star range on a log scale.
+
+        Args:
+            top: Most stars seen in this shard, used as the upper bound of
+                an open range
+
+        Returns:
+            Two shards covering this one, or None for a single star count
+        """
+        low, high = self.stars
+        upper = high if high is not None else top
+        if upper is None or upper <= low:
+            return None
+        middle = max(low, min(int(math.sqrt(low * upper)), upper - 1))
+        return (Shard((low, middle), self.created), Shard((middle + 1, high), self.created))
+
+    def split_created(self, today: date) -> Optional[Tuple["Shard", "Shard"]]:
+        """Halve the creation date range, or return None for a single day."""
+        first, last = self.created or (FIRST_CREATED, today)
+        if last <= first:
+            return None
+        middle = first + timedelta(days=(last - first).days // 2)
+        return (Shard(self.stars, (first, middle)), Shard(self.stars, (middle + timedelta(days=1), last)))
+
+    def split(self, by: str, top: Optional[int], today: date) -> Optional[Tuple["Shard", "Shard"]]:
+        """Split along ``by``, falling back to the other dimension once it can't be split."""
+        if by == "stars":
+            return self.split_stars(top) or self.split_created(today)
+        return self.split_created(today) or self.split_stars(top)
+
+
+def fetch_sharded(topic: str, by: Optional[str] = "stars", max_workers: int = DEFAULT_MAX_WORKERS,
+                  today: Optional[date] = None, qualifiers: str = "",
+                  strict: bool = False) -> List[Dict]:
+    """
+    Fetch every repo matching a topic, past the 1,000-result cap.
+
+    Each shard's first page tells how many repos it matches. Shards over
+    the cap are split in two and probed again; the rest have their
+    remaining pages fetched. Probes and pages all share one pool of
+    ``max_workers`` threads (and the fetcher's rate limiter). A shard that
+    can't be split any further only yields its first 1,000 repos.
+
+    Args:
+        topic: Search topic/keyword
+        by: "stars" or "created", the range to split shards on first; None
+            to never split (all pages of one query, up to 1,000 repos)
+        max_workers: Maximum number of requests in flight
+        today: Last creation date to search, defaults to today (UTC)
+        qualifiers: Extra search qualifiers for every shard, e.g. ``pushed:>...``
+        strict: Raise the first failed request (after cancelling the rest)
+            instead of printing it and returning what was fetched
+
+    Returns:
+        Repository dictionaries, de-duplicated by full name and sorted by
+        stars, highest first
+
+    Raises:
+        requests.RequestException: If ``strict`` and a request failed
+    """
+    if by is not None and by not in SHARD_MODES:
+        raise ValueError(f"Unknown shard mode: {by}")
+    today = today or datetime.now(timezone.utc).date()
+
+    repos: Dict[str, Dict] = {}
+    shards = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        def submit(shard: Shard, page: int):
+            return pool.submit(search_page, shard.query(topic, qualifiers), page, MAX_PER_PAGE)
+
+        root = Shard()
+        pending = {submit(root, 1): (root, 1)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard, page = pending.pop(future)
+                try:
+                    total, page_repos = future.result()
+                except requests.RequestException as e:
+                    if strict:
+                        for other in pending:
+                            other.cancel()
+                        raise
+                    print(f"Error fetching {shard.query(topic, qualifiers)!r} page {page}: {e}")
+                    continue
+
+                for repo in page_repos:
+                    # Stars can change between pages; keep the first copy
+                    repos.setdefault(repo["full_name"], repo)
+                if page > 1:
+                    continue
+
+                if total > MAX_RESULTS:
+                    top = page_repos[0]["stars"] if page_repos else None
+                    halves = shard.split(by, top, today) if by is not None else None
+                    if halves is not None:
+                        metrics.count("shards.split")
+                        for half in halves:
+                            pending[submit(half, 1)] = (half, 1)
+                        continue
+                    metrics.count("shards.capped")
+                    print(f"Shard {shard.query(topic, qualifiers)!r} matches {total} repos; "
+                          f"only the first {MAX_RESULTS} can be fetched")
+
+                shards += 1
+                last_page = min(math.ceil(total / MAX_PER_PAGE), MAX_RESULTS // MAX_PER_PAGE)
+                for next_page in range(2, last_page + 1):
+                    pending[submit(shard, next_page)] = (shard, next_page)
+
+    metrics.count("shards.fetched", shards)
+    print(f"Fetched {len(repos)} repositories for {topic!r} in {shards} shards")
+    return sorted(repos.values(), key=lambda repo: repo["stars"], reverse=True)
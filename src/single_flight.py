@@ -0,0 +1,116 @@
+"""Share one in-flight call, and its result for a while, among identical requests."""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Tuple
+
+from src import metrics
+
+
+DEFAULT_TTL = 30.0  # seconds
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one.
+
+    The first caller for a key (the leader) runs the call; everyone asking
+    for the key meanwhile waits on the same future instead of repeating
+    it. A successful result is then served from memory for ``ttl``
+    seconds. Failures are passed to every waiting caller and not kept.
+
+    Threads use ``call``. Asyncio code uses ``claim`` and ``resolve``
+    directly, running the leader's call on an executor and awaiting the
+    future with ``asyncio.wrap_future``.
+
+    Args:
+        ttl: Seconds a result is reused; 0 to only share in-flight calls
+        max_entries: Results kept at most, the oldest are dropped first
+        clock: Time source, for tests
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._results: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of results kept."""
+        return len(self._results)
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        Get the future for a key's result.
+
+        Returns:
+            Tuple of (future, whether the caller is the leader and must
+            ``resolve`` it); the future is already done for a cached result
+        """
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None:
+                if self._clock() < entry[0]:
+                    metrics.count("coalesce.cached")
+                    future = Future()
+                    future.set_result(entry[1])
+                    return future, False
+                del self._results[key]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                metrics.count("coalesce.shared")
+                return future, False
+
+            future = Future()
+            future.set_running_or_notify_cancel()  # Waiters can't cancel it for everyone
+            self._in_flight[key] = future
+            return future, True
+
+    def resolve(self, key: Hashable, future: Future, fn: Callable[[], object]):
+        """
+        Run a claimed call and hand its result or exception to every waiter.
+
+        Never raises; read the outcome from the future.
+        """
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            del self._in_flight[key]
+            if self.ttl > 0:
+                self._results[key] = (self._clock() + self.ttl, result)
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+        future.set_result(result)
+
+    def call(self, key: Hashable, fn: Callable[[], object]):
+        """
+        Run ``fn`` unless an identical call is running or recently finished.
+
+        Returns:
+            The result of ``fn``, possibly from another caller's call
+
+        Raises:
+            Whatever ``fn`` raised for the leader
+        """
+        future, leader = self.claim(key)
+        if leader:
+            self.resolve(key, future, fn)
+        return future.result()
+
+    def clear(self):
+        """Forget every kept result; calls in flight still finish."""
+        with self._lock:
+            self._results.clear()
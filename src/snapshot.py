@@ -0,0 +1,429 @@
+"""Append-only columnar archive of fetched repositories, one file per day."""
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src import metrics
+from src.repo import CANONICAL_FORMAT, Repo, is_canonical
+
+try:
+    import fcntl
+except ImportError:  # Windows; appends go unlocked and nothing is truncated
+    fcntl = None
+
+
+SNAPSHOT_DIR = Path("snapshots")
+SNAPSHOT_SUFFIX = ".snap"
+SNAPSHOT_BLOCK = 1000  # Repos buffered per appended block
+
+MAGIC = b"GHSB"
+VERSION = 1
+
+# magic, version, string fields per repo, repo count, string count, string bytes
+HEADER = struct.Struct("<4sHHIIQ")
+
+INT_COLUMNS = ("stars", "forks", "updated_ts")
+STRING_FIELDS = ("full_name", "name", "description", "url", "language", "topics",
+                 "updated_at", "topic")
+
+NO_TIMESTAMP = -(2 ** 63)  # updated_ts of a repo whose timestamp isn't exact
+TOPIC_SEPARATOR = ","  # GitHub topics can't contain commas
+
+# Files are little-endian; the typed arrays are only used in place on
+# little-endian hosts
+_NATIVE = sys.byteorder == "little"
+
+
+def _padded(size: int) -> int:
+    """Round a byte count up to the next multiple of 8."""
+    return (size + 7) & ~7
+
+
+def _typed(values: Iterable[int], typecode: str) -> bytes:
+    """Pack integers as a little-endian array, padded to 8 bytes."""
+    packed = array(typecode, values)
+    if not _NATIVE:
+        packed.byteswap()
+    data = packed.tobytes()
+    return data + b"\0" * (_padded(len(data)) - len(data))
+
+
+def _block_size(fields: int, count: int, strings: int, blob_len: int) -> int:
+    """Bytes in a block with these header values, header included."""
+    return (HEADER.size + len(INT_COLUMNS) * _padded(count * 8) + _padded(count * fields * 4)
+            + _padded((strings + 1) * 4) + _padded(blob_len))
+
+
+def complete_length(path: Path) -> int:
+    """
+    Bytes taken up by the complete blocks at the start of a snapshot file.
+
+    Reads only the block headers. Anything after this is an incomplete
+    block, e.g. from an append that was interrupted.
+    """
+    size = os.path.getsize(path)
+    offset = 0
+    with open(path, 'rb') as f:
+        while offset + HEADER.size <= size:
+            f.seek(offset)
+            magic, version, fields, count, strings, blob_len = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION or fields != len(STRING_FIELDS):
+                break
+            end = offset + _block_size(fields, count, strings, blob_len)
+            if end > size:
+                break
+            offset = end
+    return offset
+
+
+def snapshot_path(date: str, directory: Path = SNAPSHOT_DIR) -> Path:
+    """Path of the snapshot file for a date (YYYY-MM-DD)."""
+    return Path(directory) / f"{date}{SNAPSHOT_SUFFIX}"
+
+
+def encode_block(repos: List[Repo], topics: List[str]) -> bytes:
+    """
+    Encode repositories as one self-describing block.
+
+    After the header come the int64 columns (stars, forks, updated_ts), then
+    for every repo the uint32 index of each of its string fields in the
+    block's string table, then the table itself as uint32 offsets into a
+    UTF-8 blob. Identical strings, such as languages and topics, are stored
+    once per block. Every section starts on an 8-byte boundary.
+
+    Args:
+        repos: Repositories to encode
+        topics: Topic each repo was fetched for, in the same order
+
+    Returns:
+        Encoded block
+    """
+    string_ids = {}
+    blob = bytearray()
+    offsets = [0]
+    ids = []
+
+    for repo, topic in zip(repos, topics):
+        updated_at = repo.get("updated_at", "")
+        values = (
+            repo.get("full_name", ""),
+            repo.get("name", ""),
+            repo.get("description", ""),
+            repo.get("url", ""),
+            repo.get("language", ""),
+            TOPIC_SEPARATOR.join(repo.get("topics", [])),
+            # Rebuilt from updated_ts on load when that's exact
+            "" if is_canonical(updated_at, repo.updated_ts) else updated_at,
+            topic,
+        )
+        for value in values:
+            index = string_ids.get(value)
+            if index is None:
+                index = string_ids[value] = len(offsets) - 1
+                blob += value.encode("utf-8")
+                offsets.append(len(blob))
+            ids.append(index)
+
+    def timestamp(repo: Repo) -> int:
+        return NO_TIMESTAMP if repo.updated_ts is None else repo.updated_ts
+
+    header = HEADER.pack(MAGIC, VERSION, len(STRING_FIELDS), len(repos),
+                         len(offsets) - 1, len(blob))
+    return b"".join([
+        header,
+        _typed((repo.get("stars", 0) for repo in repos), "q"),
+        _typed((repo.get("forks", 0) for repo in repos), "q"),
+        _typed((timestamp(repo) for repo in repos), "q"),
+        _typed(ids, "I"),
+        _typed(offsets, "I"),
+        bytes(blob) + b"\0" * (_padded(len(blob)) - len(blob)),
+    ])
+
+
+class SnapshotWriter:
+    """
+    Append repositories to a day's snapshot file.
+
+    Repos are buffered and appended as a block every ``block_size`` repos
+    and on close. Each block is written with a single append under an
+    exclusive lock on the file, so several runs on the same day, in one
+    process or several, just add blocks to the same file. Before the first
+    append, an incomplete block left at the end of the file by an
+    interrupted run is cut off; otherwise readers would stop at it and
+    never see the blocks appended after it. That is done under the same
+    lock, so it can't cut off another writer's append, and only where
+    file locks are available.
+    """
+
+    def __init__(self, path: Path, block_size: int = SNAPSHOT_BLOCK):
+        self.path = Path(path)
+        self.block_size = block_size
+        self.written = 0
+        self._repos = []
+        self._topics = []
+        self._repaired = False
+
+    def _truncate_incomplete(self, f):
+        """Cut the file, open and locked as ``f``, back to its last complete block."""
+        size = os.fstat(f.fileno()).st_size
+        complete = complete_length(self.path)
+        if complete < size:
+            f.truncate(complete)
+            print(f"Dropped {size - complete} bytes of an incomplete block from {self.path}")
+
+    def add(self, repo: Dict, topic: str = ""):
+        """Buffer a repository fetched for a topic."""
+        if not isinstance(repo, Repo):
+            repo = Repo.from_dict(repo)
+        self._repos.append(repo)
+        self._topics.append(topic)
+        if len(self._repos) >= self.block_size:
+            self.flush()
+
+    def record(self, repos: Iterable[Dict], topic: str = "") -> Iterator[Dict]:
+        """Pass repositories through unchanged, adding each to the snapshot."""
+        for repo in repos:
+            self.add(repo, topic)
+            yield repo
+
+    def flush(self):
+        """Append the buffered repositories as one block."""
+        if not self._repos:
+            return
+
+        with metrics.timer("snapshot.write"):
+            block = encode_block(self._repos, self._topics)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'ab') as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # Released when the file closes
+                    if not self._repaired:
+                        self._truncate_incomplete(f)
+                self._repaired = True
+                f.write(block)
+        metrics.count("snapshot.bytes", len(block))
+
+        self.written += len(self._repos)
+        self._repos = []
+        self._topics = []
+
+    def close(self):
+        """Append anything still buffered."""
+        self.flush()
+
+
+class SnapshotBlock:
+    """
+    One block of a memory-mapped snapshot.
+
+    The integer columns are memoryviews straight into the mapped file and
+    strings are only decoded when asked for.
+    """
+
+    def __init__(self, buffer: memoryview, offset: int):
+        magic, version, fields, count, strings, blob_len = HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC or version != VERSION or fields != len(STRING_FIELDS):
+            raise ValueError(f"Not a snapshot block at offset {offset}")
+
+        self.count = count
+        self._views = []
+        try:
+            self.end = self._map_sections(buffer, offset + HEADER.size, fields, strings, blob_len)
+        except ValueError:
+            self.release()
+            raise
+
+    def _map_sections(self, buffer: memoryview, position: int, fields: int,
+                      strings: int, blob_len: int) -> int:
+        """Set up the column and string table views; returns the block's end."""
+        count = self.count
+        columns = {}
+        for name in INT_COLUMNS:
+            columns[name] = self._view(buffer, position, count, "q")
+            position += _padded(count * 8)
+        self.stars = columns["stars"]
+        self.forks = columns["forks"]
+        self.updated_ts = columns["updated_ts"]
+
+        self._ids = self._view(buffer, position, count * fields, "I")
+        position += _padded(count * fields * 4)
+        self._offsets = self._view(buffer, position, strings + 1, "I")
+        position += _padded((strings + 1) * 4)
+        self._blob = buffer[position:position + blob_len]
+        self._views.append(self._blob)
+
+        end = position + _padded(blob_len)
+        if end > len(buffer):
+            raise ValueError(f"Truncated snapshot block ending at {end}")
+        return end
+
+    def _view(self, buffer: memoryview, position: int, count: int, typecode: str):
+        """Typed view of part of the buffer (a copy on big-endian hosts)."""
+        size = array(typecode).itemsize
+        raw = buffer[position:position + count * size]
+        if len(raw) != count * size:
+            raise ValueError(f"Truncated snapshot block at offset {position}")
+
+        if not _NATIVE:
+            values = array(typecode, raw.tobytes())
+            values.byteswap()
+            raw.release()
+            return values
+
+        view = raw.cast(typecode)
+        self._views.extend([view, raw])
+        return view
+
+    def string(self, field: str, index: int) -> str:
+        """Decode one string field of the repo at ``index``."""
+        string_id = self._ids[index * len(STRING_FIELDS) + STRING_FIELDS.index(field)]
+        start, end = self._offsets[string_id], self._offsets[string_id + 1]
+        return str(self._blob[start:end], "utf-8")
+
+    def strings(self, field: str) -> List[str]:
+        """Decode one string field for every repo in the block."""
+        return [self.string(field, index) for index in range(self.count)]
+
+    def repo(self, index: int) -> Repo:
+        """Rebuild the repo at ``index`` as a Repo record."""
+        topics = self.string("topics", index)
+        updated_at = self.string("updated_at", index)
+        updated_ts = self.updated_ts[index]
+        if not updated_at and updated_ts != NO_TIMESTAMP:
+            updated_at = time.strftime(CANONICAL_FORMAT, time.gmtime(updated_ts))
+
+        return Repo(
+            name=self.string("name", index),
+            full_name=self.string("full_name", index),
+            description=self.string("description", index),
+            url=self.string("url", index),
+            stars=self.stars[index],
+            forks=self.forks[index],
+            language=self.string("language", index),
+            updated_at=updated_at,
+            topics=topics.split(TOPIC_SEPARATOR) if topics else [],
+        )
+
+    def release(self):
+        """Drop the views into the mapped file."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+
+
+class Snapshot:
+    """
+    A day's snapshot file, memory-mapped for reading.
+
+    Opening only walks the block headers; column data is read from the
+    mapping on access. A truncated block at the end of the file (from an
+    interrupted append) is ignored. The same repo can appear in several
+    blocks when there were several runs that day.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.date = self.path.name[:-len(SNAPSHOT_SUFFIX)]
+        self.blocks = []
+        self._map = None
+        self._buffer = None
+
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._buffer = memoryview(self._map)
+
+        offset = 0
+        while offset + HEADER.size <= size:
+            try:
+                block = SnapshotBlock(self._buffer, offset)
+            except ValueError:
+                break
+            self.blocks.append(block)
+            offset = block.end
+
+    def __len__(self) -> int:
+        return sum(block.count for block in self.blocks)
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def column(self, name: str) -> array:
+        """
+        One integer column (stars, forks or updated_ts) across all blocks.
+
+        Returns:
+            array('q'), usable directly with numpy.asarray
+        """
+        values = array("q")
+        for block in self.blocks:
+            with memoryview(getattr(block, name)).cast("B") as raw:
+                values.frombytes(raw)
+        return values
+
+    def strings(self, field: str) -> List[str]:
+        """One string field across all blocks."""
+        values = []
+        for block in self.blocks:
+            values.extend(block.strings(field))
+        return values
+
+    def repos(self) -> Iterator[Repo]:
+        """Yield every archived repository as a Repo record."""
+        for block in self.blocks:
+            for index in range(block.count):
+                yield block.repo(index)
+
+    def close(self):
+        """Release the mapping."""
+        for block in self.blocks:
+            block.release()
+        self.blocks = []
+        if self._buffer is not None:
+            self._buffer.release()
+            self._map.close()
+            self._buffer = None
+
+
+def list_snapshots(directory: Path = SNAPSHOT_DIR, since: Optional[str] = None,
+                   until: Optional[str] = None) -> List[Path]:
+    """
+    Snapshot files in a directory, oldest first.
+
+    Args:
+        directory: Snapshot directory
+        since: Earliest date to include (YYYY-MM-DD)
+        until: Latest date to include (YYYY-MM-DD)
+
+    Returns:
+        Paths of the matching snapshot files
+    """
+    paths = []
+    for path in Path(directory).glob(f"*{SNAPSHOT_SUFFIX}"):
+        date = path.name[:-len(SNAPSHOT_SUFFIX)]
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            continue
+        if (since and date < since) or (until and date > until):
+            continue
+        paths.append(path)
+    return sorted(paths)
+
+
+def open_snapshots(directory: Path = SNAPSHOT_DIR, since: Optional[str] = None,
+                   until: Optional[str] = None) -> List[Snapshot]:
+    """Memory-map every snapshot in a date range, oldest first."""
+    return [Snapshot(path) for path in list_snapshots(directory, since, until)]
@@ -0,0 +1,432 @@
+"""Local stand-in for the GitHub search and GraphQL APIs, for offline tests and benchmarks.
+
+Run it with ``python -m src.stub_server`` and point the fetcher at it with
+``python run.py --api-url http://127.0.0.1:8765``.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+DEFAULT_PORT = 8765
+DEFAULT_REPOS = 1500  # Matching repos per query
+MAX_RESULTS = 1000  # Like GitHub, never page past the first 1000
+MAX_PER_PAGE = 100
+
+LANGUAGES = ["Python", "TypeScript", "Rust", "Go", "C++", "Jupyter Notebook", None]
+WORDS = ["agent", "llm", "rag", "vector", "inference", "toolkit", "framework", "model",
+         "search", "pipeline", "benchmark", "embedding", "serving", "dataset"]
+
+# Fixed so generated corpora don't change between runs
+CORPUS_NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def generate_items(query: str, count: int, seed: int = 0) -> List[Dict]:
+    """
+    Build a deterministic list of search result items for a query.
+
+    Qualifiers such as ``stars:>50`` are ignored: every query with the same
+    search terms gets the same corpus, and ``filter_items`` narrows it
+    down. Items have the fields the fetcher reads from the real API, all
+    have more than 50 stars, and they are sorted by stars, highest first.
+    """
+    terms, _ = parse_query(query)
+    digest = hashlib.sha256(f"{seed}:{' '.join(terms)}".encode("utf-8")).hexdigest()
+    rng = random.Random(int(digest[:16], 16))
+    topic = terms[0] if terms else "repo"
+
+    items = []
+    for i in range(count):
+        words = rng.sample(WORDS, 3)
+        name = f"{topic}-{words[0]}-{i}"
+        owner = f"org{rng.randrange(200)}"
+        updated = CORPUS_NOW - timedelta(seconds=rng.randrange(400 * 86_400))
+        created = updated - timedelta(seconds=rng.randrange(8 * 365 * 86_400))
+        pushed = max(created, updated - timedelta(seconds=rng.randrange(30 * 86_400)))
+        items.append({
+            "name": name,
+            "full_name": f"{owner}/{name}",
+            "description": f"A {words[1]} {words[2]} for {topic}" if rng.random() > 0.05 else None,
+            "html_url": f"https://github.com/{owner}/{name}",
+            "stargazers_count": int(50 * rng.paretovariate(1.2)) + 1,
+            "forks_count": rng.randrange(2000),
+            "language": rng.choice(LANGUAGES),
+            "created_at": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "pushed_at": pushed.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "updated_at": updated.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "topics": [topic] + rng.sample(WORDS, rng.randrange(3)),
+        })
+
+    items.sort(key=lambda item: item["stargazers_count"], reverse=True)
+    return items
+
+
+# Search qualifier -> item field it filters on
+QUALIFIERS = {"stars": "stargazers_count", "created": "created_at", "pushed": "pushed_at"}
+
+
+def _parse_bound(field: str, value: str, upper: bool) -> float:
+    """A qualifier value as a number; a bare date covers the whole day."""
+    if field == "stargazers_count":
+        return int(value)
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    seconds = moment.timestamp()
+    if upper and len(value) == 10:
+        seconds += 86_400 - 1
+    return seconds
+
+
+def parse_range(field: str, value: str) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Parse a qualifier value like ``>50``, ``<=100``, ``10..20`` or ``2024-01-01..*``.
+
+    Returns:
+        Inclusive (low, high) bounds, None where unbounded
+    """
+    if ".." in value:
+        low, high = value.split("..", 1)
+        return (None if low == "*" else _parse_bound(field, low, False),
+                None if high == "*" else _parse_bound(field, high, True))
+    for operator in (">=", "<=", ">", "<"):
+        if value.startswith(operator):
+            bound = value[len(operator):]
+            if operator == ">=":
+                return _parse_bound(field, bound, False), None
+            if operator == "<=":
+                return None, _parse_bound(field, bound, True)
+            step = 1 if field == "stargazers_count" else 1e-6
+            if operator == ">":
+                return _parse_bound(field, bound, True) + step, None
+            return None, _parse_bound(field, bound, False) - step
+    return _parse_bound(field, value, False), _parse_bound(field, value, True)
+
+
+def parse_query(query: str) -> Tuple[List[str], List[Tuple[str, Optional[float], Optional[float]]]]:
+    """
+    Split a search query into its terms and the qualifiers the stub understands.
+
+    Returns:
+        Tuple of (lower-cased terms, [(item field, low, high)]); unknown
+        qualifiers are dropped
+    """
+    terms, filters = [], []
+    for word in query.split():
+        name, _, value = word.partition(":")
+        name = name.lower()
+        if not value:
+            terms.append(word.lower())
+        elif name in QUALIFIERS:
+            filters.append((QUALIFIERS[name], *parse_range(QUALIFIERS[name], value)))
+    return terms, filters
+
+
+def _item_value(item: Dict, field: str) -> float:
+    value = item[field]
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return value
+
+
+def filter_items(items: List[Dict],
+                 filters: List[Tuple[str, Optional[float], Optional[float]]]) -> List[Dict]:
+    """Keep the items matching every (field, low, high) range."""
+    for field, low, high in filters:
+        items = [
+            item for item in items
+            if (low is None or _item_value(item, field) >= low)
+            and (high is None or _item_value(item, field) <= high)
+        ]
+    return items
+
+
+def generate_details(full_name: str, seed: int = 0) -> Optional[Dict]:
+    """
+    Build a deterministic GraphQL repository node for a repo.
+
+    Repos named ``missing-*`` don't exist and get None, like a deleted repo.
+    """
+    if full_name.partition("/")[2].startswith("missing-"):
+        return None
+    digest = hashlib.sha256(f"{seed}:{full_name}".encode("utf-8")).hexdigest()
+    rng = random.Random(int(digest[:16], 16))
+    words = rng.sample(WORDS, 3)
+    released = CORPUS_NOW - timedelta(days=rng.randrange(365))
+    return {
+        "latestRelease": {
+            "tagName": f"v{rng.randrange(4)}.{rng.randrange(20)}.{rng.randrange(10)}",
+            "publishedAt": released.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        } if rng.random() > 0.2 else None,
+        "issues": {"totalCount": rng.randrange(500)},
+        "mentionableUsers": {"totalCount": rng.randrange(1, 300)},
+        "readme": {"text": (
+            f"# {full_name}\n\n[![CI](https://example.com/badge.svg)](https://example.com)\n\n"
+            f"A {words[0]} {words[1]} that makes {words[2]} easy.\n\n"
+            "## Install\n\n```\npip install x\n```\n"
+        )},
+    }
+
+
+# Aliased lookups in the enrichment query, e.g. r0: repository(owner: $owner0, name: $name0)
+_REPOSITORY_LOOKUP = re.compile(r"(\w+):\s*repository\(owner:\s*\$(\w+),\s*name:\s*\$(\w+)\)")
+
+
+class StubState:
+    """
+    Behaviour and bookkeeping shared by all requests to one server.
+
+    Args:
+        repos: Matching repos generated per query
+        latency: Seconds added to every response
+        jitter: Extra random delay of up to this many seconds
+        error_rate: Fraction of requests answered with 502 Bad Gateway
+        rate_limit: Searches allowed per window, 0 for unlimited
+        window: Rate-limit window in seconds
+        seed: Seed for the corpus and for error injection
+    """
+
+    def __init__(self, repos: int = DEFAULT_REPOS, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: int = 0, window: float = 60.0,
+                 seed: int = 0):
+        self.repos = repos
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.window = window
+        self.seed = seed
+
+        self.requests = 0
+        self.not_modified = 0
+        self.graphql_requests = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._corpora = {}
+        self._results = {}
+        self._window_start = time.time()
+        self._used = 0
+
+    def corpus(self, query: str) -> List[Dict]:
+        """Generated items matching a query; one corpus per set of search terms."""
+        terms, filters = parse_query(query)
+        key = " ".join(terms)
+        with self._lock:
+            if key not in self._corpora:
+                self._corpora[key] = generate_items(key, self.repos, self.seed)
+            results_key = (key, tuple(filters))
+            if results_key not in self._results:
+                self._results[results_key] = filter_items(self._corpora[key], filters)
+            return self._results[results_key]
+
+    def admit(self) -> Tuple[bool, Dict[str, str], float]:
+        """
+        Count a request against the rate limit and pick its fate.
+
+        Returns:
+            Tuple of (allowed by the rate limit, rate-limit headers,
+            delay in seconds); failures are decided by ``fail``
+        """
+        with self._lock:
+            self.requests += 1
+            now = time.time()
+            if now - self._window_start >= self.window:
+                self._window_start = now
+                self._used = 0
+
+            limit = self.rate_limit or 1_000_000
+            allowed = self._used < limit
+            if allowed:
+                self._used += 1
+
+            headers = {
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(max(limit - self._used, 0)),
+                "X-RateLimit-Reset": str(int(self._window_start + self.window)),
+                "X-RateLimit-Resource": "search",
+            }
+            delay = self.latency + self._rng.uniform(0, self.jitter) if self.jitter else self.latency
+            return allowed, headers, delay
+
+    def count_graphql(self):
+        """Count a GraphQL request."""
+        with self._lock:
+            self.graphql_requests += 1
+
+    def count_not_modified(self):
+        """Count a request answered with 304 Not Modified."""
+        with self._lock:
+            self.not_modified += 1
+
+    def fail(self) -> bool:
+        """Decide whether to inject a server error."""
+        with self._lock:
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve /search/repositories and /graphql from the server's StubState."""
+
+    server_version = "GitHubStub/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status: int, payload: Dict, headers: Dict[str, str]):
+        body = json.dumps(payload).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.server.state.count_not_modified()
+            self.send_response(304)
+            body = b""
+        else:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        state = self.server.state
+        if urlsplit(self.path).path != "/graphql":
+            self.send_json(404, {"message": "Not Found"}, {})
+            return
+
+        state.count_graphql()
+        if state.latency:
+            time.sleep(state.latency)
+        if state.fail():
+            self.send_json(502, {"message": "Server Error"}, {})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            query, variables = request["query"], request.get("variables") or {}
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, {"message": "Problems parsing JSON"}, {})
+            return
+
+        data, errors = {}, []
+        for alias, owner, name in _REPOSITORY_LOOKUP.findall(query):
+            full_name = f"{variables.get(owner)}/{variables.get(name)}"
+            data[alias] = generate_details(full_name, state.seed)
+            if data[alias] is None:
+                message = f"Could not resolve to a Repository with the name '{full_name}'."
+                errors.append({"type": "NOT_FOUND", "path": [alias], "message": message})
+        self.send_json(200, {"data": data, "errors": errors} if errors else {"data": data}, {})
+
+    def do_GET(self):
+        state = self.server.state
+        url = urlsplit(self.path)
+        if url.path != "/search/repositories":
+            self.send_json(404, {"message": "Not Found"}, {})
+            return
+
+        allowed, headers, delay = state.admit()
+        if delay:
+            time.sleep(delay)
+
+        if not allowed:
+            self.send_json(403, {"message": "API rate limit exceeded"}, headers)
+            return
+        if state.fail():
+            self.send_json(502, {"message": "Server Error"}, headers)
+            return
+
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        query = params.get("q", "")
+        try:
+            per_page = min(max(int(params.get("per_page", 30)), 1), MAX_PER_PAGE)
+            page = max(int(params.get("page", 1)), 1)
+        except ValueError:
+            self.send_json(422, {"message": "Validation Failed"}, headers)
+            return
+
+        if (page - 1) * per_page >= MAX_RESULTS:
+            self.send_json(422, {
+                "message": "Only the first 1000 search results are available"
+            }, headers)
+            return
+
+        items = state.corpus(query)
+        start = (page - 1) * per_page
+        end = min(start + per_page, len(items), MAX_RESULTS)
+        self.send_json(200, {
+            "total_count": len(items),
+            "incomplete_results": False,
+            "items": items[start:end],
+        }, headers)
+
+
+def start_server(port: int = 0, host: str = "127.0.0.1", verbose: bool = False,
+                 **options) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start a stub server on a background thread.
+
+    Args:
+        port: Port to listen on, 0 for any free port
+        host: Interface to bind
+        verbose: Log every request to stderr
+        **options: Passed to StubState
+
+    Returns:
+        Tuple of (server, base URL); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(**options)
+    server.verbose = verbose
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the GitHub search API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--repos", type=int, default=DEFAULT_REPOS,
+                        help=f"Matching repos per query (default: {DEFAULT_REPOS})")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 502 (default: 0)")
+    parser.add_argument("--rate-limit", type=int, default=0,
+                        help="Searches allowed per window, 0 for unlimited (default: 0)")
+    parser.add_argument("--window", type=float, default=60.0, help="Rate-limit window in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the corpus and errors")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    server, url = start_server(
+        args.port, args.host, args.verbose, repos=args.repos, latency=args.latency,
+        jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit,
+        window=args.window, seed=args.seed
+    )
+    print(f"Serving stub GitHub API at {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
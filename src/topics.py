@@ -0,0 +1,38 @@
+"""Topic lists and topic names in file names.
+
+Kept free of heavy imports so the CLI can work out what a run would
+produce before loading the pipeline.
+"""
+import re
+from pathlib import Path
+from typing import List
+
+
+def read_topics_file(path: str) -> List[str]:
+    """
+    Read topics from a file, one per line.
+
+    Blank lines and lines starting with '#' are ignored.
+    """
+    topics = []
+    for line in Path(path).read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            topics.append(line)
+    return topics
+
+
+def parse_topics(value: str) -> List[str]:
+    """Split a comma-separated topic list, dropping blanks and duplicates."""
+    topics = []
+    for topic in value.split(","):
+        topic = topic.strip()
+        if topic and topic not in topics:
+            topics.append(topic)
+    return topics
+
+
+def topic_slug(topic: str) -> str:
+    """Make a topic safe to use in a file name."""
+    return re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-") or "topic"
+
@@ -0,0 +1,195 @@
+"""Star and fork velocity of repositories, built from daily snapshots."""
+import bisect
+import json
+import os
+from datetime import date as Date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.scorer import ScoringContext
+from src.snapshot import Snapshot, list_snapshots
+
+
+TRENDS_FILE = Path("cache") / "trends.json"
+DEFAULT_TREND_WINDOW = 7  # Days of history used for velocity
+
+# Weight of each velocity in the trending score
+STAR_VELOCITY_WEIGHT = 0.7
+FORK_VELOCITY_WEIGHT = 0.3
+
+
+class TrendIndex:
+    """
+    Recent star and fork counts of each repository, keyed by full_name.
+
+    Holds at most one observation per repo per day, for the last ``window``
+    days, so finding a repo's velocity is a dictionary lookup. The index
+    remembers the last snapshot day it has seen and only reads snapshots
+    from that day on, so a daily run applies just the repos fetched that
+    day instead of rescanning the whole archive.
+    """
+
+    def __init__(self, window: int = DEFAULT_TREND_WINDOW, through: Optional[str] = None,
+                 through_blocks: int = 0, history: Optional[Dict[str, List[List[int]]]] = None):
+        self.window = window
+        # Last snapshot day applied, and how many of its blocks
+        self.through = through
+        self.through_blocks = through_blocks
+        # full_name -> [[day ordinal, stars, forks], ...] sorted by day
+        self._history = history if history is not None else {}
+
+    @classmethod
+    def load(cls, path: Path = TRENDS_FILE, window: int = DEFAULT_TREND_WINDOW) -> "TrendIndex":
+        """
+        Load the index from disk.
+
+        A missing or unreadable file, or one built for a different window,
+        gives an empty index that will be rebuilt from the snapshots.
+        """
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(window)
+
+        if data.get("window") != window:
+            return cls(window)
+
+        return cls(window, data.get("through"), data.get("through_blocks", 0), data.get("repos", {}))
+
+    def __len__(self) -> int:
+        return len(self._history)
+
+    def __contains__(self, full_name: str) -> bool:
+        return full_name in self._history
+
+    def observe(self, full_name: str, day: int, stars: int, forks: int):
+        """Record a repo's counts on a day (ordinal), replacing that day's earlier value."""
+        observations = self._history.setdefault(full_name, [])
+        entry = [day, stars, forks]
+
+        if not observations or observations[-1][0] < day:
+            observations.append(entry)
+        else:
+            position = bisect.bisect_left([obs[0] for obs in observations], day)
+            if position < len(observations) and observations[position][0] == day:
+                observations[position] = entry
+            else:
+                observations.insert(position, entry)
+
+        cutoff = observations[-1][0] - self.window
+        while observations[0][0] < cutoff:
+            observations.pop(0)
+
+    def apply_snapshot(self, snapshot: Snapshot, skip_blocks: int = 0):
+        """Record every repo in a day's snapshot, after the first ``skip_blocks`` blocks."""
+        day = Date.fromisoformat(snapshot.date).toordinal()
+        for block in snapshot.blocks[skip_blocks:]:
+            stars, forks = block.stars, block.forks
+            for index, full_name in enumerate(block.strings("full_name")):
+                self.observe(full_name, day, stars[index], forks[index])
+
+    def update(self, directory: Path, today: Optional[str] = None) -> int:
+        """
+        Apply the snapshots not yet in the index.
+
+        Only blocks appended since the last update are read: the rest of
+        the last day applied (later runs that day append to it) and any
+        newer days.
+
+        Args:
+            directory: Snapshot directory
+            today: Date (YYYY-MM-DD) the window ends on, defaults to today
+
+        Returns:
+            Number of snapshot files read
+        """
+        today = today or Date.today().isoformat()
+        since = (Date.fromisoformat(today) - timedelta(days=self.window)).isoformat()
+        if self.through and self.through > since:
+            since = self.through
+
+        paths = list_snapshots(directory, since=since, until=today)
+        for path in paths:
+            with Snapshot(path) as snapshot:
+                skip = self.through_blocks if snapshot.date == self.through else 0
+                self.apply_snapshot(snapshot, skip)
+                self.through = snapshot.date
+                self.through_blocks = len(snapshot.blocks)
+
+        return len(paths)
+
+    def velocity(self, full_name: str, stars: int, forks: int, day: int) -> Tuple[float, float]:
+        """
+        Stars and forks gained per day, up to the given counts on ``day``.
+
+        Measured from the oldest observation in the window before ``day``.
+        A repo with no earlier observation has a velocity of zero.
+
+        Returns:
+            Tuple of (stars per day, forks per day)
+        """
+        for observed_day, observed_stars, observed_forks in self._history.get(full_name, ()):
+            if observed_day >= day:
+                break
+            if observed_day >= day - self.window:
+                days = day - observed_day
+                return (stars - observed_stars) / days, (forks - observed_forks) / days
+
+        return 0.0, 0.0
+
+    def expire(self, today: str) -> int:
+        """
+        Drop repos not observed within the window ending on a date (YYYY-MM-DD).
+
+        Returns:
+            Number of repos removed
+        """
+        cutoff = Date.fromisoformat(today).toordinal() - self.window
+        stale = [name for name, obs in self._history.items() if obs[-1][0] < cutoff]
+        for name in stale:
+            del self._history[name]
+        return len(stale)
+
+    def save(self, path: Path = TRENDS_FILE):
+        """Write the index to disk atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_suffix(".tmp")
+        with open(temp, 'w') as f:
+            json.dump({
+                "window": self.window,
+                "through": self.through,
+                "through_blocks": self.through_blocks,
+                "repos": self._history
+            }, f)
+        os.replace(temp, path)
+
+
+def trending_scorer(index: TrendIndex, topic: str, preferences: Optional[Dict] = None,
+                    date: Optional[str] = None) -> Callable[[Dict], float]:
+    """
+    Build a scoring function that ranks repos by recent growth.
+
+    trending_score = (stars_per_day * 0.7 + forks_per_day * 0.3) * preference_boost
+
+    Args:
+        index: Trend history to measure velocity against
+        topic: Search topic
+        preferences: Optional user preferences for boosting
+        date: Day (YYYY-MM-DD) the fetched counts are from, defaults to today
+
+    Returns:
+        Function scoring one repo, for top_k_repos
+    """
+    context = ScoringContext(topic, preferences)
+    day = Date.fromisoformat(date).toordinal() if date else Date.today().toordinal()
+
+    def score(repo: Dict) -> float:
+        star_velocity, fork_velocity = index.velocity(
+            repo.get("full_name", ""), repo.get("stars", 0), repo.get("forks", 0), day
+        )
+        _, boost = context.keyword_and_boost(repo)
+        return (star_velocity * STAR_VELOCITY_WEIGHT + fork_velocity * FORK_VELOCITY_WEIGHT) * boost
+
+    return score
@@ -0,0 +1,56 @@
+"""Fixtures shared by the tests that talk to the stub GitHub server."""
+import pytest
+from src import github_fetcher
+from src.rate_limiter import RateLimiter
+from src.stub_server import start_server
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    """Point the fetcher at nothing but local state, and restore it afterwards."""
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_API_URL", raising=False)
+    github_fetcher.configure_session()
+    github_fetcher.configure_response_cache(False)
+    github_fetcher.configure_coalescing(False)
+    yield github_fetcher
+    github_fetcher.configure_api_url(None)
+    github_fetcher.configure_recording()
+    github_fetcher.configure_response_cache(True)
+    github_fetcher.configure_coalescing(True)
+    github_fetcher.configure_session()
+
+
+@pytest.fixture
+def stub():
+    """Run stub servers for one test; call with StubState options to start one."""
+    servers = []
+
+    def start(**options):
+        server, url = start_server(**options)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def stub_api(fetcher, stub, monkeypatch):
+    """
+    Start a stub server and send the fetcher's requests to it.
+
+    Call with StubState options (e.g. ``repos=2500``); returns the server.
+    The rate limiter allows far more than the stub's corpus needs, so
+    sharded and paginated fetches aren't slowed down.
+    """
+    monkeypatch.setattr(github_fetcher, "_rate_limiter", RateLimiter(limit=10_000))
+
+    def start(**options):
+        server, url = stub(**options)
+        fetcher.configure_api_url(url)
+        return server
+
+    return start
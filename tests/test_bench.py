@@ -0,0 +1,47 @@
+"""Tests for the benchmark corpus generator and result comparison."""
+from bench.compare import compare
+from bench.corpus import generate_cache, generate_repos
+from bench.run import measure, parse_size, Workload
+
+
+def test_generate_repos_is_seeded():
+    """Test that the corpus is reproducible and shaped like fetch_repos output."""
+    repos = generate_repos(200, seed=3)
+    assert repos == generate_repos(200, seed=3)
+    assert repos != generate_repos(200, seed=4)
+    assert len({r["full_name"] for r in repos}) == 200
+    assert set(repos[0]) == {"name", "full_name", "description", "url", "stars", "forks",
+                             "language", "updated_at", "topics"}
+
+
+def test_generate_cache_overlaps_corpus():
+    """Test that part of the corpus is in the generated cache."""
+    repos = generate_repos(1000)
+    cache = generate_cache(repos, seen_fraction=0.5, extra=0.2)
+    overlap = sum(r["full_name"] in cache for r in repos)
+    assert 400 < overlap < 600
+    assert len(cache) == overlap + 200
+
+
+def test_parse_size():
+    """Test corpus size suffixes."""
+    assert parse_size("1k") == 1_000
+    assert parse_size("1M") == 1_000_000
+    assert parse_size("2500") == 2_500
+
+
+def test_measure_stage(tmp_path, monkeypatch):
+    """Test timing a stage in-process."""
+    monkeypatch.chdir(tmp_path)
+    result = measure("top_k_repos", Workload(100, seed=0))
+    assert result["seconds"] > 0
+    assert result["peak_rss"] >= result["rss_growth"] >= 0
+
+
+def test_compare_flags_regressions():
+    """Test that only changes beyond the threshold are regressions."""
+    def run(seconds):
+        return {(1000, "rank_repos"): {"seconds": seconds, "rss_growth_mb": 10.0}}
+
+    assert not compare(run(1.0), run(1.1), threshold=0.2)[0]["regression"]
+    assert compare(run(1.0), run(1.5), threshold=0.2)[0]["regression"]
@@ -1,6 +1,8 @@
 """Tests for cache functionality."""
 import pytest
 import json
+import threading
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 from src.cache import (
@@ -9,6 +11,9 @@ from src.cache import (
     filter_seen_repos,
     add_to_cache,
     cleanup_old_entries,
+    open_seen_cache,
+    SeenCache,
+    SqliteSeenCache,
     CACHE_FILE
 )
 
@@ -98,3 +103,146 @@ def test_cleanup_old_entries(clean_cache):
     cleaned = load_cache()
     assert "owner/repo1" in cleaned
     assert "owner/repo2" not in cleaned
+
+
+def test_seen_cache_loads_once_and_flushes_once(clean_cache):
+    """Test answering filter, add and expire queries in memory."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    old_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    save_cache({"owner/recent": today, "owner/old": old_date, "owner/bad": "not-a-date"})
+
+    cache = SeenCache.load()
+    assert "owner/bad" not in cache
+    assert cache.recent_names(7) == {"owner/recent"}
+
+    repos = [{"full_name": "owner/recent"}, {"full_name": "owner/old"}, {"full_name": "owner/new"}]
+    filtered, count = cache.filter(repos, cache_days=7)
+    assert count == 1
+    assert [r["full_name"] for r in filtered] == ["owner/old", "owner/new"]
+
+    cache.add([{"full_name": "owner/new"}], date=today)
+    assert cache.expire(7) == 1
+
+    # Nothing is written until flush
+    assert "owner/new" not in load_cache()
+    cache.flush()
+    assert load_cache() == {"owner/recent": today, "owner/new": today}
+
+
+def test_seen_cache_window_boundary(clean_cache):
+    """Test that the in-memory window matches the original date comparison."""
+    edge = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+    inside = (datetime.now() - timedelta(days=6)).strftime("%Y-%m-%d")
+    save_cache({"owner/edge": edge, "owner/inside": inside})
+
+    assert SeenCache.load().recent_names(7) == {"owner/inside"}
+
+
+def test_iter_unseen_is_lazy(clean_cache, tmp_path):
+    """Test that both backends filter a stream without consuming it up front."""
+    save_cache({"owner/seen": datetime.now().strftime("%Y-%m-%d")})
+
+    def stream(pulled):
+        for name in ["owner/seen", "owner/a", "owner/b"]:
+            pulled.append(name)
+            yield {"full_name": name}
+
+    for cache in (SeenCache.load(), SqliteSeenCache.open(tmp_path / "seen.db")):
+        pulled = []
+        unseen = cache.iter_unseen(stream(pulled), cache_days=7)
+        assert pulled == []
+        assert [r["full_name"] for r in unseen] == ["owner/a", "owner/b"]
+        cache.close()
+
+
+def test_sqlite_cache_migrates_json_once(clean_cache, tmp_path):
+    """Test that the JSON cache is imported the first time the database opens."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    save_cache({"owner/repo1": today})
+
+    db = tmp_path / "seen.db"
+    cache = SqliteSeenCache.open(db)
+    assert "owner/repo1" in cache
+    cache.expire(7)
+    cache.close()
+
+    # A later JSON change is not imported again
+    save_cache({"owner/repo2": today})
+    cache = SqliteSeenCache.open(db)
+    assert "owner/repo2" not in cache
+    assert len(cache) == 1
+    cache.close()
+
+
+def test_sqlite_cache_concurrent_first_open(clean_cache, tmp_path, monkeypatch):
+    """Test that runs opening a new database at once import the JSON cache exactly once."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    save_cache({"owner/repo1": today})
+    imports = []
+    load = SeenCache.load
+
+    def slow_load(*args):
+        imports.append(1)
+        time.sleep(0.2)  # Let the other run reach the migration too
+        return load(*args)
+
+    monkeypatch.setattr(SeenCache, "load", staticmethod(slow_load))
+    db = tmp_path / "seen.db"
+    errors = []
+
+    def open_store():
+        try:
+            SqliteSeenCache.open(db).close()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_store) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert imports == [1]
+    cache = SqliteSeenCache.open(db)
+    assert cache.to_dict() == {"owner/repo1": today}
+    cache.close()
+
+
+def test_sqlite_cache_filter_add_expire(clean_cache, tmp_path):
+    """Test the SQLite backend answers the same queries as the JSON one."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    old_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+
+    cache = SqliteSeenCache.open(tmp_path / "seen.db")
+    cache.add([{"full_name": "owner/recent"}], date=today)
+    cache.add([{"full_name": "owner/old"}, {"name": "no-full-name"}], date=old_date)
+
+    repos = [{"full_name": "owner/recent"}, {"full_name": "owner/old"}, {"full_name": "owner/new"}]
+    filtered, count = cache.filter(repos, cache_days=7)
+    assert count == 1
+    assert [r["full_name"] for r in filtered] == ["owner/old", "owner/new"]
+    assert cache.recent_names(7) == {"owner/recent"}
+
+    assert cache.expire(7) == 1
+    assert cache.to_dict() == {"owner/recent": today}
+    cache.close()
+
+
+def test_sqlite_cache_shared_between_connections(clean_cache, tmp_path):
+    """Test that two open stores see each other's writes."""
+    db = tmp_path / "seen.db"
+    first = SqliteSeenCache.open(db)
+    second = SqliteSeenCache.open(db)
+
+    first.add([{"full_name": "owner/repo1"}])
+    assert "owner/repo1" in second
+
+    first.close()
+    second.close()
+
+
+def test_open_seen_cache_rejects_unknown_backend():
+    """Test that an unknown backend name is an error."""
+    with pytest.raises(ValueError):
+        open_seen_cache("redis")
@@ -0,0 +1,88 @@
+"""Tests for incremental per-topic candidate sets."""
+from datetime import datetime, timedelta, timezone
+import pytest
+import requests
+from src import github_fetcher, pipeline
+from src.candidates import CandidateSet, candidates_path, fetch_incremental
+from src.stub_server import filter_items, generate_items, parse_query
+
+
+NOW = datetime(2024, 6, 2, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def server(stub_api, tmp_path, monkeypatch):
+    """Serve 300 repos per topic, with candidate sets in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    return stub_api(repos=300)
+
+
+def test_first_run_fetches_everything_then_only_changes(server):
+    """Test a full first fetch, then a delta with pushed:> the high-water mark."""
+    candidates = fetch_incremental("rag", now=NOW)
+    assert len(candidates) == 300
+    assert candidates.since == "2024-06-01T23:00:00Z"
+    full_requests = server.state.requests
+
+    # Move the mark back so that the last week of pushes counts as new
+    candidates.since = "2024-05-25T00:00:00Z"
+    candidates.save()
+    server.state.requests = 0
+    later = NOW + timedelta(days=1)
+    candidates = fetch_incremental("rag", now=later)
+
+    pushed = filter_items(generate_items("rag", 300), parse_query("pushed:>2024-05-25T00:00:00Z")[1])
+    assert 0 < len(pushed) < 100
+    assert server.state.requests == 1 < full_requests
+    assert len(candidates) == 300
+    assert CandidateSet.load("rag").since == "2024-06-02T23:00:00Z"
+
+
+def test_full_refresh_after_refresh_days(server):
+    """Test that the whole topic is fetched again once the last full fetch is old."""
+    fetch_incremental("rag", now=NOW)
+    candidates = CandidateSet.load("rag")
+    assert not candidates.needs_refresh(NOW + timedelta(days=6))
+    assert candidates.needs_refresh(NOW + timedelta(days=7))
+    assert not candidates.needs_refresh(NOW + timedelta(days=70), refresh_days=None)
+
+
+def test_full_refresh_drops_repos_gone_from_the_topic(server):
+    """Test that a full refresh replaces the stored set instead of merging into it."""
+    stale = {"name": "deleted", "full_name": "gone/deleted", "description": "", "url": "",
+             "stars": 99_999, "forks": 0, "language": "Python",
+             "updated_at": "2024-01-01T00:00:00Z", "topics": []}
+    CandidateSet("rag", [stale], since="2024-05-01T00:00:00Z",
+                 refreshed="2024-05-01T00:00:00Z").save()
+
+    candidates = fetch_incremental("rag", now=NOW)
+    assert "gone/deleted" not in candidates
+    assert len(candidates) == 300
+    assert candidates.refreshed == "2024-06-02T00:00:00Z"
+    assert "gone/deleted" not in CandidateSet.load("rag")
+
+
+def test_failed_fetch_keeps_mark_and_falls_back(server, monkeypatch, capsys):
+    """Test that a failed delta leaves the stored set alone and is ranked as stored."""
+    monkeypatch.setattr(github_fetcher.time, "sleep", lambda seconds: None)
+    fetch_incremental("rag", now=NOW)
+    stored = candidates_path("rag").read_text()
+
+    github_fetcher.configure_api_url("http://127.0.0.1:9")  # Nothing listens here
+    with pytest.raises(requests.RequestException):
+        fetch_incremental("rag", now=NOW + timedelta(days=1))
+    assert candidates_path("rag").read_text() == stored
+
+    repos = pipeline.incremental_candidates("rag")
+    assert len(repos) == 300
+    assert "Error fetching changes for rag" in capsys.readouterr().out
+
+
+def test_run_digest_incremental(server):
+    """Test that an incremental run ranks the stored set and reports the best of it."""
+    config = {"preferred_topics": [], "topic_boost_multiplier": 1.5, "cache_days": 7}
+    paths = pipeline.run_digest(["rag"], limit=3, date="2024-06-02", config=config, incremental=True)
+
+    top = max(generate_items("rag", 300), key=lambda item: item["stargazers_count"])
+    assert top["full_name"] in open(paths[0]).read()
+    assert len(CandidateSet.load("rag")) == 300
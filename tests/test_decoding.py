@@ -0,0 +1,64 @@
+"""Tests for decoding search responses into Repo records."""
+import json
+
+import pytest
+
+from bench.corpus import generate_repos, generate_search_pages
+from src import decoding
+from src.decoding import decode_search, decode_search_stdlib
+
+
+@pytest.fixture
+def page():
+    """A search response body shaped like the real API's."""
+    return generate_search_pages(generate_repos(30, seed=5), per_page=30)[0]
+
+
+def test_stdlib_decoder_projects_items(page):
+    """Test that the streaming decoder gives the same records as a full parse."""
+    fields, repos = decode_search_stdlib(page)
+    expected = [decoding.parse_repo(item) for item in json.loads(page)["items"]]
+    assert fields == {"total_count": 30, "incomplete_results": False}
+    assert repos == expected
+    assert repos[0].url.startswith("https://github.com/")
+
+
+@pytest.mark.skipif(decoding.orjson is None, reason="orjson not installed")
+def test_orjson_and_stdlib_agree(page):
+    """Test that both decoders give identical results."""
+    assert decode_search(page) == decode_search_stdlib(page)
+
+
+def test_decode_search_without_orjson(page, monkeypatch):
+    """Test the json.loads fallback used when orjson isn't installed."""
+    monkeypatch.setattr(decoding, "orjson", None)
+    monkeypatch.setattr(decoding, "decode_search_stdlib", None)
+    assert decode_search(page) == decode_search_stdlib(page)
+
+
+def test_decode_search_stream(page, monkeypatch):
+    """Test that stream=True uses the streaming decoder."""
+    calls = []
+    monkeypatch.setattr(decoding, "decode_search_stdlib",
+                        lambda body: calls.append(body) or decode_search_stdlib(body))
+    assert decode_search(page, stream=True) == decode_search(page)
+    assert calls == [page]
+
+
+@pytest.mark.parametrize("body", [
+    b'{"items": [], "total_count": 0}',
+    b' {\n "total_count" : 0 ,\n "items" : [ ] } ',
+    b'{"total_count": 0}',
+])
+def test_stdlib_decoder_layouts(body):
+    """Test empty and missing items, whitespace, and items before other fields."""
+    assert decode_search_stdlib(body) == ({"total_count": 0}, [])
+
+
+@pytest.mark.parametrize("body", [b"", b"[]", b'{"items": [{"a": 1', b'{"total_count": 1,}', b"{"])
+def test_malformed_bodies_raise_value_error(body):
+    """Test that every decoder rejects malformed responses with ValueError."""
+    with pytest.raises(ValueError):
+        decode_search_stdlib(body)
+    with pytest.raises(ValueError):
+        decode_search(body)
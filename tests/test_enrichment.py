@@ -0,0 +1,151 @@
+"""Tests for batched enrichment of reported repos."""
+import json
+
+import pytest
+from src import enrichment, github_fetcher
+from src.enrichment import DetailsCache, build_query, enrich_repos, parse_details, readme_excerpt
+from src.repo import Repo
+from src.report_generator import generate_repo_card
+
+
+def make_repo(name):
+    return {"name": name, "full_name": f"owner/{name}", "description": f"{name} project",
+            "url": f"https://github.com/owner/{name}", "stars": 1200, "forks": 30,
+            "language": "Python", "updated_at": "2024-01-01T00:00:00Z", "topics": []}
+
+
+class FakeResponse:
+    """A 200 reply with a JSON payload."""
+
+    status_code = 200
+    headers = {}
+
+    def __init__(self, payload):
+        self._payload = payload
+        self.content = json.dumps(payload).encode("utf-8")
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def graphql_reply(tmp_path, monkeypatch):
+    """Answer every GraphQL request with a fixed payload, the cache in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GITHUB_TOKEN", "token")
+
+    class Session:
+        def post(self, url, json=None, timeout=None):
+            return FakeResponse(self.payload)
+
+    session = Session()
+    monkeypatch.setattr(enrichment, "get_session", lambda: session)
+
+    def reply(payload):
+        session.payload = payload
+    return reply
+
+
+@pytest.fixture
+def server(stub_api, tmp_path, monkeypatch):
+    """Serve GraphQL lookups from a stub server, with the details cache in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    return stub_api()
+
+
+def test_build_query_passes_names_as_variables():
+    """Test that repo names go into variables, one aliased lookup per repo."""
+    query, variables = build_query(["a/b", 'evil/") { x }'])
+    assert "r0: repository(owner: $owner0, name: $name0)" in query
+    assert "r1: repository(owner: $owner1, name: $name1)" in query
+    assert "evil" not in query
+    assert variables["name1"] == '") { x }'
+
+
+def test_readme_excerpt_skips_headings_and_badges():
+    """Test that the excerpt is the first paragraph of prose, links reduced to text."""
+    text = ("# Title\n\n[![CI](x.svg)](y)\n<p>logo</p>\n\n"
+            "A **fast** [RAG](https://x) toolkit.\nSecond line.\n\nMore.")
+    assert readme_excerpt(text) == "A fast RAG toolkit. Second line."
+    assert readme_excerpt("word " * 100, length=20).endswith("...")
+    assert readme_excerpt("# Only a heading") is None
+    assert parse_details(None) == {}
+
+
+def test_enrich_repos_batches_and_caches(server):
+    """Test batched lookups, the TTL cache and repos that no longer exist."""
+    repos = [make_repo(f"repo{i}") for i in range(24)] + [Repo.from_dict(make_repo("missing-one"))]
+
+    assert enrich_repos(repos, now=1000.0) == 25
+    assert server.state.graphql_requests == 2
+    assert {"open_issues", "contributors", "readme_excerpt"} <= set(repos[0]["details"])
+    assert repos[-1]["details"] == {}
+
+    again = [make_repo("repo0"), make_repo("repo1")]
+    assert enrich_repos(again, now=1000.0 + 3600) == 0
+    assert again[0]["details"] == repos[0]["details"]
+    assert server.state.graphql_requests == 2
+
+    assert enrich_repos(again, ttl_hours=1, now=1000.0 + 3600) == 2
+    assert server.state.graphql_requests == 3
+    assert len(DetailsCache.load()) == 2  # Stale entries expired
+
+
+def test_enrich_needs_token_for_github(tmp_path, monkeypatch, capsys):
+    """Test that enrichment is skipped without a token instead of failing against GitHub."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_API_URL", raising=False)
+    github_fetcher.configure_session()
+    repos = [make_repo("repo0")]
+
+    assert enrich_repos(repos) == 0
+    assert "details" not in repos[0]
+    assert "needs a token" in capsys.readouterr().out
+
+
+def test_card_uses_details_when_present():
+    """Test that cards gain release, README and activity lines only with details."""
+    repo = make_repo("repo0")
+    plain = generate_repo_card(repo)
+    assert "Latest release" not in plain and plain.count("\n- ") == 3
+
+    repo["details"] = {"latest_release": "v1.2.0", "released_at": "2024-03-05T00:00:00Z",
+                       "open_issues": 1234, "contributors": 56, "readme_excerpt": "A fast toolkit."}
+    card = generate_repo_card(repo)
+    assert "Latest release: v1.2.0 (March 2024)." in card
+    assert "- From the README: A fast toolkit." in card
+    assert "- Activity: 1,234 open issues, 56 contributors" in card
+
+
+def test_rate_limited_reply_caches_nothing(graphql_reply, capsys):
+    """Test that a reply with errors and no data fails instead of caching empty details."""
+    graphql_reply({"data": None, "errors": [{"type": "RATE_LIMITED", "message": "limited"}]})
+    repos = [make_repo("repo0"), make_repo("repo1")]
+
+    assert enrich_repos(repos, now=1000.0) == 0
+    assert "details" not in repos[0]
+    assert "limited" in capsys.readouterr().out
+    assert len(DetailsCache.load()) == 0
+
+
+def test_only_missing_repos_are_cached_empty(graphql_reply):
+    """Test that NOT_FOUND lookups are cached as empty and other failed lookups aren't cached."""
+    graphql_reply({
+        "data": {"r0": {"issues": {"totalCount": 3}}, "r1": None, "r2": None},
+        "errors": [{"type": "NOT_FOUND", "path": ["r1"], "message": "gone"},
+                   {"type": "FORBIDDEN", "path": ["r2"], "message": "blocked"}]
+    })
+    repos = [make_repo("repo0"), make_repo("missing-one"), make_repo("private")]
+
+    assert enrich_repos(repos, now=1000.0) == 2
+    assert repos[0]["details"] == {"open_issues": 3}
+    assert repos[1]["details"] == {}
+    assert "details" not in repos[2]
+
+    cache = DetailsCache.load()
+    assert cache.get("owner/missing-one", 1000.0) == {}
+    assert cache.get("owner/private", 1000.0) is None
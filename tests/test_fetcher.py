@@ -1,5 +1,9 @@
 """Tests for GitHub fetcher."""
 import pytest
+import asyncio
+import json
+import requests
+from src import github_fetcher
 from src.github_fetcher import parse_updated_date
 from datetime import datetime
 
@@ -20,3 +24,297 @@ def test_parse_updated_date_with_timezone():
     result = parse_updated_date(date_str)
     assert isinstance(result, datetime)
     assert result.year == 2024
+
+
+def make_page(page, per_page, total=1000):
+    """Build a fake page of search results ranked by page position."""
+    start = (page - 1) * per_page
+    end = min(start + per_page, total)
+    return [
+        {"name": f"repo{i}", "full_name": f"owner/repo{i}", "stars": total - i}
+        for i in range(start, end)
+    ]
+
+
+def test_fetch_repos_paginates_in_rank_order(monkeypatch):
+    """Test that pages fetched concurrently are merged in rank order."""
+    calls = []
+
+    def fake_fetch_page(query, page, per_page):
+        calls.append(page)
+        return make_page(page, per_page)
+
+    monkeypatch.setattr(github_fetcher, "fetch_page", fake_fetch_page)
+
+    repos = github_fetcher.fetch_repos("ai", limit=250)
+    assert len(repos) == 250
+    assert [r["full_name"] for r in repos] == [f"owner/repo{i}" for i in range(250)]
+    assert sorted(calls) == [1, 2, 3]
+
+
+def test_fetch_repos_skips_seen_until_enough_new(monkeypatch):
+    """Test that cached repos don't count towards the limit."""
+    monkeypatch.setattr(
+        github_fetcher, "fetch_page", lambda q, page, per_page: make_page(page, per_page)
+    )
+
+    seen = {f"owner/repo{i}" for i in range(150)}
+    repos = github_fetcher.fetch_repos("ai", limit=10, seen=seen)
+
+    new = [r for r in repos if r["full_name"] not in seen]
+    assert len(new) == 10
+    assert new[0]["full_name"] == "owner/repo150"
+    assert len(repos) == 160
+
+
+def test_iter_repos_yields_first_page_before_fetching_more(monkeypatch):
+    """Test that repos are yielded as pages arrive, not after the last one."""
+    calls = []
+
+    def fake_fetch_page(query, page, per_page):
+        calls.append(page)
+        return make_page(page, per_page)
+
+    monkeypatch.setattr(github_fetcher, "fetch_page", fake_fetch_page)
+
+    repos = github_fetcher.iter_repos("ai", limit=1000, max_workers=1)
+    assert next(repos)["full_name"] == "owner/repo0"
+    assert calls == [1]
+
+
+def test_fetch_repos_stops_at_short_page(monkeypatch):
+    """Test that fetching stops when the results run out."""
+    monkeypatch.setattr(
+        github_fetcher, "fetch_page",
+        lambda q, page, per_page: make_page(page, per_page, total=120)
+    )
+
+    repos = github_fetcher.fetch_repos("ai", limit=500)
+    assert len(repos) == 120
+
+
+def test_fetch_repos_keeps_pages_before_error(monkeypatch):
+    """Test that a failing page keeps the results fetched before it."""
+    def fake_fetch_page(query, page, per_page):
+        if page == 2:
+            raise requests.ConnectionError("boom")
+        return make_page(page, per_page)
+
+    monkeypatch.setattr(github_fetcher, "fetch_page", fake_fetch_page)
+
+    repos = github_fetcher.fetch_repos("ai", limit=300)
+    assert len(repos) == 100
+
+
+@pytest.mark.parametrize("body", [b"<html>oops</html>", b"[]"])
+def test_fetch_repos_skips_malformed_page(monkeypatch, capsys, body):
+    """Test that a search body that isn't a JSON object is logged, not raised."""
+    github_fetcher.configure_coalescing(False)
+    monkeypatch.setattr(github_fetcher, "get_document", lambda url, params: body)
+
+    assert github_fetcher.fetch_repos("ai", limit=5) == []
+    assert "Error fetching repos: Malformed search response" in capsys.readouterr().out
+    github_fetcher.configure_coalescing()
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response."""
+
+    def __init__(self, status_code=200, payload=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._payload = payload or {"items": []}
+        self.content = json.dumps(self._payload).encode("utf-8")
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+
+class FakeSession:
+    """Session that replays a scripted list of responses or exceptions."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.sent_headers = []
+
+    def get(self, url, params=None, headers=None, timeout=None, **kwargs):
+        self.calls += 1
+        self.sent_headers.append(headers or {})
+        result = self.responses.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture(autouse=True)
+def fresh_session(monkeypatch):
+    """Give every test its own session and rate limiter."""
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    github_fetcher.configure_session()
+    yield
+    github_fetcher.configure_session()
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """Record sleeps instead of waiting."""
+    sleeps = []
+    monkeypatch.setattr(github_fetcher.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_get_session_is_shared():
+    """Test that all fetches reuse one pooled session."""
+    github_fetcher.configure_session(pool_size=5)
+    session = github_fetcher.get_session()
+    assert github_fetcher.get_session() is session
+    assert session.get_adapter("https://api.github.com")._pool_maxsize == 5
+    github_fetcher.configure_session()
+
+
+def test_request_retries_transient_errors(monkeypatch, no_sleep):
+    """Test that connection errors and 5xx responses are retried."""
+    session = FakeSession([
+        requests.ConnectionError("reset"),
+        FakeResponse(502),
+        FakeResponse(200, {"items": []}),
+    ])
+    monkeypatch.setattr(github_fetcher, "get_session", lambda: session)
+
+    response = github_fetcher.request_with_retries("https://example.test", {})
+    assert response.status_code == 200
+    assert session.calls == 3
+    assert len(no_sleep) == 2
+
+
+def test_request_respects_retry_after(monkeypatch, no_sleep):
+    """Test that Retry-After overrides the backoff delay."""
+    session = FakeSession([
+        FakeResponse(429, headers={"Retry-After": "7"}),
+        FakeResponse(200),
+    ])
+    monkeypatch.setattr(github_fetcher, "get_session", lambda: session)
+
+    github_fetcher.request_with_retries("https://example.test", {})
+    assert no_sleep == [7.0]
+
+
+def test_request_gives_up_after_max_retries(monkeypatch, no_sleep):
+    """Test that a persistent failure is raised after the last retry."""
+    session = FakeSession([FakeResponse(503)] * 3)
+    monkeypatch.setattr(github_fetcher, "get_session", lambda: session)
+
+    with pytest.raises(requests.HTTPError):
+        github_fetcher.request_with_retries("https://example.test", {}, max_retries=2)
+    assert session.calls == 3
+
+
+def test_request_waits_out_rate_limit(monkeypatch, no_sleep):
+    """Test that a rate-limit rejection sleeps until the reset and retries."""
+    reset = github_fetcher.time.time() + 30
+    session = FakeSession([
+        FakeResponse(403, headers={
+            "X-RateLimit-Limit": "10",
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(reset)
+        }),
+        FakeResponse(200),
+    ])
+    monkeypatch.setattr(github_fetcher, "get_session", lambda: session)
+
+    response = github_fetcher.request_with_retries("https://example.test", {})
+    assert response.status_code == 200
+    assert len(no_sleep) == 1
+    assert 25 < no_sleep[0] <= 30
+
+
+def test_token_switches_to_authenticated_budget(monkeypatch):
+    """Test that a configured token is sent and raises the search budget."""
+    monkeypatch.setenv("GITHUB_TOKEN", "secret")
+    github_fetcher.configure_session()
+
+    session = github_fetcher.get_session()
+    assert session.headers["Authorization"] == "Bearer secret"
+    assert github_fetcher.get_rate_limiter().limit == github_fetcher.SEARCH_LIMIT_AUTHENTICATED
+
+
+def test_retry_delay_backoff_is_bounded():
+    """Test that jittered backoff stays within the exponential cap."""
+    for attempt in range(10):
+        delay = github_fetcher.retry_delay(attempt)
+        cap = min(github_fetcher.BACKOFF_MAX, github_fetcher.BACKOFF_BASE * 2 ** attempt)
+        assert 0 <= delay <= cap
+
+
+def test_retry_after_is_capped():
+    """Test that a huge or far-future Retry-After doesn't stall a worker for hours."""
+    assert github_fetcher.retry_delay(0, "7") == 7.0
+    assert github_fetcher.retry_delay(0, "86400") == github_fetcher.RETRY_AFTER_MAX
+    far_future = "Fri, 31 Dec 2100 23:59:59 GMT"
+    assert github_fetcher.retry_delay(0, far_future) == github_fetcher.RETRY_AFTER_MAX
+
+
+SEARCH_ITEM = {
+    "name": "repo",
+    "full_name": "owner/repo",
+    "description": None,
+    "html_url": "https://github.com/owner/repo",
+    "stargazers_count": 100,
+    "forks_count": 10,
+    "language": "Python",
+    "updated_at": "2024-01-15T10:30:00Z",
+    "topics": ["ai"]
+}
+
+
+def test_fetch_page_serves_not_modified_from_disk(monkeypatch, tmp_path):
+    """Test that a 304 reply is answered from the on-disk response cache."""
+    github_fetcher.configure_response_cache(directory=tmp_path)
+    github_fetcher.configure_coalescing(False)
+    session = FakeSession([
+        FakeResponse(200, {"items": [SEARCH_ITEM]}, headers={"ETag": '"abc"'}),
+        FakeResponse(304, headers={"ETag": '"abc"'}),
+    ])
+    monkeypatch.setattr(github_fetcher, "get_session", lambda: session)
+
+    first = github_fetcher.fetch_page("ai stars:>50", 1, 10)
+    second = github_fetcher.fetch_page("AI  stars:>50", 1, 10)
+
+    assert first == second
+    assert second[0]["description"] == "No description provided"
+    assert session.sent_headers[0] == {}
+    assert session.sent_headers[1] == {"If-None-Match": '"abc"'}
+    github_fetcher.configure_response_cache()
+    github_fetcher.configure_coalescing()
+
+
+def test_fetch_repos_async_matches_sync_and_yields(monkeypatch):
+    """Test that the async fetch returns the same repos without blocking the loop."""
+    def slow_fetch_page(query, page, per_page):
+        github_fetcher.time.sleep(0.05)
+        return make_page(page, per_page)
+
+    monkeypatch.setattr(github_fetcher, "fetch_page", slow_fetch_page)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.ensure_future(ticker())
+        repos = await github_fetcher.fetch_repos_async("ai", limit=150)
+        task.cancel()
+        return repos, ticks
+
+    repos, ticks = asyncio.run(main())
+    assert repos == github_fetcher.fetch_repos("ai", limit=150)
+    assert ticks > 1
@@ -0,0 +1,75 @@
+"""Tests for the precompiled keyword matcher."""
+import random
+import pytest
+from src.matcher import KeywordMatcher
+from src.scorer import calculate_keyword_match, calculate_preference_boost
+
+
+def naive_matches(repo, keywords):
+    """Reference implementation: one substring search per keyword."""
+    name = repo.get("name", "").lower()
+    description = repo.get("description", "").lower()
+    topics = [t.lower() for t in repo.get("topics", [])]
+    return {
+        k.lower() for k in keywords
+        if k.lower() in name or k.lower() in description or k.lower() in topics
+    }
+
+
+def test_matches_name_description_and_topics():
+    """Test the three places a keyword can match."""
+    matcher = KeywordMatcher(["RAG", "llm", "agents", "vision"])
+    repo = {
+        "name": "awesome-rag",
+        "description": "Tools for LLM apps",
+        "topics": ["agents", "computer-vision"]
+    }
+    # Topics only match exactly, "vision" is not a topic
+    assert matcher.matches(repo) == {"rag", "llm", "agents"}
+
+
+def test_overlapping_and_nested_keywords():
+    """Test keywords that start at the same position or contain each other."""
+    matcher = KeywordMatcher(["ll", "llm", "llms", "lm", "m"])
+    assert matcher.match_text("llms") == {"ll", "llm", "llms", "lm", "m"}
+    assert matcher.match_text("xllx") == {"ll"}
+
+
+def test_no_match_across_name_and_description():
+    """Test that a keyword can't straddle the name and description."""
+    matcher = KeywordMatcher(["rag"])
+    assert matcher.matches({"name": "xr", "description": "ag", "topics": []}) == set()
+
+
+def test_empty_keyword_always_matches():
+    """Test that an empty keyword behaves like an empty substring search."""
+    assert "" in KeywordMatcher([""]).matches({"name": "x", "description": "y", "topics": []})
+
+
+def test_matches_agree_with_substring_search():
+    """Test against the naive search on random keywords and texts."""
+    rng = random.Random(42)
+    alphabet = "abc-"
+    for _ in range(200):
+        keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(8)]
+        repo = {
+            "name": "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10))),
+            "description": "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30))),
+            "topics": [rng.choice(keywords), "zzz"]
+        }
+        assert KeywordMatcher(keywords).matches(repo) == naive_matches(repo, keywords)
+
+
+def test_scorer_functions_use_matcher():
+    """Test that the scorer gives the same answers with a matcher."""
+    preferences = {"preferred_topics": ["llm", "transformers"], "topic_boost_multiplier": 2.0}
+    matcher = KeywordMatcher(["rag", "llm", "transformers"])
+    repos = [
+        {"name": "rag-kit", "description": "For LLM apps", "topics": []},
+        {"name": "tool", "description": "Nothing", "topics": ["transformers"]},
+        {"name": "other", "description": "Unrelated", "topics": []},
+    ]
+    for repo in repos:
+        assert calculate_keyword_match(repo, "rag", matcher) == calculate_keyword_match(repo, "rag")
+        assert (calculate_preference_boost(repo, preferences, matcher)
+                == calculate_preference_boost(repo, preferences))
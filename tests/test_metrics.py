@@ -0,0 +1,55 @@
+"""Tests for stage timers and counters."""
+import json
+import pytest
+from src import metrics
+from src.scorer import top_k_repos
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """Start every test with instrumentation off and nothing recorded."""
+    metrics.enable(False)
+    metrics.reset()
+    yield
+    metrics.enable(False)
+    metrics.reset()
+
+
+def test_disabled_records_nothing():
+    """Test that timers and counters are no-ops while disabled."""
+    func = lambda: 1
+    assert metrics.timed(func, "stage") is func
+    with metrics.timer("stage"):
+        metrics.count("items", 5)
+
+    assert metrics.report() == {"timers": {}, "counters": {}}
+
+
+def test_timers_and_counters():
+    """Test recording calls, totals and counters."""
+    metrics.enable()
+    for _ in range(3):
+        with metrics.timer("stage"):
+            pass
+    metrics.count("items", 2)
+    metrics.count("items")
+    double = metrics.timed(lambda x: x * 2, "double")
+    assert double(4) == 8
+
+    data = metrics.report()
+    assert data["timers"]["stage"]["calls"] == 3
+    assert data["timers"]["double"]["calls"] == 1
+    assert data["timers"]["stage"]["seconds"] >= data["timers"]["stage"]["max"]
+    assert data["counters"] == {"items": 3}
+    assert "stage" in metrics.format_table()
+
+
+def test_scoring_is_timed_per_repo(tmp_path):
+    """Test that top_k_repos reports one scoring call per repo and JSON output."""
+    metrics.enable()
+    repos = [{"name": f"r{i}", "full_name": f"o/r{i}", "stars": i} for i in range(20)]
+    top_k_repos(repos, 3, "ai")
+
+    path = tmp_path / "metrics.json"
+    metrics.write_json(path)
+    assert json.loads(path.read_text())["timers"]["score"]["calls"] == 20
@@ -0,0 +1,299 @@
+"""Tests for the multi-topic digest pipeline."""
+import pytest
+import asyncio
+import json
+from datetime import datetime
+from src import cache as cache_module
+from src import pipeline
+from src.cache import load_cache
+from src.report_generator import generated_reports
+from src.snapshot import Snapshot, SnapshotWriter, snapshot_path
+from src.pipeline import (
+    dedupe_topics,
+    parse_topics,
+    read_repos_jsonl,
+    read_topics_file,
+    run_digest,
+    run_digest_async,
+    topic_slug
+)
+
+
+CONFIG = {"preferred_topics": [], "topic_boost_multiplier": 1.5, "cache_days": 7}
+
+
+def make_repo(name, stars=100):
+    return {
+        "name": name,
+        "full_name": f"owner/{name}",
+        "description": f"{name} project",
+        "url": f"https://github.com/owner/{name}",
+        "stars": stars,
+        "forks": 10,
+        "language": "Python",
+        "updated_at": "2024-01-01T00:00:00Z",
+        "topics": []
+    }
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the pipeline in an empty directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def fake_fetch(monkeypatch):
+    """Serve canned results per topic instead of calling GitHub."""
+    results = {
+        "rag": [make_repo("shared", 900), make_repo("rag-only", 500)],
+        "llm": [make_repo("shared", 900), make_repo("llm-only", 400)],
+    }
+    calls = []
+
+    def fetch_repos(topic, limit, seen=None):
+        calls.append(topic)
+        return [dict(repo) for repo in results.get(topic, [])]
+
+    def iter_repos(topic, limit, seen=None):
+        yield from fetch_repos(topic, limit, seen)
+
+    monkeypatch.setattr(pipeline, "fetch_repos", fetch_repos)
+    monkeypatch.setattr(pipeline, "iter_repos", iter_repos)
+    return calls
+
+
+def test_parse_topics():
+    """Test splitting a comma-separated topic list."""
+    assert parse_topics("rag, llm,,agents,rag") == ["rag", "llm", "agents"]
+
+
+def test_read_topics_file(tmp_path):
+    """Test reading topics from a file, skipping comments and blanks."""
+    path = tmp_path / "topics.txt"
+    path.write_text("rag\n# comment\n\nllm\n")
+    assert read_topics_file(str(path)) == ["rag", "llm"]
+
+
+def test_topic_slug():
+    """Test making topics safe for file names."""
+    assert topic_slug("Machine Learning") == "machine-learning"
+    assert topic_slug("c++/rust") == "c-rust"
+
+
+def test_dedupe_topics_keeps_first_topic():
+    """Test that a repo found under several topics stays with the first one."""
+    results = {
+        "rag": [make_repo("shared"), make_repo("a")],
+        "llm": [make_repo("shared"), make_repo("b")],
+    }
+    deduped = dedupe_topics(results)
+    assert [r["name"] for r in deduped["rag"]] == ["shared", "a"]
+    assert [r["name"] for r in deduped["llm"]] == ["b"]
+
+
+def test_run_digest_batch_writes_report_per_topic(workdir, fake_fetch, monkeypatch):
+    """Test a batch run: one report per topic and a single cache load and save."""
+    loads = []
+    saves = []
+    original_load = cache_module.load_cache
+    original_save = cache_module.save_cache
+    monkeypatch.setattr(cache_module, "load_cache",
+                        lambda *args: loads.append(1) or original_load(*args))
+    monkeypatch.setattr(cache_module, "save_cache",
+                        lambda *args: saves.append(1) or original_save(*args))
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    paths = run_digest(["rag", "llm"], limit=5, date=today, config=CONFIG)
+
+    assert sorted(fake_fetch) == ["llm", "rag"]
+    assert paths == [f"daily/{today}-rag.md", f"daily/{today}-llm.md"]
+    assert "shared" in (workdir / paths[0]).read_text()
+    assert "shared" not in (workdir / paths[1]).read_text()
+    assert len(loads) == 1
+    assert len(saves) == 1
+    assert set(load_cache()) == {"owner/shared", "owner/rag-only", "owner/llm-only"}
+
+
+def test_run_digest_combined_report(workdir, fake_fetch):
+    """Test that --combined writes all topics into one report."""
+    paths = run_digest(["rag", "llm"], limit=5, date="2024-02-03", config=CONFIG, combined=True)
+
+    assert paths == ["daily/2024-02-03.md"]
+    content = (workdir / paths[0]).read_text()
+    assert "**Topic:** rag, llm" in content
+    assert "llm-only" in content
+
+
+def test_run_digest_single_topic_keeps_report_name(workdir, fake_fetch):
+    """Test that a single topic still writes daily/YYYY-MM-DD.md."""
+    paths = run_digest(["rag"], limit=5, date="2024-02-03", config=CONFIG)
+    assert paths == ["daily/2024-02-03.md"]
+
+
+@pytest.mark.parametrize("topics,combined", [
+    (["rag"], False), (["rag", "llm"], False), (["rag", "llm"], True)
+])
+def test_generated_reports_match_run_digest(workdir, fake_fetch, topics, combined):
+    """Test that the CLI's early-exit check finds the reports a run wrote."""
+    assert generated_reports(topics, "2024-02-03", combined) == []
+    paths = run_digest(topics, limit=5, date="2024-02-03", config=CONFIG, combined=combined)
+    assert generated_reports(topics, "2024-02-03", combined) == paths
+    assert generated_reports(topics, "2024-02-04", combined) == []
+
+
+@pytest.mark.parametrize("combined", [False, True])
+def test_run_with_an_empty_topic_is_generated(workdir, fake_fetch, combined):
+    """Test that a topic without new repos doesn't stop the run counting as done."""
+    topics = ["rag", "quantum"]
+    paths = run_digest(topics, limit=5, date="2024-02-03", config=CONFIG, combined=combined)
+    assert len(paths) == 1
+    assert generated_reports(topics, "2024-02-03", combined) == paths
+    assert generated_reports(topics, "2024-02-03", not combined) == []
+
+
+def test_other_topics_report_is_not_generated(workdir, fake_fetch):
+    """Test that a single-topic report only counts for the topic it was written for."""
+    run_digest(["rag"], limit=5, date="2024-02-03", config=CONFIG)
+    assert generated_reports(["rag"], "2024-02-03") == ["daily/2024-02-03.md"]
+    assert generated_reports(["llm"], "2024-02-03") == []
+
+    # Overwritten by another topic's run
+    run_digest(["llm"], limit=5, date="2024-02-03", config=CONFIG)
+    assert generated_reports(["rag"], "2024-02-03") == []
+
+
+def test_run_digest_async(workdir, fake_fetch):
+    """Test that the async pipeline produces the same reports."""
+    paths = asyncio.run(
+        run_digest_async(["rag", "llm"], limit=5, date="2024-02-03", config=CONFIG, combined=True)
+    )
+    assert paths == ["daily/2024-02-03.md"]
+    assert "rag-only" in (workdir / paths[0]).read_text()
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_concurrent_runs_with_own_output_and_cache(workdir, fake_fetch, backend):
+    """Test that runs given their own report directory and cache don't affect each other."""
+    config = dict(CONFIG, cache_backend=backend)
+    suffix = ".db" if backend == "sqlite" else ".json"
+
+    async def run_both():
+        return await asyncio.gather(*(
+            run_digest_async(["rag"], limit=5, date="2024-02-03", config=config,
+                             output_dir=f"users/{user}", cache_path=f"users/{user}/seen{suffix}")
+            for user in ("alice", "bob")
+        ))
+
+    alice, bob = asyncio.run(run_both())
+
+    assert alice == ["users/alice/2024-02-03.md"]
+    assert bob == ["users/bob/2024-02-03.md"]
+    assert (workdir / alice[0]).read_text() == (workdir / bob[0]).read_text()
+    assert not (workdir / "daily").exists()
+    assert not (workdir / "cache").exists()
+
+
+def test_run_digest_from_jsonl_source(workdir, fake_fetch, capsys):
+    """Test ranking a bulk-imported JSON Lines file without fetching."""
+    path = workdir / "repos.jsonl"
+    path.write_text("".join(json.dumps(make_repo(f"repo{i}", stars=i)) + "\n" for i in range(50)))
+
+    paths = run_digest(["rag"], limit=3, config=CONFIG, source=read_repos_jsonl(str(path)))
+
+    assert fake_fetch == []
+    report = (workdir / paths[0]).read_text()
+    assert "**Repositories Analyzed:** 3" in report
+    assert report.index("[repo49]") < report.index("[repo48]") < report.index("[repo47]")
+    assert "[repo46]" not in report
+    assert "Found 50 repositories" in capsys.readouterr().out
+
+
+def test_run_digest_source_needs_single_topic(workdir):
+    """Test that a candidate source is rejected for batch runs."""
+    with pytest.raises(ValueError):
+        run_digest(["rag", "llm"], config=CONFIG, source=iter([]))
+
+
+def test_run_digest_sharded_ranks_whole_pool(workdir, fake_fetch, monkeypatch):
+    """Test that a sharded run ranks every fetched repo instead of paging a search."""
+    pool = [make_repo(f"repo{i}", stars=i) for i in range(3000)]
+    calls = []
+    monkeypatch.setattr(pipeline, "fetch_sharded", lambda topic, by: calls.append((topic, by)) or pool)
+
+    paths = run_digest(["rag"], limit=2, date="2024-02-03", config=CONFIG, shard_by="created")
+
+    assert calls == [("rag", "created")] and fake_fetch == []
+    report = (workdir / paths[0]).read_text()
+    assert "[repo2999]" in report and "[repo2998]" in report
+    with pytest.raises(ValueError):
+        run_digest(["rag"], config=CONFIG, source=iter([]), shard_by="stars")
+
+
+def test_run_digest_enriches_only_reported_repos(workdir, fake_fetch, monkeypatch):
+    """Test that enrichment runs once, after ranking, for the reported repos only."""
+    calls = []
+
+    def enrich_repos(repos, ttl_hours):
+        calls.append([repo["name"] for repo in repos])
+        for repo in repos:
+            repo["details"] = {"open_issues": 7}
+
+    monkeypatch.setattr(pipeline, "enrich_repos", enrich_repos)
+    paths = run_digest(["rag", "llm"], limit=1, date="2024-02-03", config=CONFIG, enrich=True)
+
+    assert calls == [["shared", "llm-only"]]
+    assert "Activity: 7 open issues" in (workdir / paths[0]).read_text()
+
+
+def test_run_digest_archives_fetched_repos(workdir, fake_fetch):
+    """Test that every fetched repo lands in the day's snapshot, tagged by topic."""
+    run_digest(["rag", "llm"], limit=1, date="2024-01-02", config=CONFIG)
+
+    with Snapshot(snapshot_path("2024-01-02", workdir / "snapshots")) as snapshot:
+        assert sorted(zip(snapshot.strings("topic"), snapshot.strings("name"))) == [
+            ("llm", "llm-only"), ("rag", "rag-only"), ("rag", "shared")
+        ]
+
+
+def test_run_digest_snapshot_can_be_disabled(workdir, fake_fetch):
+    """Test that a null snapshot_dir skips the archive."""
+    run_digest(["rag"], limit=1, config=dict(CONFIG, snapshot_dir=None))
+    assert not (workdir / "snapshots").exists()
+
+
+def test_run_digest_trending_builds_index(workdir, fake_fetch):
+    """Test that trending runs fold each day's snapshot into the trend index."""
+    from src.trends import TRENDS_FILE, TrendIndex
+
+    run_digest(["rag"], limit=1, date="2024-01-01", config=CONFIG, rank_mode="trending")
+    index = TrendIndex.load(TRENDS_FILE)
+    assert index.through == "2024-01-01"
+    assert "owner/rag-only" in index
+
+    with pytest.raises(ValueError):
+        run_digest(["rag"], config=CONFIG, rank_mode="hot")
+
+
+def test_run_digest_trending_looks_past_most_starred(workdir, monkeypatch):
+    """Test that a fast-growing repo below the star top-limit is the one reported."""
+    giants = [make_repo(f"giant{i}", 50_000) for i in range(5)]
+    writer = SnapshotWriter(snapshot_path("2024-01-01"))
+    for repo in giants + [make_repo("rising", 100)]:
+        writer.add(repo, "rag")
+    writer.close()
+
+    today = [dict(repo, stars=repo["stars"] + 1) for repo in giants] + [make_repo("rising", 2_000)]
+    limits = []
+
+    def iter_repos(topic, limit, seen=None):
+        limits.append(limit)
+        yield from today[:limit]
+
+    monkeypatch.setattr(pipeline, "iter_repos", iter_repos)
+    paths = run_digest(["rag"], limit=2, date="2024-01-02", config=CONFIG, rank_mode="trending")
+
+    assert limits == [pipeline.MAX_RESULTS]
+    report = (workdir / paths[0]).read_text()
+    assert report.index("owner/rising") < report.index("owner/giant")
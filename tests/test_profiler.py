@@ -0,0 +1,57 @@
+"""Tests for the cProfile and stack-sampling hooks."""
+import pstats
+import time
+from src import metrics
+from src.profiler import Profiler, profiled
+
+
+def busy_inside(seconds=0.05):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def busy_outside(seconds=0.05):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def profiled_names(path):
+    return {func for _, _, func in pstats.Stats(str(path)).stats}
+
+
+def test_profiled_writes_pstats_and_collapsed_stacks(tmp_path):
+    """Test that a whole-block profile writes both result files."""
+    output = tmp_path / "run.prof"
+    with profiled(output, interval=0.001):
+        busy_inside()
+
+    assert "busy_inside" in profiled_names(output)
+    lines = (tmp_path / "run.collapsed").read_text().splitlines()
+    assert any("busy_inside (test_profiler.py" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profile_scoped_to_stage(tmp_path):
+    """Test that only time inside the chosen stage is profiled."""
+    with Profiler(stage="score", interval=0.001) as profiler:
+        busy_outside()
+        with metrics.timer("score"):
+            busy_inside()
+        metrics.timed(busy_outside, "cache.load")()
+
+    profiler.dump_stats(tmp_path / "score.prof")
+    profiler.write_collapsed(tmp_path / "score.collapsed")
+    names = profiled_names(tmp_path / "score.prof")
+    stacks = (tmp_path / "score.collapsed").read_text()
+    assert "busy_inside" in names and "busy_outside" not in names
+    assert "busy_inside" in stacks and "busy_outside" not in stacks
+    assert metrics.report()["timers"] == {}  # Observing doesn't turn metrics on
+
+
+def test_stage_observer_removed_after_stop():
+    """Test that timers go back to no-ops once profiling stops."""
+    with Profiler(stage="score", interval=0):
+        pass
+    assert metrics.timer("score") is metrics.timer("other")
@@ -0,0 +1,92 @@
+"""Tests for the rate-limit scheduler."""
+import pytest
+from src.rate_limiter import MAX_RESET_WAIT, RateLimiter, is_rate_limited
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_reserve_within_budget():
+    """Test that requests within the budget don't wait."""
+    limiter = RateLimiter(limit=3, window=60, clock=FakeClock())
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_reserve_queues_into_next_window():
+    """Test that requests over the budget wait for the following windows."""
+    clock = FakeClock()
+    limiter = RateLimiter(limit=2, window=60, clock=clock)
+
+    waits = [limiter.reserve() for _ in range(5)]
+    assert waits == [0.0, 0.0, 60.0, 60.0, 120.0]
+
+
+def test_reserve_refills_after_reset():
+    """Test that the bucket refills once the window has passed."""
+    clock = FakeClock()
+    limiter = RateLimiter(limit=1, window=60, clock=clock)
+    limiter.reserve()
+
+    clock.now += 61
+    assert limiter.reserve() == 0.0
+
+
+def test_update_learns_budget_from_headers():
+    """Test that headers lower the budget and move the reset time."""
+    clock = FakeClock()
+    limiter = RateLimiter(limit=10, window=60, clock=clock)
+    limiter.update({
+        "X-RateLimit-Limit": "30",
+        "X-RateLimit-Remaining": "1",
+        "X-RateLimit-Reset": "1030"
+    })
+
+    assert limiter.limit == 30
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 30.0
+
+
+def test_update_ignores_missing_headers():
+    """Test that responses without rate-limit headers change nothing."""
+    limiter = RateLimiter(limit=5, clock=FakeClock())
+    limiter.update({})
+    assert limiter.remaining == 5
+
+
+def test_exhaust_waits_for_server_reset():
+    """Test that a rejected request waits for the advertised reset."""
+    clock = FakeClock()
+    limiter = RateLimiter(limit=10, window=60, clock=clock)
+    limiter.exhaust({"X-RateLimit-Reset": "1045"})
+    assert limiter.reserve() == 45.0
+
+
+def test_far_future_reset_is_capped():
+    """Test that a bogus or skewed reset time can't stall the scheduler for longer than the cap."""
+    clock = FakeClock()
+    limiter = RateLimiter(limit=10, window=60, clock=clock)
+    limiter.exhaust({"X-RateLimit-Reset": "9999999999"})
+    assert limiter.reserve() == MAX_RESET_WAIT
+
+    limiter = RateLimiter(limit=10, window=60, clock=clock)
+    limiter.update({
+        "X-RateLimit-Limit": "10",
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": "9999999999"
+    })
+    assert limiter.reserve() == MAX_RESET_WAIT
+
+
+def test_is_rate_limited():
+    """Test detection of rate-limit rejections."""
+    assert is_rate_limited(403, {"X-RateLimit-Remaining": "0"})
+    assert is_rate_limited(429, {"X-RateLimit-Remaining": "0"})
+    assert not is_rate_limited(403, {"X-RateLimit-Remaining": "5"})
+    assert not is_rate_limited(200, {"X-RateLimit-Remaining": "0"})
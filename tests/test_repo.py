@@ -0,0 +1,90 @@
+"""Tests for the compact repository record."""
+import pickle
+import pytest
+from src.repo import Repo, parse_timestamp
+
+
+def make_record():
+    return Repo(
+        name="Awesome-RAG",
+        full_name="owner/Awesome-RAG",
+        description="A RAG Toolkit",
+        url="https://github.com/owner/Awesome-RAG",
+        stars=1200,
+        forks=34,
+        language="Python",
+        updated_at="2024-01-02T03:04:05Z",
+        topics=["RAG", "LLM"]
+    )
+
+
+def test_repo_behaves_like_dict():
+    """Test dictionary-style access to the public fields."""
+    repo = make_record()
+
+    assert repo["stars"] == 1200
+    assert repo.get("language") == "Python"
+    assert repo.get("missing", "default") == "default"
+    assert "score" not in repo
+    assert len(repo) == 9
+    assert dict(repo)["topics"] == ["RAG", "LLM"]
+    assert repo == Repo.from_dict(dict(repo))
+    assert dict(repo) == repo
+    with pytest.raises(KeyError):
+        repo["missing"]
+
+
+def test_repo_score_and_copy():
+    """Test that score is settable and copies are independent."""
+    repo = make_record()
+    scored = repo.copy()
+    scored["score"] = 42.0
+
+    assert scored["score"] == 42.0
+    assert len(scored) == 10
+    assert "score" not in repo
+    with pytest.raises(KeyError):
+        repo["homepage"] = "https://example.com"
+
+
+def test_repo_details_round_trip():
+    """Test that enrichment details are an optional key like score."""
+    repo = make_record()
+    assert repo.get("details") is None and "details" not in dict(repo)
+
+    repo["details"] = {"open_issues": 3}
+    assert Repo.from_dict(repo.to_dict())["details"] == {"open_issues": 3}
+    assert len(repo) == 10
+
+
+def test_repo_precomputes_lowercase_and_timestamp():
+    """Test the derived fields, including after an update."""
+    repo = make_record()
+
+    assert repo.text() == "awesome-rag\0a rag toolkit"
+    assert repo.topics_lower == ["rag", "llm"]
+    assert repo.updated_ts == 1704164645
+    assert repo["updated_at"] == "2024-01-02T03:04:05Z"
+
+    repo["description"] = "Agents"
+    assert repo.text() == "awesome-rag\0agents"
+
+
+def test_parse_timestamp_rejects_inexact_values():
+    """Test that only exact, timezone-aware timestamps are converted."""
+    assert parse_timestamp("2024-01-02T03:04:05+00:00") == 1704164645
+    assert parse_timestamp("2024-01-02T03:04:05.5Z") is None
+    assert parse_timestamp("2024-01-02T03:04:05") is None
+    assert parse_timestamp("not-a-date") is None
+    assert parse_timestamp(None) is None
+
+    lenient = Repo(updated_at="2024-01-02T03:04:05+00:00")
+    assert lenient["updated_at"] == "2024-01-02T03:04:05+00:00"
+    assert lenient.updated_ts == 1704164645
+
+
+def test_repo_has_no_instance_dict():
+    """Test that records use slots and survive pickling."""
+    repo = make_record()
+    assert not hasattr(repo, "__dict__")
+    assert pickle.loads(pickle.dumps(repo)) == repo
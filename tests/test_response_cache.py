@@ -0,0 +1,54 @@
+"""Tests for the on-disk HTTP response cache."""
+import pytest
+from src.response_cache import ResponseCache, make_key
+
+
+URL = "https://api.github.com/search/repositories"
+
+
+def test_make_key_normalizes_query():
+    """Test that equivalent queries share a cache key."""
+    a = make_key(URL, {"q": "RAG  stars:>50", "page": 1})
+    b = make_key(URL, {"page": "1", "q": "rag stars:>50"})
+    c = make_key(URL, {"q": "rag stars:>50", "page": 2})
+    assert a == b
+    assert a != c
+
+
+def test_store_and_load(tmp_path):
+    """Test storing a response and reading back its validators and body."""
+    cache = ResponseCache(directory=tmp_path)
+    cache.store("k", b'{"items": []}', etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+    assert cache.validators("k") == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"
+    }
+    assert cache.load("k") == b'{"items": []}'
+
+    # Index survives a reload
+    reloaded = ResponseCache(directory=tmp_path)
+    assert reloaded.load("k") == b'{"items": []}'
+
+
+def test_store_skips_responses_without_validators(tmp_path):
+    """Test that responses we can't revalidate aren't cached."""
+    cache = ResponseCache(directory=tmp_path)
+    cache.store("k", b"{}")
+    assert cache.validators("k") == {}
+    assert cache.load("k") is None
+
+
+def test_lru_eviction(tmp_path):
+    """Test that the least recently used entry is evicted over the cap."""
+    cache = ResponseCache(directory=tmp_path, max_bytes=20)
+    cache.store("a", b"x" * 8, etag="a")
+    cache.store("b", b"x" * 8, etag="b")
+    cache.load("a")  # "b" is now least recently used
+    cache.store("c", b"x" * 8, etag="c")
+
+    assert cache.load("b") is None
+    assert cache.load("a") is not None
+    assert cache.load("c") is not None
+    assert cache.size() <= 20
+    assert not (tmp_path / "b.json").exists()
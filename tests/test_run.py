@@ -0,0 +1,81 @@
+"""Tests for CLI startup in run.py."""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+
+RUN_PY = Path(__file__).resolve().parent.parent / "run.py"
+
+# Run the CLI in-process, then report which heavy modules it loaded
+SCRIPT = """
+import runpy, sys
+sys.argv = ["run.py"] + sys.argv[1:]
+sys.path.insert(0, {root!r})
+try:
+    runpy.run_path({run_py!r}, run_name="__main__")
+except SystemExit:
+    pass
+print("loaded:", " ".join(m for m in ("requests", "numpy", "src.pipeline") if m in sys.modules))
+"""
+
+REPORT = "# GitHub AI Digest - 2024-02-03\n\n**Topic:** rag\n"
+
+
+def write_rag_report(cwd):
+    """Write daily/2024-02-03.md as a run for the rag topic would, with its runs file."""
+    (cwd / "daily").mkdir()
+    (cwd / "daily" / "2024-02-03.md").write_text(REPORT)
+    (cwd / "daily" / ".runs.json").write_text(json.dumps({
+        "date": "2024-02-03", "runs": {"rag": [["daily/2024-02-03.md", "rag"]]}
+    }))
+
+
+def run_cli(cwd, *args, env=None):
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(run_py=str(RUN_PY), root=str(RUN_PY.parent)), *args],
+        cwd=cwd, capture_output=True, text=True, env=env, check=True
+    )
+    return result.stdout
+
+
+def test_help_loads_no_pipeline_modules(tmp_path):
+    """Test that --help returns before any src module is imported."""
+    output = run_cli(tmp_path, "--help", "--skip-checks")
+    assert output.rstrip().endswith("loaded:")
+
+
+def test_existing_report_exits_before_network_imports(tmp_path):
+    """Test that a run with today's report present exits early unless forced."""
+    write_rag_report(tmp_path)
+
+    output = run_cli(tmp_path, "--topic", "rag", "--date", "2024-02-03", "--skip-checks")
+    assert "Nothing to do" in output
+    assert output.rstrip().endswith("loaded:")
+
+
+def test_report_for_another_topic_doesnt_exit_early(tmp_path):
+    """Test that another topic's report from the same day doesn't stop a run."""
+    write_rag_report(tmp_path)
+    jsonl = tmp_path / "repos.jsonl"
+    jsonl.write_text("")
+
+    output = run_cli(tmp_path, "--topic", "llm", "--date", "2024-02-03", "--skip-checks",
+                     "--input", str(jsonl))
+    assert "Nothing to do" not in output
+    assert "src.pipeline" in output.splitlines()[-1]
+
+
+def test_checks_cached_per_interpreter(tmp_path):
+    """Test that the checks run once, write a marker, and are skipped while it matches."""
+    write_rag_report(tmp_path)
+    args = ("--topic", "rag", "--date", "2024-02-03")
+
+    run_cli(tmp_path, *args)
+    marker = tmp_path / "cache" / ".environment"
+    assert sys.executable in marker.read_text()
+    assert "virtual environment" not in run_cli(tmp_path, *args)
+
+    marker.write_text("other interpreter")
+    run_cli(tmp_path, *args, "--skip-checks")
+    assert marker.read_text() == "other interpreter"
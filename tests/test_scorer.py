@@ -1,11 +1,15 @@
 """Tests for scoring logic."""
 import pytest
 from datetime import datetime, timedelta, timezone
+from src import scorer
+from src.repo import Repo
 from src.scorer import (
     calculate_recency_score,
     calculate_keyword_match,
     score_repo,
-    rank_repos
+    score_repos,
+    rank_repos,
+    top_k_repos
 )
 
 
@@ -85,3 +89,101 @@ def test_rank_repos():
     assert len(ranked) == 3
     assert all("score" in repo for repo in ranked)
     assert ranked[0]["stars"] >= ranked[1]["stars"] or ranked[0]["updated_at"] > ranked[1]["updated_at"]
+
+
+def make_corpus(now):
+    """Repos covering the edge cases of the scoring formula."""
+    def ts(days, seconds=0):
+        return (now - timedelta(days=days, seconds=seconds)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    return [
+        {"name": "rag-kit", "description": "RAG toolkit", "stars": 15000, "forks": 2000, "updated_at": ts(0, 30), "topics": ["rag"]},
+        {"name": "tiny", "description": "Small", "stars": 51, "forks": 0, "updated_at": ts(1), "topics": []},
+        {"name": "edge", "description": "Exactly one day", "stars": 10000, "forks": 1000, "updated_at": ts(1, -1), "topics": []},
+        {"name": "old", "description": "Old project", "stars": 3333, "forks": 333, "updated_at": ts(364, 5), "topics": ["llm"]},
+        {"name": "ancient", "description": "Ancient", "stars": 7, "forks": 3, "updated_at": ts(400), "topics": []},
+        {"name": "future", "description": "Clock skew", "stars": 123, "forks": 45, "updated_at": ts(-3), "topics": []},
+    ]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_score_repos_matches_score_repo(monkeypatch, use_numpy):
+    """Test that batch scoring gives exactly the per-repo scores."""
+    if not use_numpy:
+        monkeypatch.setattr(scorer, "np", None)
+    elif scorer._numpy() is None:
+        pytest.skip("NumPy not installed")
+
+    now = datetime.now(timezone.utc)
+    repos = make_corpus(now)
+    preferences = {"preferred_topics": ["llm", "toolkit"], "topic_boost_multiplier": 1.5}
+
+    expected = [score_repo(repo, "rag", preferences, now=now) for repo in repos]
+    assert score_repos(repos, "rag", preferences, now=now) == expected
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_repo_records_score_like_dicts(monkeypatch, use_numpy):
+    """Test that the precomputed fields of Repo records give identical scores."""
+    if not use_numpy:
+        monkeypatch.setattr(scorer, "np", None)
+    elif scorer._numpy() is None:
+        pytest.skip("NumPy not installed")
+
+    now = datetime.now(timezone.utc)
+    dicts = make_corpus(now)
+    records = [Repo.from_dict(repo) for repo in dicts]
+    preferences = {"preferred_topics": ["llm", "toolkit"], "topic_boost_multiplier": 1.5}
+
+    assert score_repos(records, "rag", preferences, now=now) == score_repos(dicts, "rag", preferences, now=now)
+    top = top_k_repos(records, 3, "rag", preferences, now=now)
+    expected = top_k_repos(dicts, 3, "rag", preferences, now=now)
+    assert [(r["name"], r["score"]) for r in top] == [(r["name"], r["score"]) for r in expected]
+
+
+def test_score_repos_lenient_timestamps():
+    """Test that non-canonical and invalid timestamps score like score_repo."""
+    now = datetime.now(timezone.utc)
+    repos = make_corpus(now)
+    repos[0]["updated_at"] = (now - timedelta(days=20)).isoformat()
+    repos[1]["updated_at"] = "not a date"
+    repos[2]["updated_at"] = ""
+
+    expected = [score_repo(repo, "rag", now=now) for repo in repos]
+    assert score_repos(repos, "rag", now=now) == expected
+
+
+def test_top_k_repos_matches_full_sort():
+    """Test that top-k selection equals sorting everything and slicing."""
+    now = datetime.now(timezone.utc)
+    repos = make_corpus(now) * 3  # Duplicates create ties
+    expected = rank_repos([dict(r) for r in repos], "rag")[:7]
+
+    top = top_k_repos(repos, 7, "rag", now=now)
+    assert [r["name"] for r in top] == [r["name"] for r in expected]
+    assert [r["score"] for r in top] == sorted((r["score"] for r in top), reverse=True)
+
+
+def test_top_k_repos_does_not_mutate_input():
+    """Test that scores are written to copies, not the caller's dicts."""
+    repos = make_corpus(datetime.now(timezone.utc))
+    top = top_k_repos(repos, 2, "rag")
+    assert len(top) == 2
+    assert all("score" not in repo for repo in repos)
+
+
+def test_top_k_repos_ties_keep_input_order():
+    """Test deterministic tie breaking on equal scores."""
+    repos = [
+        {"name": f"repo{i}", "stars": 100, "forks": 10, "updated_at": "", "description": "x", "topics": []}
+        for i in range(5)
+    ]
+    top = top_k_repos(iter(repos), 3, "rag")
+    assert [r["name"] for r in top] == ["repo0", "repo1", "repo2"]
+
+
+def test_top_k_repos_small_inputs():
+    """Test k larger than the input and non-positive k."""
+    repos = make_corpus(datetime.now(timezone.utc))
+    assert len(top_k_repos(repos, 100, "rag")) == len(repos)
+    assert top_k_repos(repos, 0, "rag") == []
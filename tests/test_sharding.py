@@ -0,0 +1,46 @@
+"""Tests for sharded fetching past the 1,000-result search cap."""
+from datetime import date
+import pytest
+from src.sharding import MIN_STARS, Shard, fetch_sharded
+from src.stub_server import generate_items
+
+
+TODAY = date(2024, 6, 1)
+
+
+@pytest.fixture
+def server(stub_api):
+    """Serve 2,500 repos per topic."""
+    return stub_api(repos=2500)
+
+
+def test_shard_queries():
+    """Test the qualifiers each shard adds to the topic query."""
+    assert Shard().query("rag") == f"rag stars:>={MIN_STARS}"
+    shard = Shard((100, 200), (date(2020, 1, 1), date(2020, 12, 31)))
+    assert shard.query("rag") == "rag stars:100..200 created:2020-01-01..2020-12-31"
+
+
+def test_shard_splits_are_disjoint_and_complete():
+    """Test star and date splits, and the fallback once a range is a single value."""
+    low, high = Shard().split_stars(top=10_000)
+    assert low.stars == (MIN_STARS, 714) and high.stars == (715, None)
+
+    first, second = Shard((100, 100)).split("stars", top=100, today=TODAY)
+    assert first.stars == second.stars == (100, 100)
+    assert first.created[0] == date(2008, 1, 1) and second.created[1] == TODAY
+    assert (second.created[0] - first.created[1]).days == 1
+
+    assert Shard((100, 100), (TODAY, TODAY)).split("created", top=100, today=TODAY) is None
+
+
+@pytest.mark.parametrize("by", ["stars", "created"])
+def test_fetch_sharded_gets_every_repo(server, by):
+    """Test that a topic matching 2,500 repos is fetched completely, once each."""
+    repos = fetch_sharded("rag", by=by, today=TODAY)
+
+    expected = {item["full_name"] for item in generate_items("rag", 2500)}
+    assert len(repos) == len(expected)
+    assert {repo["full_name"] for repo in repos} == expected
+    stars = [repo["stars"] for repo in repos]
+    assert stars == sorted(stars, reverse=True)
@@ -0,0 +1,93 @@
+"""Tests for coalescing identical calls."""
+import threading
+import time
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_callers_share_one_call():
+    """Test that callers arriving while a call runs wait for its result."""
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.call("key", slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.call("key", slow)))
+                 for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == ["result"] * 6
+    assert len(calls) == 1
+
+
+def test_results_expire_after_ttl():
+    """Test that a result is reused until its TTL runs out."""
+    clock = FakeClock()
+    flight = SingleFlight(ttl=10, clock=clock)
+    calls = []
+
+    def call():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.call("key", call) == 1
+    clock.now = 9.9
+    assert flight.call("key", call) == 1
+    clock.now = 10
+    assert flight.call("key", call) == 2
+    assert flight.call("other", call) == 3
+
+
+def test_failures_are_shared_but_not_kept():
+    """Test that an exception reaches the caller and the next call retries."""
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.call("key", fail)
+    assert len(flight) == 0
+    assert flight.call("key", lambda: "ok") == "ok"
+
+
+def test_oldest_results_are_dropped():
+    """Test that at most max_entries results are kept."""
+    flight = SingleFlight(max_entries=2)
+    for key in "abc":
+        flight.call(key, lambda: key)
+    assert len(flight) == 2
+    assert flight.call("a", lambda: "again") == "again"
+    assert flight.call("c", lambda: "again") == "c"
+
+
+def test_zero_ttl_only_shares_in_flight_calls():
+    """Test that nothing is kept with a TTL of 0."""
+    flight = SingleFlight(ttl=0)
+    assert flight.call("key", lambda: 1) == 1
+    assert flight.call("key", lambda: 2) == 2
+    assert len(flight) == 0
@@ -0,0 +1,155 @@
+"""Tests for the columnar snapshot archive."""
+import threading
+import time
+
+import pytest
+from src import snapshot as snapshot_module
+from src.repo import Repo
+from src.snapshot import (
+    Snapshot,
+    SnapshotWriter,
+    complete_length,
+    encode_block,
+    list_snapshots,
+    open_snapshots,
+    snapshot_path
+)
+
+
+def make_record(i, updated_at="2024-01-02T03:04:05Z"):
+    return Repo(
+        name=f"repo{i}",
+        full_name=f"owner/repo{i}",
+        description=f"Project número {i}",
+        url=f"https://github.com/owner/repo{i}",
+        stars=1000 + i,
+        forks=i,
+        language="Python",
+        updated_at=updated_at,
+        topics=["rag", "llm"] if i % 2 else []
+    )
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test that repos read back equal to what was written."""
+    path = snapshot_path("2024-01-02", tmp_path)
+    repos = [make_record(i) for i in range(4)] + [
+        make_record(4, "2024-01-02T03:04:05+00:00"),
+        make_record(5, "")
+    ]
+
+    writer = SnapshotWriter(path, block_size=4)
+    for repo in repos:
+        writer.add(repo, topic="rag")
+    writer.close()
+
+    with Snapshot(path) as snapshot:
+        assert len(snapshot.blocks) == 2
+        assert list(snapshot.repos()) == repos
+        assert list(snapshot.column("stars")) == [1000 + i for i in range(6)]
+        assert snapshot.strings("topic") == ["rag"] * 6
+
+
+def test_snapshot_appends_blocks(tmp_path):
+    """Test that later runs on the same day add to the file."""
+    path = snapshot_path("2024-01-02", tmp_path)
+    for start in (0, 3):
+        writer = SnapshotWriter(path)
+        list(writer.record((make_record(i) for i in range(start, start + 3)), topic="llm"))
+        writer.close()
+        assert writer.written == 3
+
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 6
+        assert snapshot.strings("full_name") == [f"owner/repo{i}" for i in range(6)]
+
+
+def test_snapshot_ignores_truncated_block(tmp_path):
+    """Test that an interrupted append doesn't hide earlier blocks."""
+    path = snapshot_path("2024-01-02", tmp_path)
+    writer = SnapshotWriter(path, block_size=2)
+    for i in range(4):
+        writer.add(make_record(i))
+    writer.close()
+    path.write_bytes(path.read_bytes()[:-8])
+
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 2
+
+
+def test_append_after_truncated_block(tmp_path):
+    """Test that a later run cuts off an incomplete block so its own blocks stay readable."""
+    path = snapshot_path("2024-01-02", tmp_path)
+    writer = SnapshotWriter(path, block_size=2)
+    for i in range(4):
+        writer.add(make_record(i))
+    writer.close()
+    path.write_bytes(path.read_bytes()[:-8])
+    complete = complete_length(path)
+
+    writer = SnapshotWriter(path, block_size=2)
+    for i in range(4, 8):
+        writer.add(make_record(i))
+    writer.close()
+
+    with Snapshot(path) as snapshot:
+        assert [block.count for block in snapshot.blocks] == [2, 2, 2]
+        assert snapshot.strings("full_name") == [f"owner/repo{i}" for i in (0, 1, 4, 5, 6, 7)]
+        assert snapshot.blocks[0].end == complete
+    assert complete_length(path) == path.stat().st_size
+
+
+@pytest.mark.skipif(snapshot_module.fcntl is None, reason="needs file locks")
+def test_first_append_waits_for_another_writers_append(tmp_path):
+    """Test that a writer doesn't cut off a block another writer is still appending."""
+    path = snapshot_path("2024-01-02", tmp_path)
+    writer = SnapshotWriter(path)
+    writer.add(make_record(0))
+    writer.close()
+
+    block = encode_block([make_record(1), make_record(2)], ["", ""])
+    other = SnapshotWriter(path)
+    other.add(make_record(3))
+    with open(path, 'ab') as f:
+        snapshot_module.fcntl.flock(f.fileno(), snapshot_module.fcntl.LOCK_EX)
+        f.write(block[:len(block) // 2])
+        f.flush()
+        thread = threading.Thread(target=other.close)
+        thread.start()
+        time.sleep(0.1)
+        assert thread.is_alive()
+        f.write(block[len(block) // 2:])
+    thread.join(5)
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.strings("full_name") == [f"owner/repo{i}" for i in range(4)]
+
+
+def test_open_snapshots_by_date(tmp_path):
+    """Test selecting snapshot files by date range."""
+    for date in ("2024-01-01", "2024-01-02", "2024-01-03"):
+        writer = SnapshotWriter(snapshot_path(date, tmp_path))
+        writer.add(make_record(0))
+        writer.close()
+    (tmp_path / "notes.snap").write_text("")
+
+    assert [p.name for p in list_snapshots(tmp_path, since="2024-01-02")] == [
+        "2024-01-02.snap", "2024-01-03.snap"
+    ]
+    snapshots = open_snapshots(tmp_path, until="2024-01-01")
+    assert [s.date for s in snapshots] == ["2024-01-01"]
+    for snapshot in snapshots:
+        snapshot.close()
+
+
+def test_column_works_with_numpy(tmp_path):
+    """Test that integer columns convert to NumPy arrays."""
+    np = pytest.importorskip("numpy")
+    path = snapshot_path("2024-01-02", tmp_path)
+    writer = SnapshotWriter(path)
+    for i in range(3):
+        writer.add(make_record(i))
+    writer.close()
+
+    with Snapshot(path) as snapshot:
+        assert np.asarray(snapshot.column("forks")).sum() == 3
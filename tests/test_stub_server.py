@@ -0,0 +1,126 @@
+"""Tests for the stub GitHub server and offline record/replay."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from src import github_fetcher
+from src.stub_server import filter_items, generate_items, parse_query, parse_range
+
+
+def test_generate_items_is_deterministic():
+    """Test that a query always gets the same corpus, sorted by stars."""
+    items = generate_items("rag stars:>50", 50)
+    assert items == generate_items("rag stars:>50", 50)
+    assert items != generate_items("rag stars:>50", 50, seed=1)
+    stars = [item["stargazers_count"] for item in items]
+    assert stars == sorted(stars, reverse=True)
+
+
+def test_stub_search_qualifiers():
+    """Test that stars: and created: qualifiers narrow one shared corpus."""
+    assert parse_range("stargazers_count", ">50") == (51, None)
+    assert parse_range("stargazers_count", "10..20") == (10, 20)
+    assert parse_range("stargazers_count", "*..20") == (None, 20)
+
+    terms, filters = parse_query("RAG stars:>100 created:2023-01-01..2023-12-31 sort:stars")
+    assert terms == ["rag"] and len(filters) == 2
+
+    items = generate_items("rag", 500)
+    assert generate_items("rag stars:>50", 500) == items
+    low = filter_items(items, parse_query("rag stars:<=200")[1])
+    high = filter_items(items, parse_query("rag stars:>200")[1])
+    assert len(low) + len(high) == len(items)
+    assert all(item["stargazers_count"] > 200 for item in high)
+
+    in_2023 = filter_items(items, parse_query("rag created:2023-01-01..2023-12-31")[1])
+    assert in_2023 and all(item["created_at"].startswith("2023-") for item in in_2023)
+
+
+def test_fetch_repos_from_stub(fetcher, stub):
+    """Test paging through the stub like the real search API."""
+    server, url = stub(repos=250)
+    fetcher.configure_api_url(url)
+
+    repos = fetcher.fetch_repos("rag", limit=500)
+    expected = generate_items("rag stars:>50", 250)
+
+    assert [r["full_name"] for r in repos] == [item["full_name"] for item in expected]
+    assert server.state.requests >= 3
+
+
+def test_record_then_replay_offline(fetcher, stub, tmp_path):
+    """Test that a recorded run replays identically with the server gone."""
+    server, url = stub(repos=150)
+    fetcher.configure_api_url(url)
+    fetcher.configure_recording(record_dir=tmp_path / "rec")
+    recorded = fetcher.fetch_repos("rag", limit=120)
+    server.shutdown()
+    server.server_close()
+
+    fetcher.configure_api_url("http://127.0.0.1:9")  # Nothing listens here
+    fetcher.configure_recording(replay_dir=tmp_path / "rec")
+    assert fetcher.fetch_repos("rag", limit=120) == recorded
+
+    # A query that was never recorded fails like a network error
+    assert fetcher.fetch_repos("llm", limit=10) == []
+
+
+def test_stub_rate_limit_and_errors(stub):
+    """Test rate-limit headers, the 403 once the budget is spent, and injected errors."""
+    _, url = stub(repos=10, rate_limit=2)
+    search = url + "/search/repositories"
+
+    first = requests.get(search, params={"q": "rag"})
+    assert first.status_code == 200
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    requests.get(search, params={"q": "rag"})
+    limited = requests.get(search, params={"q": "rag"})
+    assert limited.status_code == 403
+    assert limited.headers["X-RateLimit-Remaining"] == "0"
+
+    _, url = stub(repos=10, error_rate=1.0)
+    assert requests.get(url + "/search/repositories", params={"q": "rag"}).status_code == 502
+
+
+def test_stub_retries_and_revalidation(fetcher, stub, tmp_path, monkeypatch):
+    """Test that injected errors are retried and unchanged pages come back as 304."""
+    monkeypatch.setattr(github_fetcher.time, "sleep", lambda seconds: None)
+
+    server, url = stub(repos=10, error_rate=1.0)
+    fetcher.configure_api_url(url)
+    assert fetcher.fetch_repos("rag", limit=5) == []
+    assert server.state.requests == github_fetcher.MAX_RETRIES + 1
+
+    server, url = stub(repos=10)
+    fetcher.configure_api_url(url)
+    fetcher.configure_response_cache(directory=tmp_path / "http")
+    first = fetcher.fetch_repos("rag", limit=5)
+    assert fetcher.fetch_repos("rag", limit=5) == first
+    assert server.state.not_modified == 1
+
+
+def test_identical_searches_share_one_request(fetcher, stub):
+    """Test that concurrent threads and tasks asking for the same page cause one request."""
+    server, url = stub(repos=50, latency=0.2)
+    fetcher.configure_api_url(url)
+    fetcher.configure_coalescing(ttl=60)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(fetcher.search_page, query, 1, 20)
+                   for query in ["rag stars:>50", "RAG  stars:>50"] * 4]
+        results = [future.result() for future in futures]
+    assert server.state.requests == 1
+    assert all(result == results[0] for result in results)
+    assert results[0][1][0] is not results[1][1][0]  # Each caller gets its own records
+
+    async def main():
+        return await asyncio.gather(*[fetcher.search_page_async("rag stars:>50", 2, 20)
+                                      for _ in range(5)])
+
+    pages = asyncio.run(main())
+    assert server.state.requests == 2
+    assert all(page == pages[0] for page in pages)
+
+    # Within the TTL, later callers are answered from memory
+    assert fetcher.search_page("rag stars:>50", 1, 20) == results[0]
+    assert server.state.requests == 2
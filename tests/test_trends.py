@@ -0,0 +1,88 @@
+"""Tests for star velocity and trending scores."""
+from datetime import date as Date
+from src.repo import Repo
+from src.scorer import top_k_repos
+from src.snapshot import SnapshotWriter, snapshot_path
+from src.trends import TrendIndex, trending_scorer
+
+
+def make_record(name, stars, forks=0):
+    return Repo(name=name, full_name=f"owner/{name}", description=name, stars=stars, forks=forks,
+                updated_at="2024-01-01T00:00:00Z")
+
+
+def write_day(directory, date, repos):
+    writer = SnapshotWriter(snapshot_path(date, directory))
+    for repo in repos:
+        writer.add(repo, topic="ai")
+    writer.close()
+
+
+def day(value):
+    return Date.fromisoformat(value).toordinal()
+
+
+def test_velocity_uses_oldest_observation_in_window():
+    """Test stars and forks per day against the start of the window."""
+    index = TrendIndex(window=7)
+    index.observe("owner/a", day("2024-01-01"), 100, 10)  # Outside the window
+    index.observe("owner/a", day("2024-01-05"), 200, 20)
+    index.observe("owner/a", day("2024-01-08"), 260, 26)
+
+    assert index.velocity("owner/a", 300, 30, day("2024-01-10")) == (20.0, 2.0)
+    assert index.velocity("owner/unknown", 300, 30, day("2024-01-10")) == (0.0, 0.0)
+
+
+def test_update_reads_only_new_blocks(tmp_path, monkeypatch):
+    """Test that updating applies new days and new blocks, not old ones."""
+    write_day(tmp_path, "2024-01-01", [make_record("a", 100)])
+    write_day(tmp_path, "2024-01-02", [make_record("a", 150)])
+
+    index = TrendIndex(window=7)
+    assert index.update(tmp_path, today="2024-01-02") == 2
+
+    applied = []
+    original = TrendIndex.apply_snapshot
+
+    def spy(self, snapshot, skip_blocks=0):
+        applied.append((snapshot.date, len(snapshot.blocks) - skip_blocks))
+        original(self, snapshot, skip_blocks)
+
+    monkeypatch.setattr(TrendIndex, "apply_snapshot", spy)
+
+    # A second run on the 2nd appends a block; the 3rd is a new day
+    write_day(tmp_path, "2024-01-02", [make_record("b", 10)])
+    write_day(tmp_path, "2024-01-03", [make_record("a", 210)])
+    index.update(tmp_path, today="2024-01-03")
+
+    assert applied == [("2024-01-02", 1), ("2024-01-03", 1)]
+    assert "owner/b" in index
+    assert index.velocity("owner/a", 210, 0, day("2024-01-04")) == (110 / 3, 0.0)
+
+
+def test_index_round_trip_and_expire(tmp_path):
+    """Test saving, loading and expiring the index."""
+    path = tmp_path / "trends.json"
+    index = TrendIndex(window=3)
+    index.observe("owner/old", day("2024-01-01"), 1, 0)
+    index.observe("owner/new", day("2024-01-09"), 5, 0)
+    assert index.expire("2024-01-10") == 1
+    index.save(path)
+
+    loaded = TrendIndex.load(path, window=3)
+    assert len(loaded) == 1 and "owner/new" in loaded
+    assert len(TrendIndex.load(path, window=7)) == 0
+
+
+def test_trending_scorer_ranks_by_growth():
+    """Test that a fast-growing small repo beats a large static one."""
+    index = TrendIndex(window=7)
+    index.observe("owner/giant", day("2024-01-01"), 90000, 9000)
+    index.observe("owner/rising", day("2024-01-01"), 100, 10)
+
+    repos = [make_record("giant", 90010, 9000), make_record("rising", 800, 40)]
+    score = trending_scorer(index, "ai", date="2024-01-03")
+    top = top_k_repos(repos, 2, "ai", score=score)
+
+    assert [r["name"] for r in top] == ["rising", "giant"]
+    assert top[0]["score"] == (350 * 0.7 + 15 * 0.3)